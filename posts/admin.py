@@ -1,26 +1,184 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
+from django.http import Http404, JsonResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
+from posts import moderation
+from posts.jobs import job_status
+from posts.forms import GroupChoiceField
 from posts.models import Post, Group, Comment
+from posts.paginators import LargeTablePaginator
+from posts.tasks import DATABASE, THREADS, enqueue, get_progress
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist that avoids full COUNT(*) and deep OFFSET over rows."""
+    paginator = LargeTablePaginator
+    show_full_result_count = False
+
+
+class BackgroundActionsAdmin(admin.ModelAdmin):
+    """Admin running bulk actions as background jobs."""
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Default action deletes selected objects inside the request.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                'jobs/<str:job_id>/',
+                self.admin_site.admin_view(self.job_status),
+                name='%s_%s_job' % info
+            ),
+        ] + super().get_urls()
+
+    def job_status(self, request, job_id: str) -> JsonResponse:
+        """Return progress of background job."""
+        progress = None
+        backend = getattr(settings, 'BACKGROUND_TASKS_BACKEND', THREADS)
+        if backend == DATABASE:
+            progress = job_status(job_id)
+        if progress is None:
+            progress = get_progress(job_id)
+        if progress is None:
+            raise Http404('Unknown job.')
+        return JsonResponse(progress)
+
+    def enqueue_action(self, request, func, *args) -> None:
+        """Queue background job and tell user where to follow it."""
+        job_id = enqueue(func, *args)
+        info = self.model._meta.app_label, self.model._meta.model_name
+        self.message_user(
+            request,
+            format_html(
+                'Задача поставлена в очередь: <a href="{}">{}</a>.',
+                reverse(
+                    'admin:%s_%s_job' % info,
+                    kwargs={'job_id': job_id},
+                    current_app=self.admin_site.name
+                ),
+                job_id
+            )
+        )
+
+
+class PostActionForm(ActionForm):
+    group = GroupChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        widget=forms.Select,
+        label='Группа:'
+    )
+
+
+@admin.action(description='Удалить выбранные записи в фоне')
+def delete_posts(modeladmin, request, queryset) -> None:
+    modeladmin.enqueue_action(
+        request,
+        moderation.delete_posts,
+        list(queryset.values_list('pk', flat=True))
+    )
+
+
+@admin.action(description='Перенести выбранные записи в группу')
+def move_posts(modeladmin, request, queryset) -> None:
+    # Admin runs actions only when action form is valid.
+    form = PostActionForm(request.POST)
+    form.is_valid()
+    group = form.cleaned_data.get('group')
+    modeladmin.enqueue_action(
+        request,
+        moderation.move_posts,
+        list(queryset.values_list('pk', flat=True)),
+        group.pk if group else None
+    )
+
+
+@admin.action(description='Скрыть выбранные записи')
+def hide_posts(modeladmin, request, queryset) -> None:
+    modeladmin.enqueue_action(
+        request,
+        moderation.hide_posts,
+        list(queryset.values_list('pk', flat=True))
+    )
+
+
+@admin.action(description='Показать выбранные записи')
+def show_posts(modeladmin, request, queryset) -> None:
+    modeladmin.enqueue_action(
+        request,
+        moderation.hide_posts,
+        list(queryset.values_list('pk', flat=True)),
+        False
+    )
+
+
+@admin.action(description='Удалить все записи и комментарии авторов')
+def purge_authors_content(modeladmin, request, queryset) -> None:
+    modeladmin.enqueue_action(
+        request,
+        moderation.purge_user_content,
+        list(queryset.values_list('author_id', flat=True).distinct())
+    )
+
+
+@admin.action(description='Удалить выбранные комментарии в фоне')
+def delete_comments(modeladmin, request, queryset) -> None:
+    modeladmin.enqueue_action(
+        request,
+        moderation.delete_comments,
+        list(queryset.values_list('pk', flat=True))
+    )
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('text', 'pub_date', 'author', 'image')
+class PostAdmin(BackgroundActionsAdmin, LargeTableAdmin):
+    list_display = (
+        'text', 'pub_date', 'author', 'group', 'image', 'is_hidden'
+    )
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', )
+    autocomplete_fields = ('group', )
     search_fields = ('text', )
-    list_filter = ('pub_date', )
+    list_filter = ('pub_date', 'is_hidden')
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = (
+        delete_posts, move_posts, hide_posts, show_posts,
+        purge_authors_content
+    )
+
+    def get_queryset(self, request):
+        # Moderators see hidden posts too.
+        queryset = Post.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
 
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
-    search_fields = ('description', )
+    search_fields = ('^title', '^slug')
     empty_value_display = '-пусто-'
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(BackgroundActionsAdmin, LargeTableAdmin):
     list_display = ('post', 'author', 'text', 'created')
-    search_fields = ('author__username', )
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author')
+    search_fields = ('=author__username', )
     list_filter = ('created', )
+    date_hierarchy = 'created'
     empty_value_display = '-пусто-'
+    actions = (delete_comments, purge_authors_content)
@@ -0,0 +1,217 @@
+"""
+Renderer of post cards for feeds.
+
+Produces the same markup as post_item.html for a whole page of posts at
+once: URLs are reversed once per process and filled in per card, amounts
+of comments are fetched with one query and thumbnails with one lookup.
+"""
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from django.db.models import Count
+from django.template.base import render_value_in_context
+from django.template.context import Context
+from django.template.defaultfilters import linebreaksbr
+from django.urls import get_script_prefix, reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import SafeString, mark_safe
+from sorl.thumbnail import default, get_thumbnail
+
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+# Values, that pass URL converters and are replaced in reversed URLs.
+USERNAME_PLACEHOLDER = 'username-placeholder'
+SLUG_PLACEHOLDER = 'slug-placeholder'
+POST_ID_PLACEHOLDER = 987654321
+
+CARD = '''<div class="card mb-3 mt-1 shadow-sm">
+    {image}
+    <div class="card-body">
+        <p class="card-text">
+            <a href="{profile_url}">
+                <strong class="d-block text-gray-dark">@{author}</strong>
+            </a>
+            {text}
+        </p>
+        {group}
+        <div class="d-flex justify-content-between align-items-center">
+            <div class="btn-group ">
+                {comments}
+                {author_buttons}
+            </div>
+            <small class="text-muted">{pub_date}</small>
+        </div>
+    </div>
+</div>
+'''
+IMAGE = '<img class="card-img" src="{}">'
+GROUP = '''<a href="{}" role="button">
+            <strong class="d-block text-gray-dark">#{}</strong>
+        </a>'''
+COMMENTS = '''<a class="btn btn-sm text-muted" href="{}" role="button">
+                    {}
+                </a>'''
+AUTHOR_BUTTONS = '''<a class="btn btn-sm text-muted" href="{}" role="button">
+                    Редактировать
+                </a>
+                <a class="btn btn-sm text-muted" href="{}" role="button">
+                    Удалить
+                </a>'''
+SEPARATOR = '<hr>\n'
+
+
+@lru_cache(maxsize=None)
+def _url_templates(script_prefix: str) -> Dict[str, str]:
+    """Return URLs of card links with {username}, {post_id}, {slug}."""
+    post_kwargs = {
+        'username': USERNAME_PLACEHOLDER,
+        'post_id': POST_ID_PLACEHOLDER,
+    }
+    urls = {
+        'profile': reverse(
+            'profile', kwargs={'username': USERNAME_PLACEHOLDER}
+        ),
+        'group': reverse('group', kwargs={'slug': SLUG_PLACEHOLDER}),
+    }
+    for name in ('post', 'post_edit', 'post_delete_confirm'):
+        urls[name] = reverse(name, kwargs=post_kwargs)
+    return {
+        name: url.replace(USERNAME_PLACEHOLDER, '{username}')
+        .replace(str(POST_ID_PLACEHOLDER), '{post_id}')
+        .replace(SLUG_PLACEHOLDER, '{slug}')
+        for name, url in urls.items()
+    }
+
+
+def _quote(value) -> str:
+    # Same quoting as reverse() applies to arguments.
+    return quote(str(value), safe=RFC3986_SUBDELIMS + '/~:@')
+
+
+def card_thumbnail(image):
+    """Return thumbnail of post image or None, like thumbnail tag does."""
+    if not image:
+        return None
+    try:
+        return get_thumbnail(image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+    except Exception:
+        logger.exception('Thumbnail of %s failed', image)
+        return None
+
+
+def card_thumbnails(images: List) -> List:
+    """Return thumbnails of post images resolved at once if possible."""
+    if not hasattr(default.backend, 'get_thumbnails'):
+        return [card_thumbnail(image) for image in images]
+    try:
+        return default.backend.get_thumbnails(
+            images, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS
+        )
+    except Exception:
+        logger.exception('Thumbnails of a page failed')
+        return [card_thumbnail(image) for image in images]
+
+
+def comments_counts(posts: Iterable[Post]) -> Dict[int, int]:
+    """Return mapping of post id to amount of its comments."""
+    return dict(
+        Comment.objects.filter(post_id__in=[post.pk for post in posts])
+        .order_by()
+        .values_list('post')
+        .annotate(Count('pk'))
+    )
+
+
+def render_post_card(
+    post: Post,
+    context: Context,
+    urls: Dict[str, str],
+    comments_count: Optional[int] = None,
+    thumbnail=None
+) -> str:
+    """Return markup of post_item.html for post.
+
+    Comment link is rendered only if comments_count is not None.
+    """
+    user = context.get('user')
+    username = _quote(post.author)
+    post_id = post.pk
+
+    image = ''
+    if thumbnail is not None:
+        image = format_html(IMAGE, thumbnail.url)
+
+    group = ''
+    if post.group_id is not None and post.group is not None:
+        group = format_html(
+            GROUP,
+            urls['group'].format(slug=_quote(post.group.slug)),
+            post.group.title
+        )
+
+    comments = ''
+    if comments_count is not None:
+        comments = format_html(
+            COMMENTS,
+            urls['post'].format(username=username, post_id=post_id),
+            f'Комментариев: {comments_count}' if comments_count
+            else 'Добавить комментарий'
+        )
+
+    author_buttons = ''
+    if getattr(user, 'pk', None) == post.author_id:
+        author_buttons = format_html(
+            AUTHOR_BUTTONS,
+            urls['post_edit'].format(username=username, post_id=post_id),
+            urls['post_delete_confirm'].format(
+                username=username, post_id=post_id
+            )
+        )
+
+    return CARD.format(
+        image=image,
+        profile_url=conditional_escape(
+            urls['profile'].format(username=username)
+        ),
+        author=render_value_in_context(post.author, context),
+        text=linebreaksbr(post.text),
+        group=group,
+        comments=comments,
+        author_buttons=author_buttons,
+        pub_date=render_value_in_context(post.pub_date, context),
+    )
+
+
+def render_post_cards(
+    posts: Iterable[Post],
+    context: Context,
+    add_comment: bool = False,
+    separator: bool = False
+) -> SafeString:
+    """Return markup of cards for a page of posts.
+
+    Cards are separated with <hr> if separator is True.
+    """
+    posts: List[Post] = list(posts)
+    urls = _url_templates(get_script_prefix())
+    counts = comments_counts(posts) if add_comment else {}
+    thumbnails = card_thumbnails([post.image for post in posts])
+    cards = [
+        render_post_card(
+            post,
+            context,
+            urls,
+            counts.get(post.pk, 0) if add_comment else None,
+            thumbnail
+        )
+        for post, thumbnail in zip(posts, thumbnails)
+    ]
+    return mark_safe((SEPARATOR if separator else '').join(cards))
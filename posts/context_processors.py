@@ -1,9 +1,15 @@
-from datetime import date
 from typing import Dict
 
 from django.http.request import HttpRequest
 
+from .viewer import Viewer, get_viewer
+
 
 def year(request: HttpRequest) -> Dict[str, int]:
     """Add current year in template."""
-    return {'year': date.today().year}
+    return {'year': get_viewer(request).year}
+
+
+def viewer(request: HttpRequest) -> Dict[str, Viewer]:
+    """Add viewer of request in template."""
+    return {'viewer': get_viewer(request)}
@@ -1,6 +1,45 @@
 from django import forms
+from django.forms.models import ModelChoiceIterator
 
+from posts.groups import all_groups, get_group_by_id
 from posts.models import Comment, Post, Group
+from posts.widgets import GroupAutocompleteWidget
+
+
+class GroupChoiceIterator(ModelChoiceIterator):
+    """Iterate group choices from the cached group registry."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in all_groups():
+            yield self.choice(group)
+
+    def __len__(self) -> int:
+        return len(all_groups()) + (self.field.empty_label is not None)
+
+    def __bool__(self) -> bool:
+        return self.field.empty_label is not None or bool(all_groups())
+
+
+class GroupChoiceField(forms.ModelChoiceField):
+    """Group choice field backed by the cached group registry."""
+    iterator = GroupChoiceIterator
+    widget = GroupAutocompleteWidget
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, Group):
+            value = value.pk
+        group = get_group_by_id(value)
+        if group is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return group
 
 
 class CommentForm(forms.ModelForm):
@@ -22,6 +61,7 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'group': GroupChoiceField}
         labels = {
             'text': 'Напишите текст поста:',
             'group': 'Выберите к какой группе относится пост:',
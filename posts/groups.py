@@ -0,0 +1,100 @@
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Group, Post
+
+GROUPS_CACHE_TIMEOUT = 60 * 60
+ALL_GROUPS_KEY = 'groups:all'
+POST_COUNTS_KEY = 'groups:post_counts'
+
+
+def _slug_key(slug: str) -> str:
+    return f'groups:slug:{slug}'
+
+
+def _id_key(group_id: int) -> str:
+    return f'groups:id:{group_id}'
+
+
+def _remember(group: Group) -> Group:
+    """Put group into cache under both of its keys."""
+    cache.set_many(
+        {_slug_key(group.slug): group, _id_key(group.pk): group},
+        GROUPS_CACHE_TIMEOUT
+    )
+    return group
+
+
+def get_group_by_slug(slug: str) -> Optional[Group]:
+    """Return group with slug or None."""
+    group: Optional[Group] = cache.get(_slug_key(slug))
+    if group is None:
+        group = Group.objects.filter(slug=slug).first()
+        if group is not None:
+            _remember(group)
+    return group
+
+
+def get_group_by_id(group_id) -> Optional[Group]:
+    """Return group with id or None."""
+    try:
+        group_id = int(group_id)
+    except (TypeError, ValueError):
+        return None
+    group: Optional[Group] = cache.get(_id_key(group_id))
+    if group is None:
+        group = Group.objects.filter(pk=group_id).first()
+        if group is not None:
+            _remember(group)
+    return group
+
+
+def all_groups() -> List[Group]:
+    """Return all groups ordered by title."""
+    groups: Optional[List[Group]] = cache.get(ALL_GROUPS_KEY)
+    if groups is None:
+        groups = list(Group.objects.order_by('title', 'pk'))
+        cache.set(ALL_GROUPS_KEY, groups, GROUPS_CACHE_TIMEOUT)
+    return groups
+
+
+def search_groups(query: str, limit: int = 10) -> List[Group]:
+    """Return first groups which title or slug starts with query."""
+    query = query.strip()
+    if not query:
+        return []
+    return list(
+        Group.objects.filter(
+            Q(title__istartswith=query) | Q(slug__istartswith=query)
+        ).order_by('title', 'pk')[:limit]
+    )
+
+
+def group_post_counts() -> Dict[int, int]:
+    """Return mapping of group id to amount of its posts."""
+    counts: Optional[Dict[int, int]] = cache.get(POST_COUNTS_KEY)
+    if counts is None:
+        counts = dict(
+            Post.objects.filter(group__isnull=False)
+            .order_by()
+            .values_list('group')
+            .annotate(Count('pk'))
+        )
+        cache.set(POST_COUNTS_KEY, counts, GROUPS_CACHE_TIMEOUT)
+    return counts
+
+
+def invalidate_group(group: Group) -> None:
+    """Drop cached entries of group, including its previous slug."""
+    keys = [ALL_GROUPS_KEY, _id_key(group.pk), _slug_key(group.slug)]
+    cached: Optional[Group] = cache.get(_id_key(group.pk))
+    if cached is not None:
+        keys.append(_slug_key(cached.slug))
+    cache.delete_many(keys)
+
+
+def invalidate_group_post_counts() -> None:
+    """Drop cached amounts of group posts."""
+    cache.delete(POST_COUNTS_KEY)
@@ -0,0 +1,270 @@
+"""
+Queue of background jobs in the database.
+
+With BACKGROUND_TASKS_BACKEND = 'database' enqueue() saves a Job in the
+current transaction and runworker runs it. Workers claim due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED and lease them for JOB_LEASE seconds;
+jobs of a worker, which died, are claimed again when their lease is
+over. Failed jobs are retried with doubling delays until max_attempts
+runs failed, so jobs should tolerate being run again.
+"""
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Avg, Count, DurationField, F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+from .tasks import get_progress, report_progress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE = 60 * 60
+# Seconds before the first retry, doubled by every next one.
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 60 * 60
+STATS_PERIOD = datetime.timedelta(hours=1)
+
+
+def func_path(func: Callable) -> str:
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def create_job(
+    job_id: str,
+    func: Callable,
+    args: Sequence[Any],
+    run_at: Optional[datetime.datetime] = None,
+    max_attempts: Optional[int] = None
+) -> Job:
+    """Save job to run func(job_id, *args) at run_at or right away.
+
+    Arguments must be serializable to JSON.
+    """
+    return Job.objects.create(
+        id=job_id,
+        func=func_path(func),
+        args=list(args),
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or getattr(
+            settings, 'JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS
+        )
+    )
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    return datetime.timedelta(
+        seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    )
+
+
+def claim(limit: int = 1) -> List[Job]:
+    """Lease due jobs to the caller and return them."""
+    now = timezone.now()
+    lease = datetime.timedelta(
+        seconds=getattr(settings, 'JOB_LEASE', DEFAULT_LEASE)
+    )
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Job.QUEUED, run_at__lte=now)
+                | Q(status=Job.RUNNING, locked_until__lt=now)
+            )
+            .order_by('run_at')[:limit]
+        )
+        claimed, abandoned = [], []
+        for job in jobs:
+            if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.finished_at = now
+                job.last_error = 'Worker did not finish the job in time.'
+                abandoned.append(job)
+                continue
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.started_at = now
+            job.locked_until = now + lease
+            claimed.append(job)
+        Job.objects.bulk_update(
+            jobs,
+            [
+                'status', 'attempts', 'started_at', 'locked_until',
+                'finished_at', 'last_error'
+            ]
+        )
+    for job in abandoned:
+        logger.error('Job %s was abandoned by its worker', job)
+        report_progress(job.id, 'failed')
+    return claimed
+
+
+def run_job(job: Job) -> bool:
+    """Run claimed job, schedule a retry if it fails.
+
+    Return True if it succeeded.
+    """
+    try:
+        import_string(job.func)(job.id, *job.args)
+    except Exception as error:
+        retry = job.attempts < job.max_attempts
+        now = timezone.now()
+        logger.exception(
+            'Job %s failed, attempt %s of %s',
+            job, job.attempts, job.max_attempts
+        )
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.QUEUED if retry else Job.FAILED,
+            run_at=now + retry_delay(job.attempts) if retry else job.run_at,
+            finished_at=None if retry else now,
+            locked_until=None,
+            last_error=repr(error)
+        )
+        progress = get_progress(job.id) or {}
+        report_progress(
+            job.id,
+            'queued' if retry else 'failed',
+            progress.get('done', 0),
+            progress.get('total')
+        )
+        return False
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.DONE, finished_at=timezone.now(), locked_until=None
+        )
+        return True
+
+
+def job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return status of saved job with its progress or None.
+
+    Status comes from the job row, progress from the cache, which only
+    has it if the worker shares the cache.
+    """
+    job = Job.objects.filter(pk=job_id).values(
+        'status', 'attempts', 'max_attempts', 'last_error'
+    ).first()
+    if job is None:
+        return None
+    progress = get_progress(job_id) or {}
+    return {
+        'done': progress.get('done', 0),
+        'total': progress.get('total'),
+        **job,
+    }
+
+
+class WorkerStats:
+    """Throughput and latency of jobs run by a worker process."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.done = 0
+        self.failed = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, job: Job, succeeded: bool, run_seconds: float) -> None:
+        with self.lock:
+            if succeeded:
+                self.done += 1
+            else:
+                self.failed += 1
+            self.wait_seconds += max(
+                (job.started_at - job.run_at).total_seconds(), 0
+            )
+            self.run_seconds += run_seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            runs = self.done + self.failed
+            elapsed = time.monotonic() - self.started
+            return {
+                'done': self.done,
+                'failed': self.failed,
+                'jobs_per_second': runs / elapsed if elapsed else 0.0,
+                'average_wait_seconds':
+                    self.wait_seconds / runs if runs else 0.0,
+                'average_run_seconds':
+                    self.run_seconds / runs if runs else 0.0,
+            }
+
+
+def work(
+    stats: WorkerStats,
+    stop: threading.Event,
+    burst: bool = False,
+    interval: float = 1
+) -> None:
+    """Run due jobs until stop is set or, in burst mode, none are due."""
+    try:
+        while not stop.is_set():
+            jobs = claim()
+            if not jobs:
+                if burst:
+                    break
+                close_old_connections()
+                stop.wait(interval)
+                continue
+            for job in jobs:
+                started = time.monotonic()
+                close_old_connections()
+                try:
+                    succeeded = run_job(job)
+                finally:
+                    close_old_connections()
+                stats.add(job, succeeded, time.monotonic() - started)
+    finally:
+        # Connection of the worker thread is not closed by anyone else.
+        connection.close()
+
+
+def _seconds(duration: Optional[datetime.timedelta]) -> Optional[float]:
+    return duration.total_seconds() if duration is not None else None
+
+
+def queue_stats() -> Dict[str, Any]:
+    """Return amounts of jobs by status with latency of the last hour."""
+    now = timezone.now()
+    counts = dict(
+        Job.objects.order_by().values_list('status')
+        .annotate(Count('pk'))
+    )
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+    oldest = due.order_by('run_at').values_list('run_at', flat=True).first()
+    recent = Job.objects.filter(
+        status=Job.DONE, finished_at__gte=now - STATS_PERIOD
+    ).aggregate(
+        done=Count('pk'),
+        wait=Avg(
+            F('started_at') - F('run_at'), output_field=DurationField()
+        ),
+        run=Avg(
+            F('finished_at') - F('started_at'), output_field=DurationField()
+        ),
+    )
+    return {
+        **{status: counts.get(status, 0) for status, _ in Job.STATUSES},
+        'due': due.count(),
+        'oldest_due_seconds':
+            (now - oldest).total_seconds() if oldest is not None else None,
+        'done_last_hour': recent['done'],
+        'average_wait_seconds': _seconds(recent['wait']),
+        'average_run_seconds': _seconds(recent['run']),
+    }
+
+
+def purge_finished(before: datetime.datetime) -> int:
+    """Delete jobs finished before before, return their amount."""
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED), finished_at__lt=before
+    ).delete()
+    return deleted
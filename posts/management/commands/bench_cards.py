@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Template
+
+from posts.models import Post
+
+INCLUDES = (
+    '{% for post in posts %}'
+    '{% include "post_item.html" with post=post add_comment=True %}'
+    '{% if not forloop.last %}<hr>{% endif %}'
+    '{% endfor %}'
+)
+CARDS = (
+    '{% load post_cards %}'
+    '{% post_cards posts add_comment=True separator=True %}'
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare per card render time of includes and cards renderer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=10)
+
+    def measure(self, template: Template, context: Context,
+                iterations: int) -> float:
+        """Return mean milliseconds to render template."""
+        started = time.perf_counter()
+        for _ in range(iterations):
+            template.render(context)
+        return (time.perf_counter() - started) * 1000 / iterations
+
+    def handle(self, *args, **options):
+        posts = list(
+            Post.objects.select_related('author', 'group')[:options['posts']]
+        )
+        if not posts:
+            raise CommandError('Create at least one post.')
+        context = Context({'posts': posts, 'user': posts[0].author})
+
+        iterations = options['iterations']
+        includes = self.measure(Template(INCLUDES), context, iterations)
+        cards = self.measure(Template(CARDS), context, iterations)
+        self.stdout.write(
+            f'{len(posts)} cards, ms per page: includes {includes:.3f}, '
+            f'renderer {cards:.3f}'
+        )
+        self.stdout.write(
+            f'ms per card: includes {includes / len(posts):.3f}, '
+            f'renderer {cards / len(posts):.3f}, '
+            f'speedup {includes / cards:.1f}x'
+        )
@@ -0,0 +1,112 @@
+import time
+from typing import List, Tuple
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from posts.models import Post
+from posts.warmup import hot_paths
+from social_network.compression import (
+    FASTEST_LEVELS, LEVELS, CompressionMiddleware, compress,
+    compression_stats, encodings
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure bytes saved and CPU cost of compressing main pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--posts', type=int, default=3,
+            help='Pages of posts with most comments to measure.'
+        )
+
+    def render(self, path: str) -> bytes:
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        match = resolve(request.path_info)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def get_bodies(self, posts: int) -> List[Tuple[str, bytes]]:
+        paths = list(hot_paths(1, 3, 3))
+        paths += [
+            reverse('post', kwargs={
+                'username': post.author.username, 'post_id': post.pk
+            })
+            for post in Post.objects.select_related('author')
+            .annotate(comments_count=Count('comments'))
+            .order_by('-comments_count')[:posts]
+        ]
+        return [(path, self.render(path)) for path in paths]
+
+    def serve(self, bodies: List[Tuple[str, bytes]]) -> None:
+        """Pass pages through the middleware, print what it recorded."""
+        pending = iter(bodies)
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(next(pending)[1])
+        )
+        before = compression_stats()
+        for _ in bodies:
+            middleware(RequestFactory().get(
+                '/', HTTP_ACCEPT_ENCODING=', '.join(encodings())
+            ))
+        stats = {
+            key: value - before[key]
+            for key, value in compression_stats().items()
+        }
+        if not stats['responses']:
+            return
+        self.stdout.write(
+            f'served: {stats["responses"]} responses, saved '
+            f'{(1 - stats["bytes_out"] / stats["bytes_in"]) * 100:.1f} %, '
+            f'{stats["cpu_seconds"] * 1000 / stats["responses"]:.3f} '
+            'cpu ms per response'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        bodies = self.get_bodies(options['posts'])
+        if not bodies:
+            raise CommandError('Nothing to measure.')
+        total = sum(len(body) for _, body in bodies)
+        self.stdout.write(
+            f'{len(bodies)} pages, {total / len(bodies):.0f} bytes '
+            f'per page on average'
+        )
+        self.stdout.write(
+            f'{"encoding":<10}{"level":>6}{"bytes":>10}{"saved %":>10}'
+            f'{"cpu ms":>10}'
+        )
+        for encoding in encodings():
+            levels = sorted({FASTEST_LEVELS[encoding]} | {
+                level for _, level in LEVELS[encoding]
+            })
+            for level in levels:
+                compressed = 0
+                started = time.thread_time()
+                for _ in range(iterations):
+                    compressed = sum(
+                        len(compress(body, encoding, level))
+                        for _, body in bodies
+                    )
+                cpu = (
+                    (time.thread_time() - started) * 1000
+                    / iterations / len(bodies)
+                )
+                self.stdout.write(
+                    f'{encoding:<10}{level:>6}'
+                    f'{compressed / len(bodies):>10.0f}'
+                    f'{(1 - compressed / total) * 100:>10.1f}'
+                    f'{cpu:>10.3f}'
+                )
+        self.serve(bodies)
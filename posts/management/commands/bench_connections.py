@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Measure overhead of opening database connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=200)
+
+    def _measure(self, count: int, connect, close) -> float:
+        """Return average milliseconds of connect, query and close."""
+        started = time.perf_counter()
+        for _ in range(count):
+            raw = connect()
+            with raw.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            close(raw)
+        return (time.perf_counter() - started) * 1000 / count
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Connections are pooled on PostgreSQL only.')
+        from social_network.db_pool.base import get_pool, pool_stats
+
+        count = options['connections']
+        params = connection.get_connection_params()
+        direct = self._measure(
+            count,
+            lambda: connection.Database.connect(**params),
+            lambda raw: raw.close()
+        )
+        pool = get_pool(connection.alias, connection.settings_dict, params)
+        pooled = self._measure(count, pool.acquire, pool.release)
+        stats = pool.stats()
+
+        self.stdout.write(
+            f'direct: {direct:.2f} ms, pooled: {pooled:.2f} ms per request, '
+            f'checkouts: {stats["checkouts"]}, '
+            f'connects: {stats["connects"]}, '
+            f'wait: {stats["wait_seconds"] * 1000:.1f} ms'
+        )
+        for name, stats in pool_stats().items():
+            self.stdout.write(f'{name}: ' + ', '.join(
+                f'{key}: {value:.3f}' if isinstance(value, float)
+                else f'{key}: {value}'
+                for key, value in stats.items()
+            ))
@@ -0,0 +1,99 @@
+import time
+from typing import Dict, List, Tuple
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, RequestContext, engines
+from django.test import RequestFactory
+
+from posts.forms import CommentForm
+from posts.models import Post
+from posts.summaries import get_profile_summary
+from posts.views import get_paginator
+from social_network.preload import preload_templates
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure render time of main pages with and without preloading.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+
+    def get_pages(self) -> List[Tuple[str, Dict]]:
+        """Return templates of main pages with their contexts."""
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False
+        ).first()
+        if post is None:
+            raise CommandError('Create at least one post in a group.')
+        author = post.author
+
+        pages = []
+        for template_name, posts in (
+            ('index.html', Post.objects.select_related('author', 'group')),
+            ('group.html', post.group.posts.select_related('author')),
+            ('profile.html', author.posts.select_related('group')),
+        ):
+            paginator, page = get_paginator(posts, 1)
+            page.object_list = list(page.object_list)
+            pages.append((template_name, {
+                'page': page,
+                'paginator': paginator,
+                'group': post.group,
+                'author': author,
+                'summary': get_profile_summary(author),
+                'following': False,
+            }))
+        pages.append(('post.html', {
+            'post': post,
+            'author': author,
+            'comments': list(post.comments.select_related('author')),
+            'form': CommentForm(),
+            'summary': get_profile_summary(author),
+            'following': False,
+        }))
+        return pages
+
+    def measure(self, engine: Engine, template_name, context, request,
+                iterations: int) -> float:
+        """Return mean milliseconds to load and render template."""
+        started = time.perf_counter()
+        for _ in range(iterations):
+            cache.clear()
+            template = engine.get_template(template_name)
+            template.render(RequestContext(request, context))
+        return (time.perf_counter() - started) * 1000 / iterations
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        cached = engines['django'].engine
+        uncached = Engine(
+            dirs=cached.dirs,
+            loaders=UNCACHED_LOADERS,
+            context_processors=cached.context_processors,
+            libraries=cached.libraries,
+            builtins=cached.builtins,
+            debug=cached.debug,
+        )
+        preload_templates()
+
+        self.stdout.write(
+            f'{"page":<14}{"uncached ms":>14}{"preloaded ms":>14}'
+        )
+        for template_name, context in self.get_pages():
+            cold = self.measure(
+                uncached, template_name, context, request, iterations
+            )
+            warm = self.measure(
+                cached, template_name, context, request, iterations
+            )
+            self.stdout.write(f'{template_name:<14}{cold:>14.3f}{warm:>14.3f}')
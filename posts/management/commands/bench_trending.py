@@ -0,0 +1,47 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Measure ingest throughput of trending scores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000)
+        parser.add_argument('--posts', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        events = options['events']
+        posts = options['posts']
+        buffer = trending.TrendingBuffer()
+        now = time.time()
+        # Most events hit a few popular posts.
+        stream = [
+            (int(random.paretovariate(1.2)) % posts + 1,
+             random.choice((trending.POST_WEIGHT, trending.COMMENT_WEIGHT)),
+             now + i * 0.01)
+            for i in range(events)
+        ]
+
+        started = time.perf_counter()
+        for post_id, weight, timestamp in stream:
+            buffer.add(post_id, weight, timestamp)
+        ingest = time.perf_counter() - started
+
+        started = time.perf_counter()
+        trending.merge(trending.POSTS, buffer.take())
+        merge = time.perf_counter() - started
+
+        started = time.perf_counter()
+        trending.trending_ids(trending.POSTS, 20)
+        read = time.perf_counter() - started
+        trending.clear(trending.POSTS)
+
+        self.stdout.write(
+            f'ingest: {events / ingest:,.0f} events/s, '
+            f'flush: {merge * 1000:.1f} ms, '
+            f'top 20: {read * 1000:.3f} ms'
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver outbox events to their handlers. Several drainers may '
+        'run at once on PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=0,
+            help='Events delivered in one transaction, OUTBOX_BATCH_SIZE '
+                 'by default.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when no events are due instead of waiting.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Seconds to wait for new events when none are due.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                delivered = outbox.drain(options['batch_size'])
+                total += delivered
+                if delivered:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Delivered {total} events.')
@@ -0,0 +1,59 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Partition posts and comments by month on PostgreSQL, create '
+        'partitions of next months and detach old ones. Run it daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='Move rows of unpartitioned tables into partitioned ones. '
+                 'Tables are locked until it is done.'
+        )
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Create partitions up to this many months from now.'
+        )
+        parser.add_argument(
+            '--detach-before', metavar='YYYY-MM',
+            help='Detach partitions of months before this one.'
+        )
+        parser.add_argument(
+            '--tablespace',
+            help='Move detached partitions to this tablespace.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL.')
+        before = None
+        if options['detach_before']:
+            try:
+                before = datetime.datetime.strptime(
+                    options['detach_before'], '%Y-%m'
+                ).date()
+            except ValueError:
+                raise CommandError('--detach-before must look like 2024-01.')
+
+        months_ahead = options['months_ahead']
+        if options['convert']:
+            for table, created in partitions.convert(months_ahead).items():
+                self.stdout.write(
+                    f'{table}: partitioned, {created} partitions'
+                )
+        created = partitions.create_future_partitions(months_ahead)
+        for table, count in created.items():
+            self.stdout.write(f'{table}: {count} new partitions')
+        if before is not None:
+            for name in partitions.detach_partitions(
+                before, options['tablespace']
+            ):
+                self.stdout.write(f'{name}: detached')
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import Post
+from posts.moderation import purge_posts
+
+
+class Command(BaseCommand):
+    help = 'Purge soft deleted posts, which background jobs left behind.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=60,
+            help='Purge posts deleted at least this many minutes ago.'
+        )
+
+    def handle(self, *args, **options):
+        deleted_before = timezone.now() - timedelta(
+            minutes=options['older_than']
+        )
+        post_ids = list(
+            Post.all_objects.filter(
+                deleted_at__lte=deleted_before
+            ).values_list('pk', flat=True)
+        )
+        purge_posts('purge_deleted_posts', post_ids)
+        self.stdout.write(f'Purged {len(post_ids)} posts.')
@@ -0,0 +1,97 @@
+import datetime
+import json
+import multiprocessing
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from posts import jobs
+
+
+def _work_in_process(stop, burst: bool, interval: float) -> None:
+    stats = jobs.WorkerStats()
+    jobs.work(stats, stop, burst, interval)
+    jobs.logger.info('Worker finished: %s', stats.snapshot())
+
+
+class Command(BaseCommand):
+    help = (
+        'Run jobs of the database queue. Set BACKGROUND_TASKS_BACKEND to '
+        '"database" to queue jobs there.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help='Jobs run at once.'
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Run jobs in processes instead of threads.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit when no jobs are due instead of waiting.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Seconds to wait for new jobs when none are due.'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Print queue metrics as JSON and exit.'
+        )
+        parser.add_argument(
+            '--purge-days', type=int,
+            help='Delete jobs finished this many days ago and exit.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(jobs.queue_stats(), indent=2))
+            return
+        if options['purge_days'] is not None:
+            deleted = jobs.purge_finished(
+                timezone.now()
+                - datetime.timedelta(days=options['purge_days'])
+            )
+            self.stdout.write(f'Deleted {deleted} jobs.')
+            return
+
+        concurrency = max(options['concurrency'], 1)
+        burst = options['burst']
+        interval = options['interval']
+        if options['processes']:
+            # Children must open their own connections.
+            connections.close_all()
+            stop = multiprocessing.Event()
+            workers = [
+                multiprocessing.Process(
+                    target=_work_in_process, args=(stop, burst, interval)
+                )
+                for _ in range(concurrency)
+            ]
+        else:
+            stop = threading.Event()
+            stats = jobs.WorkerStats()
+            workers = [
+                threading.Thread(
+                    target=jobs.work, args=(stats, stop, burst, interval)
+                )
+                for _ in range(concurrency)
+            ]
+
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            # Jobs being run are finished first.
+            stop.set()
+            for worker in workers:
+                worker.join()
+        if not options['processes']:
+            self.stdout.write(json.dumps(stats.snapshot()))
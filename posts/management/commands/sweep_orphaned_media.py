@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models.fields.files import ImageFieldFile
+from sorl.thumbnail import delete as delete_image
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Delete post images, which no post refers to, and thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60 * 60,
+            help='Skip files modified less than this many seconds ago.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list orphaned files.'
+        )
+
+    def walk(self, storage, directory):
+        """Yield names of all files in storage directory."""
+        try:
+            directories, files = storage.listdir(directory)
+        except FileNotFoundError:
+            return
+        for name in files:
+            yield os.path.join(directory, name)
+        for name in directories:
+            yield from self.walk(storage, os.path.join(directory, name))
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        referenced = set(
+            Post.all_objects.exclude(image='')
+            .exclude(image__isnull=True)
+            .values_list('image', flat=True)
+        )
+        modified_before = time.time() - options['min_age']
+        orphans = [
+            name for name in self.walk(storage, field.upload_to.rstrip('/'))
+            if name not in referenced
+            and storage.get_modified_time(name).timestamp()
+            < modified_before
+        ]
+
+        reclaimed = 0
+        for name in orphans:
+            self.stdout.write(name)
+            if not options['dry_run']:
+                reclaimed += storage.size(name)
+                delete_image(ImageFieldFile(None, field, name))
+        self.stdout.write(
+            f'Orphaned files: {len(orphans)}, reclaimed bytes: {reclaimed}.'
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Render first pages of the hottest feeds to fill caches. Useful '
+        'with a cache shared by processes, after a deploy or a flush.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=warmup.DEFAULT_PAGES,
+            help='Pages of every feed.'
+        )
+        parser.add_argument(
+            '--groups', type=int, default=warmup.DEFAULT_GROUPS,
+            help='Amount of hottest groups.'
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=warmup.DEFAULT_PROFILES,
+            help='Amount of most followed profiles.'
+        )
+        parser.add_argument(
+            '--rate', type=float, default=warmup.DEFAULT_RATE,
+            help='Pages rendered per second at most, 0 for no limit.'
+        )
+
+    def handle(self, *args, **options):
+        result = warmup.warm(
+            options['pages'],
+            options['groups'],
+            options['profiles'],
+            options['rate']
+        )
+        self.stdout.write(
+            f'Rendered {result["rendered"]} pages in '
+            f'{result["seconds"]:.1f} s, {result["failed"]} failed.'
+        )
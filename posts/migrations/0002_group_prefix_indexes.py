@@ -0,0 +1,36 @@
+from django.db import migrations
+
+INDEXES = (
+    ('posts_group_title_prefix_idx', 'title'),
+    ('posts_group_slug_prefix_idx', 'slug'),
+)
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # Case-insensitive prefix search compares UPPER(column) with LIKE,
+    # PostgreSQL needs pattern ops for such index to be usable.
+    opclass = (
+        ' text_pattern_ops'
+        if schema_editor.connection.vendor == 'postgresql' else ''
+    )
+    for name, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {name} ON posts_group '
+            f'(UPPER({column}){opclass})'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.1 on 2026-10-19 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_summaries(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    ProfileSummary = apps.get_model('posts', 'ProfileSummary')
+
+    posts = {
+        row['author']: row for row in
+        Post.objects.filter(is_hidden=False, deleted_at__isnull=True)
+        .order_by()
+        .values('author')
+        .annotate(count=models.Count('pk'), last=models.Max('pub_date'))
+    }
+    followers = dict(
+        Follow.objects.order_by().values_list('author')
+        .annotate(models.Count('pk'))
+    )
+    follows = dict(
+        Follow.objects.order_by().values_list('user')
+        .annotate(models.Count('pk'))
+    )
+    ProfileSummary.objects.bulk_create(
+        (
+            ProfileSummary(
+                user_id=user.pk,
+                username=user.username,
+                display_name=f'{user.first_name} {user.last_name}'.strip(),
+                posts_count=posts.get(user.pk, {}).get('count', 0),
+                followers_count=followers.get(user.pk, 0),
+                follows_count=follows.get(user.pk, 0),
+                last_post_at=posts.get(user.pk, {}).get('last'),
+            )
+            for user in User.objects.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0005_post_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('username', models.CharField(max_length=150, unique=True)),
+                ('display_name', models.CharField(blank=True, max_length=301)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('followers_count', models.PositiveIntegerField(default=0)),
+                ('follows_count', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='date of last post')),
+            ],
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1 on 2026-10-19 10:50
+
+from django.db import migrations, models
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=posts.storage.get_image_storage, upload_to='posts/'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.db.models.fields.related import ForeignKey
 
+from .storage import get_image_storage
+
 User = get_user_model()
 
 
@@ -14,9 +17,23 @@ class Group(models.Model):
         return self.title
 
 
+VISIBLE_POSTS = models.Q(is_hidden=False, deleted_at__isnull=True)
+
+
+class VisiblePostManager(models.Manager):
+    """Manager of posts, which are neither hidden nor deleted."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(VISIBLE_POSTS)
+
+
 class Post(models.Model):
     text = models.TextField()
-    pub_date = models.DateTimeField('date published', auto_now_add=True)
+    pub_date = models.DateTimeField(
+        'date published',
+        auto_now_add=True,
+        db_index=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -31,22 +48,50 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=get_image_storage,
         blank=True,
         null=True
     )
+    is_hidden = models.BooleanField('hidden', default=False)
+    deleted_at = models.DateTimeField(
+        'date deleted',
+        blank=True,
+        null=True,
+        db_index=True
+    )
+
+    objects = VisiblePostManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date'],
+                condition=VISIBLE_POSTS,
+                name='posts_post_visible_idx'
+            )
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Signals compare them to tell, which fields a save changed.
+        post._loaded_values = dict(zip(field_names, values))
+        return post
+
 
 class Comment(models.Model):
+    # Partitioned posts table has no unique key on id alone to reference,
+    # see posts.partitions.
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_constraint=False
     )
     author = models.ForeignKey(
         User,
@@ -56,7 +101,8 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(
         'date_published',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
 
     class Meta:
@@ -85,3 +131,89 @@ class Follow(models.Model):
                 name='unique_user_author'
             )
         ]
+
+
+class ProfileSummary(models.Model):
+    """Data of profile sidebar, kept up to date by signals."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile_summary'
+    )
+    username = models.CharField(max_length=150, unique=True)
+    display_name = models.CharField(max_length=301, blank=True)
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    follows_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(
+        'date of last post',
+        blank=True,
+        null=True
+    )
+
+    def __str__(self):
+        return self.username
+
+
+class OutboxEvent(models.Model):
+    """Change to pass to outbox handlers, saved in its transaction."""
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created = models.DateTimeField('date of event', auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                name='outbox_available_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.topic} #{self.pk}'
+
+
+class Job(models.Model):
+    """Background job of the database queue, see posts.jobs."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'queued'),
+        (RUNNING, 'running'),
+        (DONE, 'done'),
+        (FAILED, 'failed'),
+    )
+
+    id = models.CharField(max_length=32, primary_key=True)
+    func = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    created = models.DateTimeField('date of creation', auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.func} ({self.id})'
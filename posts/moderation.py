@@ -0,0 +1,164 @@
+import time
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from . import outbox, signals
+from .groups import invalidate_group_post_counts
+from .models import Comment, Post
+from .summaries import refresh_profile_summaries
+from .tasks import get_batch_size, iter_batches, run_in_batches
+from .viewer import invalidate_profiles
+
+# Seconds, during which a reused image file is not deleted.
+DEFAULT_IMAGE_REUSE_GRACE = 60
+
+
+def invalidate_post_caches(ids: Iterable[int] = ()) -> None:
+    """Drop cached data derived from posts after a batch of changes.
+
+    Bulk updates send no signals, so profiles of authors of posts with
+    ids are dropped and recounted here.
+    """
+    invalidate_group_post_counts()
+    author_ids = _author_ids(ids)
+    if author_ids:
+        invalidate_profiles(author_ids)
+        refresh_profile_summaries(author_ids)
+
+
+def _author_ids(ids: Iterable[int]) -> List[int]:
+    ids = list(ids)
+    if not ids:
+        return []
+    return list(
+        Post.all_objects.filter(pk__in=ids)
+        .values_list('author_id', flat=True)
+        .distinct()
+    )
+
+
+def soft_delete_posts(ids: List[int]) -> None:
+    """Hide posts right away, rows and media are purged later."""
+    with transaction.atomic():
+        Post.all_objects.filter(
+            pk__in=ids, deleted_at__isnull=True
+        ).update(deleted_at=timezone.now())
+        outbox.emit(outbox.POSTS_DELETED, ids=list(ids))
+    invalidate_post_caches(ids)
+
+
+def unreferenced_images(images: Iterable) -> List:
+    """Return images, which no post refers to and nobody reused lately.
+
+    Storage of images is content addressed, so posts share files.
+    """
+    images = list(images)
+    referenced = set(
+        Post.all_objects.filter(
+            image__in=[image.name for image in images]
+        ).values_list('image', flat=True)
+    )
+    grace = getattr(settings, 'IMAGE_REUSE_GRACE', DEFAULT_IMAGE_REUSE_GRACE)
+    reused_after = time.time() - grace
+    unreferenced = []
+    for image in images:
+        if image.name in referenced:
+            continue
+        try:
+            modified = image.storage.get_modified_time(image.name)
+        except FileNotFoundError:
+            continue
+        # Post of an upload, which reused the file, may be uncommitted.
+        if modified.timestamp() < reused_after:
+            unreferenced.append(image)
+    return unreferenced
+
+
+def _delete_comments(ids: List[int]) -> None:
+    Comment.objects.filter(pk__in=ids).delete()
+
+
+def _purge_posts(ids: List[int]) -> None:
+    """Delete comments, rows, images and thumbnails of posts."""
+    batch_size = get_batch_size()
+    comments = Comment.objects.filter(post_id__in=ids)
+    while True:
+        with transaction.atomic():
+            batch = list(comments.values_list('pk', flat=True)[:batch_size])
+            _delete_comments(batch)
+        if not batch:
+            break
+
+    images = [
+        post.image for post in
+        Post.all_objects.filter(pk__in=ids).exclude(image='')
+        if post.image
+    ]
+    author_ids = _author_ids(ids)
+    with signals.batch():
+        Post.all_objects.filter(pk__in=ids).delete()
+    invalidate_group_post_counts()
+    invalidate_profiles(author_ids)
+    refresh_profile_summaries(author_ids)
+    # Files go only after rows are gone, a failure here leaves orphans
+    # for sweep_orphaned_media instead of posts with missing images.
+    for image in unreferenced_images(images):
+        delete_image(image)
+
+
+def purge_posts(job_id: str, post_ids: List[int]) -> None:
+    """Purge soft deleted posts."""
+    run_in_batches(job_id, post_ids, _purge_posts, atomic=False)
+
+
+def delete_posts(job_id: str, post_ids: List[int]) -> None:
+    """Delete posts with their comments and media."""
+    for batch in iter_batches(post_ids):
+        soft_delete_posts(batch)
+    run_in_batches(job_id, post_ids, _purge_posts, atomic=False)
+
+
+def delete_comments(job_id: str, comment_ids: List[int]) -> None:
+    """Delete comments."""
+    run_in_batches(job_id, comment_ids, _delete_comments)
+
+
+def move_posts(job_id: str, post_ids: List[int], group_id) -> None:
+    """Move posts to group, or out of any group if group_id is None."""
+    def move(ids: List[int]) -> None:
+        Post.all_objects.filter(pk__in=ids).update(group_id=group_id)
+        invalidate_post_caches()
+
+    run_in_batches(job_id, post_ids, move)
+
+
+def hide_posts(job_id: str, post_ids: List[int], hidden: bool = True) -> None:
+    """Hide posts from everyone but admins or show them again."""
+    def hide(ids: List[int]) -> None:
+        Post.all_objects.filter(pk__in=ids).update(is_hidden=hidden)
+        invalidate_post_caches(ids)
+
+    run_in_batches(job_id, post_ids, hide)
+
+
+def purge_user_content(job_id: str, user_ids: List[int]) -> None:
+    """Delete all posts and comments of users."""
+    comments = Comment.objects.filter(author_id__in=user_ids)
+    posts = Post.all_objects.filter(author_id__in=user_ids)
+    post_ids = list(posts.values_list('pk', flat=True))
+    items = (
+        [('comment', pk) for pk in comments.values_list('pk', flat=True)]
+        + [('post', pk) for pk in post_ids]
+    )
+
+    def purge(batch: List[Tuple[str, int]]) -> None:
+        _delete_comments([pk for kind, pk in batch if kind == 'comment'])
+        _purge_posts([pk for kind, pk in batch if kind == 'post'])
+
+    for batch in iter_batches(post_ids):
+        soft_delete_posts(batch)
+    run_in_batches(job_id, items, purge, atomic=False)
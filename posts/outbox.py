@@ -0,0 +1,135 @@
+"""
+Transactional outbox of changes to posts, comments and follows.
+
+Signals save an OutboxEvent in the transaction of the change, so an
+event exists if and only if the change is committed. drain_outbox passes
+events to handlers registered for their topic and deletes them.
+Delivery is at least once: an event is retried with growing delays
+until all its handlers succeed, so handlers must tolerate repeats.
+Adding a handler costs writers nothing. Handlers, which gather events in
+memory, save them in a function registered with before_commit, which
+runs before delivered events are deleted.
+"""
+import datetime
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+POST_CREATED = 'post.created'
+POST_UPDATED = 'post.updated'
+POSTS_DELETED = 'posts.deleted'
+COMMENT_CREATED = 'comment.created'
+FOLLOW_CREATED = 'follow.created'
+FOLLOW_DELETED = 'follow.deleted'
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 10
+# Seconds before the first retry, doubled by every next one.
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 60 * 60
+
+Handler = Callable[[Dict[str, Any]], None]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+_before_commit: List[Callable[[], None]] = []
+
+
+def register(topic: str, handler: Handler) -> None:
+    if handler not in _handlers[topic]:
+        _handlers[topic].append(handler)
+
+
+def handler(*topics: str) -> Callable[[Handler], Handler]:
+    """Register decorated function as handler of events of topics."""
+    def decorator(func: Handler) -> Handler:
+        for topic in topics:
+            register(topic, func)
+        return func
+    return decorator
+
+
+def before_commit(func: Callable[[], None]) -> Callable[[], None]:
+    """Register func to run before a delivered batch is committed.
+
+    If it fails, the whole batch is delivered again.
+    """
+    if func not in _before_commit:
+        _before_commit.append(func)
+    return func
+
+
+def emit(topic: str, **payload) -> OutboxEvent:
+    """Save event in the current transaction."""
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    return datetime.timedelta(
+        seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    )
+
+
+def _deliver(event: OutboxEvent) -> None:
+    for func in _handlers.get(event.topic, ()):
+        func(event.payload)
+
+
+def drain(batch_size: int = 0) -> int:
+    """Deliver a batch of due events, return amount of delivered ones.
+
+    Rows of the batch stay locked until it is done, other drainers skip
+    them and take the next events.
+    """
+    batch_size = batch_size or getattr(
+        settings, 'OUTBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE
+    )
+    max_attempts = getattr(
+        settings, 'OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS
+    )
+    delivered = []
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                available_at__lte=timezone.now(),
+                attempts__lt=max_attempts
+            )
+            .order_by('available_at', 'pk')[:batch_size]
+        )
+        for event in events:
+            try:
+                # Changes of failed handlers are rolled back.
+                with transaction.atomic():
+                    _deliver(event)
+            except Exception as error:
+                event.attempts += 1
+                event.available_at = timezone.now() + retry_delay(
+                    event.attempts
+                )
+                event.last_error = repr(error)
+                event.save(
+                    update_fields=['attempts', 'available_at', 'last_error']
+                )
+                log = (
+                    logger.error if event.attempts >= max_attempts
+                    else logger.warning
+                )
+                log(
+                    'Outbox event %s failed %s times',
+                    event, event.attempts, exc_info=True
+                )
+            else:
+                delivered.append(event.pk)
+        if delivered:
+            for func in _before_commit:
+                func()
+        OutboxEvent.objects.filter(pk__in=delivered).delete()
+    return len(delivered)
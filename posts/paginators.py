@@ -0,0 +1,181 @@
+"""
+Pagination of admin changelists over big tables.
+
+The changelist links pages by number, so a page can not carry the key of
+its last row to the next one in the URL. Instead the last key of every
+page served is cached for a while. A page, whose previous page has been
+served, is read with a seek on the ordering columns, e.g.
+(pub_date, id) < (last pub_date, last id), so following the pages costs
+the same at any depth. Pages reached by a jump, e.g. to the last one,
+fall back to OFFSET over primary keys only.
+"""
+import hashlib
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+# Below this amount of rows exact COUNT(*) is cheap enough.
+COUNT_ESTIMATE_THRESHOLD = 10000
+# Seconds for which last keys of served pages are kept.
+SEEK_TIMEOUT = 60 * 10
+
+# Ordering field names with descending flags.
+SeekFields = List[Tuple[str, bool]]
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """Return planner estimate of table rows or -1 if it is unknown.
+
+    Rows of a partitioned table are estimated by its partitions.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return -1
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid IN ('
+            '  SELECT inhrelid FROM pg_inherits'
+            '  WHERE inhparent = %s::regclass'
+            ") OR oid = %s::regclass AND relkind <> 'p'",
+            [table, table]
+        )
+        # Tables never analyzed have -1.
+        known = [row[0] for row in cursor.fetchall() if row[0] >= 0]
+    return int(sum(known)) if known else -1
+
+
+def seek_fields(queryset: QuerySet) -> Optional[SeekFields]:
+    """Return ordering of queryset if pages of it can be sought.
+
+    It must consist of not nullable fields of the model and end with the
+    primary key, so every row has a distinct key.
+    """
+    query = queryset.query
+    if query.distinct or query.extra_order_by:
+        return None
+    opts = queryset.model._meta
+    ordering = query.order_by or (
+        opts.ordering if query.default_ordering else ()
+    )
+    fields = []
+    for item in ordering:
+        if not isinstance(item, str):
+            return None
+        name = item.lstrip('-')
+        if name == 'pk':
+            name = opts.pk.name
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.null:
+            return None
+        fields.append((name, item.startswith('-')))
+        if field.primary_key:
+            return fields
+    return None
+
+
+def seek_filter(fields: SeekFields, values: Sequence[Any]) -> Q:
+    """Return condition of rows ordered after the row with values."""
+    first, descending = fields[0]
+    # Redundant bound on the first column, which indexes can use.
+    lookup = 'lte' if descending else 'gte'
+    condition = Q(**{f'{first}__{lookup}': values[0]})
+    after = Q()
+    for index, (name, descending) in enumerate(fields):
+        lookups = {
+            previous: value
+            for (previous, _), value in zip(fields[:index], values)
+        }
+        lookup = 'lt' if descending else 'gt'
+        lookups[f'{name}__{lookup}'] = values[index]
+        after |= Q(**lookups)
+    return condition & after
+
+
+class LargeTablePaginator(Paginator):
+    """Paginator for big tables.
+
+    Unfiltered querysets are counted with planner estimate from pg_class,
+    pages following a served one are sought, others are picked by primary
+    keys first so OFFSET skips index entries instead of whole joined rows.
+    """
+    estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        object_list = self.object_list
+        if isinstance(object_list, QuerySet) and not object_list.query.where:
+            estimate = estimate_count(object_list)
+            threshold = getattr(
+                settings,
+                'ADMIN_COUNT_ESTIMATE_THRESHOLD',
+                COUNT_ESTIMATE_THRESHOLD
+            )
+            if estimate > threshold:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    @cached_property
+    def seek_fields(self) -> Optional[SeekFields]:
+        if not isinstance(self.object_list, QuerySet):
+            return None
+        return seek_fields(self.object_list)
+
+    @cached_property
+    def _seek_key(self) -> Optional[str]:
+        try:
+            sql = str(self.object_list.query)
+        except EmptyResultSet:
+            return None
+        digest = hashlib.md5(
+            f'{sql}:{self.per_page}'.encode(), usedforsecurity=False
+        ).hexdigest()
+        return f'paginator:{digest}'
+
+    def _last_key(self, number: int) -> Optional[list]:
+        if number < 1 or self._seek_key is None:
+            return None
+        return cache.get(f'{self._seek_key}:{number}')
+
+    def _remember_last_key(self, number: int, objects: list) -> None:
+        if objects and self._seek_key is not None:
+            cache.set(
+                f'{self._seek_key}:{number}',
+                [getattr(objects[-1], name) for name, _ in self.seek_fields],
+                SEEK_TIMEOUT
+            )
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if not self.estimated and top + self.orphans >= self.count:
+            top = self.count
+        object_list = self.object_list
+        fields = self.seek_fields
+        after = self._last_key(number - 1) if fields else None
+        if after is not None:
+            object_list = object_list.filter(
+                seek_filter(fields, after)
+            )[:top - bottom]
+        elif (isinstance(object_list, QuerySet)
+                and not object_list.query.distinct):
+            pks = list(object_list.values_list('pk', flat=True)[bottom:top])
+            object_list = object_list.filter(pk__in=pks)
+        else:
+            object_list = object_list[bottom:top]
+        if fields:
+            object_list = list(object_list)
+            self._remember_last_key(number, object_list)
+        return self._get_page(object_list, number, self)
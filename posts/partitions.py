@@ -0,0 +1,348 @@
+"""
+Monthly range partitioning of posts and comments on PostgreSQL.
+
+Partitioned tables keep their names, so models and views do not change.
+Their primary keys become (id, date), because PostgreSQL requires the
+partition key in every unique constraint; that is why Comment.post has
+no foreign key constraint in database. Partitions are named
+<table>_pYYYY_MM and hold rows of one month, <table>_default holds rows
+of months without a partition. When a month gets a partition, its rows
+are moved there from the default one.
+"""
+import datetime
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.db import DatabaseError, connection, transaction
+
+from .models import Comment, Post
+
+# Partitioned tables with their partition key columns.
+TABLES: Dict[str, str] = {
+    Post._meta.db_table: Post._meta.get_field('pub_date').column,
+    Comment._meta.db_table: Comment._meta.get_field('created').column,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    """Return first day of month of day."""
+    return day.replace(day=1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """Return first day of month, which is months after month."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(
+    first: datetime.date, last: datetime.date
+) -> Iterator[datetime.date]:
+    """Yield first days of months from month of first to one of last."""
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition_name(table: str) -> str:
+    return f'{table}_default'
+
+
+def partition_month(table: str, name: str) -> Optional[datetime.date]:
+    """Return month of partition named by partition_name or None."""
+    prefix = f'{table}_p'
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.datetime.strptime(
+            name[len(prefix):], '%Y_%m'
+        ).date()
+    except ValueError:
+        return None
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table '
+        'WHERE partrelid = %s::regclass',
+        [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table: str) -> List[str]:
+    """Return names of attached partitions of table."""
+    cursor.execute(
+        'SELECT inhrelid::regclass::text FROM pg_inherits '
+        'WHERE inhparent = %s::regclass ORDER BY 1',
+        [table]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(cursor, table: str, month: datetime.date) -> bool:
+    """Create partition of table for month.
+
+    Rows of the month in the default partition are moved into it.
+    Return False if it already exists.
+    """
+    name = partition_name(table, month)
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+    bounds = [month, add_months(month, 1)]
+    default = default_partition_name(table)
+    key = _quote(TABLES[table])
+    cursor.execute('SELECT to_regclass(%s)', [default])
+    moved = cursor.fetchone()[0] is not None
+    if moved:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {_quote(default)} '
+            f'WHERE {key} >= %s AND {key} < %s)',
+            bounds
+        )
+        moved = cursor.fetchone()[0]
+    if moved:
+        # A range can not get a partition while default holds its rows.
+        cursor.execute(
+            f'ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(default)}'
+        )
+    cursor.execute(
+        f'CREATE TABLE {_quote(name)} PARTITION OF {_quote(table)} '
+        'FOR VALUES FROM (%s) TO (%s)',
+        bounds
+    )
+    if moved:
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {_quote(default)} '
+            f'WHERE {key} >= %s AND {key} < %s RETURNING *) '
+            f'INSERT INTO {_quote(name)} SELECT * FROM moved',
+            bounds
+        )
+        logger.warning(
+            'Moved %s rows of %s from %s to %s',
+            cursor.rowcount, month, default, name
+        )
+        cursor.execute(
+            f'ALTER TABLE {_quote(table)} '
+            f'ATTACH PARTITION {_quote(default)} DEFAULT'
+        )
+    return True
+
+
+def _definitions(cursor, table: str) -> Tuple[List[str], List[str]]:
+    """Return index definitions and foreign key constraints of table."""
+    # Indexes of primary key and unique constraints are left out.
+    cursor.execute(
+        'SELECT indexdef FROM pg_indexes WHERE tablename = %s '
+        'AND indexname NOT IN ('
+        '  SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass'
+        ')',
+        [table, table]
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    constraints = [
+        f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} '
+        f'{definition}'
+        for name, definition in cursor.fetchall()
+    ]
+    return indexes, constraints
+
+
+def _identity(cursor, table: str, column: str) -> str:
+    """Return 'a' or 'd' for identity columns, '' for others."""
+    cursor.execute(
+        'SELECT attidentity FROM pg_attribute '
+        'WHERE attrelid = %s::regclass AND attname = %s',
+        [table, column]
+    )
+    return cursor.fetchone()[0]
+
+
+def convert_table(
+    cursor, table: str, key: str, months_ahead: int
+) -> int:
+    """Replace table with partitioned one holding the same rows.
+
+    Return amount of created partitions. Runs in one transaction and
+    locks the table until it is done, the old table is dropped only
+    if all its rows were copied.
+    """
+    old = f'{table}_unpartitioned'
+    indexes, constraints = _definitions(cursor, table)
+    cursor.execute(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = %s::regclass AND contype = 'p'",
+        [table]
+    )
+    primary_key, primary_key_definition = cursor.fetchone()
+    pk_column = primary_key_definition[
+        primary_key_definition.index('(') + 1:
+        primary_key_definition.index(')')
+    ]
+    identity = _identity(cursor, table, pk_column.strip('"'))
+
+    cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(old)}')
+    cursor.execute(
+        f'ALTER TABLE {_quote(old)} RENAME CONSTRAINT {_quote(primary_key)} '
+        f'TO {_quote(old + "_pkey")}'
+    )
+    cursor.execute(
+        f'CREATE TABLE {_quote(table)} (LIKE {_quote(old)} '
+        'INCLUDING DEFAULTS) '
+        f'PARTITION BY RANGE ({_quote(key)})'
+    )
+    cursor.execute(
+        f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(primary_key)} '
+        f'PRIMARY KEY ({pk_column}, {_quote(key)})'
+    )
+    if identity:
+        # Sequence of an identity column belongs to it for good, the new
+        # table gets its own.
+        cursor.execute(
+            f'ALTER TABLE {_quote(table)} ALTER COLUMN {pk_column} ADD '
+            f"GENERATED {'ALWAYS' if identity == 'a' else 'BY DEFAULT'} "
+            'AS IDENTITY'
+        )
+    else:
+        # Default of a serial column uses the sequence of the old table.
+        cursor.execute(
+            'SELECT pg_get_serial_sequence(%s, %s)', [old, pk_column]
+        )
+        sequence = cursor.fetchone()[0]
+        if sequence is not None:
+            cursor.execute(
+                f'ALTER SEQUENCE {sequence} '
+                f'OWNED BY {_quote(table)}.{pk_column}'
+            )
+
+    cursor.execute(f'SELECT min({_quote(key)}) FROM {_quote(old)}')
+    first = cursor.fetchone()[0]
+    today = datetime.date.today()
+    first = first.date() if first is not None else today
+    created = sum(
+        create_partition(cursor, table, month)
+        for month in months_between(
+            first, add_months(month_start(today), months_ahead)
+        )
+    )
+    cursor.execute(
+        f'CREATE TABLE {_quote(default_partition_name(table))} '
+        f'PARTITION OF {_quote(table)} DEFAULT'
+    )
+    cursor.execute(
+        f'INSERT INTO {_quote(table)} '
+        f"{'OVERRIDING SYSTEM VALUE ' if identity else ''}"
+        f'SELECT * FROM {_quote(old)}'
+    )
+    copied = cursor.rowcount
+    cursor.execute(f'SELECT count(*) FROM {_quote(old)}')
+    if cursor.fetchone()[0] != copied:
+        raise RuntimeError(f'Not all rows of {table} were copied.')
+
+    cursor.execute(
+        'SELECT pg_get_serial_sequence(%s, %s)', [table, pk_column]
+    )
+    sequence = cursor.fetchone()[0]
+    if sequence is not None:
+        cursor.execute(
+            f'SELECT setval(%s, coalesce(max({pk_column}), 0) + 1, false) '
+            f'FROM {_quote(table)}',
+            [sequence]
+        )
+
+    cursor.execute(f'DROP TABLE {_quote(old)}')
+    for statement in indexes + constraints:
+        cursor.execute(statement)
+    return created
+
+
+def convert(months_ahead: int) -> Dict[str, int]:
+    """Partition unpartitioned tables, return created partitions."""
+    created = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Tables with pending checks of deferred foreign keys can not be
+        # dropped.
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+        for table, key in TABLES.items():
+            if not is_partitioned(cursor, table):
+                created[table] = convert_table(
+                    cursor, table, key, months_ahead
+                )
+    return created
+
+
+def create_future_partitions(months_ahead: int) -> Dict[str, int]:
+    """Create partitions up to months_ahead months from now.
+
+    Every partition is created in its own transaction, a failed one is
+    logged and does not keep the others from being created.
+    """
+    created = {}
+    this_month = month_start(datetime.date.today())
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            created[table] = 0
+            for month in months_between(
+                this_month, add_months(this_month, months_ahead)
+            ):
+                try:
+                    with transaction.atomic():
+                        created[table] += create_partition(
+                            cursor, table, month
+                        )
+                except DatabaseError:
+                    logger.exception(
+                        'Partition of %s for %s was not created', table, month
+                    )
+    return created
+
+
+def detach_partitions(
+    before: datetime.date, tablespace: Optional[str] = None
+) -> List[str]:
+    """Detach partitions of months before month of before.
+
+    Detached tables keep their rows and can be moved to tablespace.
+    Return their names.
+    """
+    detached = []
+    before = month_start(before)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            for name in partitions(cursor, table):
+                month = partition_month(table, name)
+                if month is None or month >= before:
+                    continue
+                cursor.execute(
+                    f'ALTER TABLE {_quote(table)} '
+                    f'DETACH PARTITION {_quote(name)}'
+                )
+                if tablespace:
+                    cursor.execute(
+                        f'ALTER TABLE {_quote(name)} '
+                        f'SET TABLESPACE {_quote(tablespace)}'
+                    )
+                detached.append(name)
+    return detached
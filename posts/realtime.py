@@ -0,0 +1,196 @@
+"""
+Push of new posts and comments to browsers over server-sent events.
+
+Saved posts and comments are published to a broker after commit. The
+ASGI application serves REALTIME_EVENTS_URL itself and streams events of
+the broker to every connected client; clients then fetch cards of new
+posts from the feed_updates view. Events carry ids only, so visibility
+of posts is still checked by views.
+
+LocalBroker delivers events to clients of its own process. With several
+processes or nodes REALTIME_BROKER should name a subclass, which sends
+published events to all of them (e.g. over Redis pub/sub) and passes
+received ones to deliver().
+"""
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = 'posts.realtime.LocalBroker'
+DEFAULT_HEARTBEAT = 15
+QUEUE_SIZE = 100
+
+POST = 'post'
+COMMENT = 'comment'
+
+
+class Subscription:
+    """Events of one client, read in the event loop of the client."""
+
+    def __init__(self, broker: 'LocalBroker'):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client, which does not keep up, only misses events.
+            logger.debug('Realtime event dropped for a slow client')
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Return next event, raise asyncio.TimeoutError after timeout."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub, publish() may be called from any thread."""
+
+    def __init__(self):
+        self.subscriptions: Set[Subscription] = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Pass event to subscribers of this process."""
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, event
+                )
+            except RuntimeError:
+                # The loop is closed, the client is gone.
+                self.unsubscribe(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.deliver(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker() -> LocalBroker:
+    return import_string(
+        getattr(settings, 'REALTIME_BROKER', DEFAULT_BROKER)
+    )()
+
+
+def publish(event: Dict[str, Any]) -> None:
+    """Publish event after the current transaction is committed."""
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def post_published(post: Post) -> None:
+    if post.is_hidden or post.deleted_at is not None:
+        return
+    publish({
+        'type': POST,
+        'id': post.pk,
+        'author_id': post.author_id,
+        'group_id': post.group_id,
+    })
+
+
+def comment_published(comment: Comment) -> None:
+    publish({'type': COMMENT, 'id': comment.pk, 'post_id': comment.post_id})
+
+
+def format_event(event: Dict[str, Any]) -> bytes:
+    """Return event in text/event-stream format."""
+    return (
+        f'event: {event["type"]}\n'
+        f'data: {json.dumps(event, separators=(",", ":"))}\n\n'
+    ).encode()
+
+
+HEADERS: Tuple[Tuple[bytes, bytes], ...] = (
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    # Stop nginx from buffering the stream.
+    (b'x-accel-buffering', b'no'),
+)
+
+
+async def _wait_disconnect(receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _stream(subscription: Subscription, send) -> None:
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT', DEFAULT_HEARTBEAT)
+    while True:
+        try:
+            event = await subscription.get(heartbeat)
+        except asyncio.TimeoutError:
+            # Keeps proxies from closing an idle connection.
+            body = b': ping\n\n'
+        else:
+            body = format_event(event)
+        await send({
+            'type': 'http.response.body', 'body': body, 'more_body': True
+        })
+
+
+async def events_application(scope, receive, send) -> None:
+    """ASGI application streaming broker events until disconnect."""
+    if scope['method'] != 'GET':
+        await send({
+            'type': 'http.response.start',
+            'status': 405,
+            'headers': [(b'allow', b'GET')],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    subscription = get_broker().subscribe()
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': list(HEADERS),
+    })
+    # Tells EventSource to reconnect in 5 seconds if disconnected.
+    await send({
+        'type': 'http.response.body', 'body': b'retry: 5000\n\n',
+        'more_body': True,
+    })
+    tasks = [
+        asyncio.ensure_future(_wait_disconnect(receive)),
+        asyncio.ensure_future(_stream(subscription, send)),
+    ]
+    try:
+        done, _ = await asyncio.wait(
+            tasks, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            # Raises errors of sending to a gone client.
+            task.result()
+    except OSError:
+        logger.debug('Realtime client went away', exc_info=True)
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Set
+
+from django.contrib.auth import get_user_model
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import outbox, realtime, summaries
+from .groups import invalidate_group, invalidate_group_post_counts
+from .models import Comment, Follow, Group, Post
+from .usernames import invalidate_username
+from .viewer import invalidate_profiles
+
+User = get_user_model()
+
+# Fields of user copied to profile summary.
+NAME_FIELDS = {'username', 'first_name', 'last_name'}
+# Fields of post counted in profile summaries.
+SUMMARY_FIELDS = ('author_id', 'pub_date', 'is_hidden', 'deleted_at')
+
+_batch: ContextVar[bool] = ContextVar('posts_batch', default=False)
+
+
+@contextmanager
+def batch() -> Iterator[None]:
+    """Skip invalidation on every deleted post, the caller does it once."""
+    token = _batch.set(True)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance: Group, **kwargs) -> None:
+    """Drop cached group on save and delete."""
+    invalidate_group(instance)
+    invalidate_group_post_counts()
+
+
+def _summary_changes(instance: Post, update_fields) -> Set[int]:
+    """Return ids of authors, whose summaries the saved post changed."""
+    if update_fields is not None:
+        names = {
+            instance._meta.get_field(name).attname for name in update_fields
+        }
+        if names.isdisjoint(SUMMARY_FIELDS):
+            return set()
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return {instance.author_id}
+    # Deferred fields are compared without loading them.
+    if all(
+        loaded.get(name, DEFERRED) == instance.__dict__.get(name, DEFERRED)
+        for name in SUMMARY_FIELDS
+    ):
+        return set()
+    return {instance.author_id, loaded.get('author_id', instance.author_id)}
+
+
+@receiver(post_save, sender=Post)
+def post_saved(
+    sender, instance: Post, created: bool, update_fields=None, **kwargs
+) -> None:
+    """Drop cached amounts of posts, update summary and emit the change."""
+    invalidate_group_post_counts()
+    invalidate_profiles([instance.author_id])
+    if created:
+        summaries.post_created(instance)
+        realtime.post_published(instance)
+        outbox.emit(
+            outbox.POST_CREATED,
+            id=instance.pk,
+            author_id=instance.author_id,
+            group_id=instance.group_id,
+            timestamp=instance.pub_date.timestamp()
+        )
+    else:
+        author_ids = _summary_changes(instance, update_fields)
+        if author_ids:
+            summaries.refresh_profile_summaries(author_ids)
+        outbox.emit(outbox.POST_UPDATED, id=instance.pk)
+    instance._loaded_values = {
+        name: instance.__dict__.get(name, DEFERRED) for name in SUMMARY_FIELDS
+    }
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance: Post, origin=None, **kwargs) -> None:
+    """Drop cached amounts of posts and update summary of author."""
+    if _batch.get():
+        return
+    invalidate_group_post_counts()
+    invalidate_profiles([instance.author_id])
+    visible = not instance.is_hidden and instance.deleted_at is None
+    # Summary of a deleted user is deleted as well.
+    if visible and not isinstance(origin, User):
+        summaries.refresh_profile_summaries([instance.author_id])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance: Comment, created: bool, **kwargs) -> None:
+    """Pass new comment to outbox handlers and push it to clients."""
+    if created:
+        realtime.comment_published(instance)
+        outbox.emit(
+            outbox.COMMENT_CREATED,
+            id=instance.pk,
+            post_id=instance.post_id,
+            timestamp=instance.created.timestamp()
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance: Follow, created: bool, **kwargs) -> None:
+    """Drop cached profiles of both sides of follow and count it."""
+    invalidate_profiles([instance.user_id, instance.author_id])
+    if created:
+        summaries.follow_changed(instance, 1)
+        outbox.emit(
+            outbox.FOLLOW_CREATED,
+            user_id=instance.user_id,
+            author_id=instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance: Follow, **kwargs) -> None:
+    """Drop cached profiles of both sides of follow and uncount it."""
+    invalidate_profiles([instance.user_id, instance.author_id])
+    summaries.follow_changed(instance, -1)
+    outbox.emit(
+        outbox.FOLLOW_DELETED,
+        user_id=instance.user_id,
+        author_id=instance.author_id
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs) -> None:
+    """Drop cached profile of changed user and update their summary."""
+    invalidate_profiles([instance.pk])
+    if update_fields is None or NAME_FIELDS.intersection(update_fields):
+        summaries.user_saved(instance)
+        invalidate_username(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs) -> None:
+    """Drop cached profile and username of deleted user."""
+    invalidate_profiles([instance.pk])
+    invalidate_username(instance)
@@ -0,0 +1,84 @@
+"""
+Content-addressed storage of post images.
+
+Uploads are hashed while they are copied to a temporary file and stored
+as <upload_to>/ab/cd/<sha256><extension>. An upload, which is already
+stored, is dropped and the stored file is reused, with its thumbnails,
+since sorl names thumbnails after the source name. Many posts may refer
+to one file, so it is deleted only when no post refers to it, see
+posts.moderation.unreferenced_images.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _makedirs(self, directory: str) -> None:
+        if self.directory_permissions_mode is None:
+            os.makedirs(directory, exist_ok=True)
+            return
+        # The same as FileSystemStorage does.
+        old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+        try:
+            os.makedirs(
+                directory, self.directory_permissions_mode, exist_ok=True
+            )
+        finally:
+            os.umask(old_umask)
+
+    def _save(self, name: str, content) -> str:
+        directory, basename = posixpath.split(name.replace('\\', '/'))
+        extension = os.path.splitext(basename)[1].lower()
+        temp_directory = self.path(directory)
+        self._makedirs(temp_directory)
+
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=temp_directory, prefix='.upload-'
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(
+                directory, hexdigest[:2], hexdigest[2:4],
+                hexdigest + extension
+            )
+            path = self.path(name)
+            if os.path.exists(path):
+                # Tells sweeps and purges the file has just been reused.
+                os.utime(path)
+                os.unlink(temp_path)
+                return name
+            self._makedirs(os.path.dirname(path))
+            mode = self.file_permissions_mode
+            if mode is None:
+                # mkstemp creates files readable by the owner only.
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return name
+
+    def get_available_name(self, name: str, max_length=None) -> str:
+        # Stored name depends on content only, see _save.
+        return name
+
+
+image_storage = ContentAddressedStorage()
+
+
+def get_image_storage() -> ContentAddressedStorage:
+    """Return storage of post images, referred to by migrations."""
+    return image_storage
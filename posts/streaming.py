@@ -0,0 +1,111 @@
+"""
+Streaming of long pages.
+
+A page is rendered with a marker in place of its {% streamed %} block,
+which holds the long list of the page, so the rest of it is cheap to
+render. Everything before the marker, head and nav included, is sent at
+once, then the list is rendered chunk by chunk from an iterator over its
+queryset, then the rest of the page. Time to first byte does not depend
+on the length of the list and only a chunk of it is in memory at a time.
+
+Anything, which sets cookies or headers, such as a CSRF token, must be
+rendered outside of the block, since headers are sent before it.
+
+Pages are streamed under WSGI only. The ASGI handler of Django 4.1
+reads streaming content in the event loop, where the queries of the
+block are not allowed, so there the block is rendered in place.
+"""
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.request import HttpRequest
+from django.http.response import HttpResponseBase
+from django.shortcuts import render
+from django.template import loader
+from django.template.context import Context
+
+STREAM_KEY = 'page_stream'
+STREAM_MARKER = '<!-- streamed -->'
+DEFAULT_CHUNK_SIZE = 10
+
+Parts = Callable[[Context], Iterable[str]]
+
+
+class Stream:
+    """Context of the {% streamed %} block of a page being rendered."""
+
+    def __init__(self):
+        self.context: Optional[Context] = None
+
+    def capture(self, context: Context) -> str:
+        """Keep context of the block, return marker to render instead."""
+        self.context = Context(
+            context.flatten(),
+            autoescape=context.autoescape,
+            use_l10n=context.use_l10n,
+            use_tz=context.use_tz
+        )
+        return STREAM_MARKER
+
+
+def chunk_size() -> int:
+    return getattr(settings, 'STREAM_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def chunked(items: Iterable, size: Optional[int] = None) -> Iterator[List]:
+    """Yield lists of items, querysets are read chunk by chunk."""
+    size = size or chunk_size()
+    if isinstance(items, QuerySet):
+        items = items.iterator(chunk_size=size)
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def template_parts(template_name: str, name: str, items: Iterable) -> Parts:
+    """Return parts rendering template for every chunk of items as name."""
+    def parts(context: Context) -> Iterator[str]:
+        template = loader.get_template(template_name).template
+        for chunk in chunked(items):
+            with context.push({name: chunk}):
+                yield template.render(context)
+    return parts
+
+
+def stream_template(
+    request: HttpRequest,
+    template_name: str,
+    context: Dict,
+    parts: Parts
+) -> HttpResponseBase:
+    """Return page with its {% streamed %} block replaced by parts.
+
+    The block is rendered in place if STREAM_PAGES is False or the
+    request came over ASGI.
+    """
+    if (
+        not getattr(settings, 'STREAM_PAGES', True)
+        or isinstance(request, ASGIRequest)
+    ):
+        return render(request, template_name, context)
+    stream = Stream()
+    page = loader.render_to_string(
+        template_name, {**context, STREAM_KEY: stream}, request
+    )
+    if stream.context is None:
+        return HttpResponse(page)
+    head, tail = page.split(STREAM_MARKER, 1)
+
+    def content() -> Iterator[str]:
+        yield head
+        yield from parts(stream.context)
+        yield tail
+
+    return StreamingHttpResponse(content())
@@ -0,0 +1,105 @@
+"""
+Profile summaries: counters shown in profile sidebar.
+
+Creating posts and follows changes counters in place, other changes of
+posts recount summaries of their authors.
+"""
+from typing import Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Follow, Post, ProfileSummary
+
+User = get_user_model()
+
+
+def _count(queryset, field: str) -> Coalesce:
+    """Return subquery counting rows of queryset by field."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def refresh_profile_summaries(user_ids: Iterable[int]) -> None:
+    """Recount summaries of users, creating missing ones."""
+    users = User.objects.filter(pk__in=list(user_ids)).annotate(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        follows_count=_count(Follow.objects.all(), 'user'),
+        last_post_at=Subquery(
+            Post.objects.filter(author=OuterRef('pk'))
+            .order_by('-pub_date')
+            .values('pub_date')[:1]
+        ),
+    )
+    for user in users:
+        ProfileSummary.objects.update_or_create(
+            user=user,
+            defaults={
+                'username': user.username,
+                'display_name': user.get_full_name(),
+                'posts_count': user.posts_count,
+                'followers_count': user.followers_count,
+                'follows_count': user.follows_count,
+                'last_post_at': user.last_post_at,
+            }
+        )
+
+
+def get_profile_summary(user) -> ProfileSummary:
+    """Return summary of user, creating it if it is missing."""
+    try:
+        return user.profile_summary
+    except ProfileSummary.DoesNotExist:
+        refresh_profile_summaries([user.pk])
+        return ProfileSummary.objects.get(user=user)
+
+
+def get_summary_by_username(username: str) -> Optional[ProfileSummary]:
+    """Return summary with user by username or None."""
+    summary = ProfileSummary.objects.select_related('user').filter(
+        username=username
+    ).first()
+    if summary is None:
+        user = User.objects.filter(username=username).first()
+        if user is not None:
+            summary = get_profile_summary(user)
+    return summary
+
+
+def user_saved(user) -> None:
+    """Copy names of user to summary."""
+    updated = ProfileSummary.objects.filter(user=user).update(
+        username=user.username, display_name=user.get_full_name()
+    )
+    if not updated:
+        refresh_profile_summaries([user.pk])
+
+
+def post_created(post: Post) -> None:
+    """Count new post in summary of author."""
+    if post.is_hidden or post.deleted_at is not None:
+        return
+    ProfileSummary.objects.filter(user_id=post.author_id).update(
+        posts_count=F('posts_count') + 1, last_post_at=post.pub_date
+    )
+
+
+def follow_changed(follow: Follow, delta: int) -> None:
+    """Count created (delta 1) or deleted (delta -1) follow."""
+    ProfileSummary.objects.filter(user_id=follow.author_id).update(
+        followers_count=F('followers_count') + delta
+    )
+    ProfileSummary.objects.filter(user_id=follow.user_id).update(
+        follows_count=F('follows_count') + delta
+    )
@@ -0,0 +1,172 @@
+import datetime
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+)
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+JOB_TIMEOUT = 60 * 60 * 24
+DEFAULT_BATCH_SIZE = 500
+
+# Values of BACKGROUND_TASKS_BACKEND.
+THREADS = 'threads'
+DATABASE = 'database'
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _job_key(job_id: str) -> str:
+    return f'jobs:{job_id}'
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+            thread_name_prefix='posts-tasks'
+        )
+    return _executor
+
+
+def report_progress(
+    job_id: str, status: str, done: int = 0, total: Optional[int] = None
+) -> None:
+    """Save job progress.
+
+    It is kept in the default cache, so with a cache local to a process
+    only that process sees it.
+    """
+    cache.set(
+        _job_key(job_id),
+        {'status': status, 'done': done, 'total': total},
+        JOB_TIMEOUT
+    )
+
+
+def get_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return job progress or None if job is unknown."""
+    return cache.get(_job_key(job_id))
+
+
+def _run(job_id: str, func: Callable, args: tuple) -> None:
+    try:
+        func(job_id, *args)
+    except Exception:
+        logger.exception('Job %s (%s) failed', job_id, func.__name__)
+        progress = get_progress(job_id) or {}
+        report_progress(
+            job_id, 'failed', progress.get('done', 0), progress.get('total')
+        )
+
+
+def _run_deferred(func: Callable, args: tuple) -> None:
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Deferred call of %s failed', func.__name__)
+
+
+def _run_in_thread(target: Callable, *args) -> None:
+    # Connections of pool threads are not closed by requests.
+    close_old_connections()
+    try:
+        target(*args)
+    finally:
+        close_old_connections()
+
+
+def _submit(target: Callable, *args) -> None:
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        # Connections belong to the caller.
+        target(*args)
+    else:
+        _get_executor().submit(_run_in_thread, target, *args)
+
+
+def enqueue(
+    func: Callable,
+    *args,
+    run_at: Optional[datetime.datetime] = None,
+    max_attempts: Optional[int] = None
+) -> str:
+    """Run func(job_id, *args) in background after transaction commit.
+
+    The database backend saves the job for runworker, which runs it at
+    run_at and retries it up to max_attempts times. The thread pool of
+    the process runs a job once and right away, and loses it if the
+    process exits first.
+
+    Return id of the job to follow its progress.
+    """
+    job_id = uuid.uuid4().hex
+    report_progress(job_id, 'queued')
+    backend = getattr(settings, 'BACKGROUND_TASKS_BACKEND', THREADS)
+    if (
+        backend == DATABASE
+        and not getattr(settings, 'BACKGROUND_TASKS_EAGER', False)
+    ):
+        from .jobs import create_job
+
+        create_job(job_id, func, args, run_at, max_attempts)
+    elif run_at is not None and backend != DATABASE:
+        raise ValueError('Scheduled jobs need the database backend.')
+    else:
+        transaction.on_commit(lambda: _submit(_run, job_id, func, args))
+    return job_id
+
+
+def defer(func: Callable, *args) -> None:
+    """Run func(*args) in background after transaction commit.
+
+    Unlike enqueue, progress is not tracked, which suits small writes
+    done on behalf of a request.
+    """
+    transaction.on_commit(lambda: _submit(_run_deferred, func, args))
+
+
+def get_batch_size() -> int:
+    """Return amount of rows processed by a job at once."""
+    return getattr(settings, 'MODERATION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def iter_batches(
+    ids: Sequence[Any], batch_size: Optional[int] = None
+) -> Iterator[List[Any]]:
+    """Yield bounded batches of ids."""
+    batch_size = batch_size or get_batch_size()
+    for start in range(0, len(ids), batch_size):
+        yield list(ids[start:start + batch_size])
+
+
+def run_in_batches(
+    job_id: str,
+    ids: Iterable[Any],
+    handler: Callable[[List[Any]], None],
+    batch_size: Optional[int] = None,
+    atomic: bool = True
+) -> None:
+    """Call handler with bounded batches of ids reporting progress.
+
+    Every call runs in own transaction unless atomic is False.
+    """
+    ids = list(ids)
+    total = len(ids)
+    done = 0
+    report_progress(job_id, 'running', done, total)
+    for batch in iter_batches(ids, batch_size):
+        if atomic:
+            with transaction.atomic():
+                handler(batch)
+        else:
+            handler(batch)
+        done += len(batch)
+        report_progress(job_id, 'running', done, total)
+    report_progress(job_id, 'done', total, total)
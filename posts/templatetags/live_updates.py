@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.urls import reverse
+
+register = template.Library()
+
+
+@register.inclusion_tag('live_feed.html')
+def live_feed(feed, page, group=None):
+    """Add cards of new posts to the first page of feed as they appear."""
+    events_url = getattr(settings, 'REALTIME_EVENTS_URL', None)
+    if not events_url or getattr(page, 'number', 1) != 1:
+        return {}
+    return {
+        'events_url': events_url,
+        'updates_url': reverse('feed_updates'),
+        'feed': feed,
+        'group': group,
+        'latest': max((post.pk for post in page), default=0),
+    }
+
+
+@register.inclusion_tag('live_comments.html')
+def live_comments(post):
+    """Tell reader of post about new comments."""
+    return {
+        'events_url': getattr(settings, 'REALTIME_EVENTS_URL', None),
+        'post': post,
+    }
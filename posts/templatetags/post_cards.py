@@ -0,0 +1,11 @@
+from django import template
+
+from posts.cards import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, add_comment=False, separator=False):
+    """Render cards of posts in one pass."""
+    return render_post_cards(posts, context, add_comment, separator)
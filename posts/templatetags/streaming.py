@@ -0,0 +1,24 @@
+from django import template
+
+from posts.streaming import STREAM_KEY
+
+register = template.Library()
+
+
+class StreamedNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        stream = context.get(STREAM_KEY)
+        if stream is None:
+            return self.nodelist.render(context)
+        return stream.capture(context)
+
+
+@register.tag
+def streamed(parser, token):
+    """Mark long list of page, which is rendered in place or streamed."""
+    nodelist = parser.parse(('endstreamed',))
+    parser.delete_first_token()
+    return StreamedNode(nodelist)
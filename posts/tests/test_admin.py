@@ -0,0 +1,194 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import moderation
+from posts.models import Comment, Group, Post
+from posts.paginators import LargeTablePaginator
+from posts.tasks import enqueue, get_progress
+
+User = get_user_model()
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', password='password'
+        )
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.group = Group.objects.create(title='Title', slug='test-group')
+        cls.posts = [
+            Post.objects.create(
+                text=f'post {number}', author=cls.admin, group=cls.group
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.admin, text='comment'
+        )
+
+    def test_changelists(self) -> None:
+        """Test admin changelists and searches respond."""
+        urls = [
+            reverse('admin:posts_post_changelist'),
+            reverse('admin:posts_comment_changelist'),
+            reverse('admin:posts_group_changelist'),
+            reverse('admin:posts_comment_changelist') + '?q=admin',
+            reverse('admin:posts_group_changelist') + '?q=tit',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.admin_client.get(url).status_code, 200)
+
+    def test_paginator_exact_count(self) -> None:
+        """Test paginator counts small tables exactly."""
+        paginator = LargeTablePaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(
+            list(paginator.page(3).object_list), self.posts[:1]
+        )
+
+    def test_paginator_estimated_count(self) -> None:
+        """Test paginator uses estimate for big unfiltered tables."""
+        with mock.patch(
+            'posts.paginators.estimate_count', return_value=10 ** 6
+        ):
+            paginator = LargeTablePaginator(Post.all_objects.all(), 2)
+            self.assertEqual(paginator.count, 10 ** 6)
+            self.assertEqual(
+                list(paginator.page(1).object_list), self.posts[:2:-1]
+            )
+
+            filtered = LargeTablePaginator(
+                Post.objects.filter(group=self.group), 2
+            )
+            self.assertEqual(filtered.count, 5)
+
+    def test_paginator_seeks_next_pages(self) -> None:
+        """Test pages after a served one are sought, not offset."""
+        cache.clear()
+        posts = Post.all_objects.order_by('-pub_date', '-pk')
+        expected = Paginator(posts, 2)
+        paginator = LargeTablePaginator(posts, 2)
+        for number in (1, 2, 3):
+            with CaptureQueriesContext(connection) as queries:
+                page = paginator.page(number)
+            self.assertEqual(
+                list(page.object_list),
+                list(expected.page(number).object_list)
+            )
+            if number > 1:
+                self.assertEqual(len(queries), 1)
+                self.assertNotIn('OFFSET', queries[0]['sql'])
+
+        jumped = LargeTablePaginator(posts.filter(group=self.group), 2)
+        with CaptureQueriesContext(connection) as queries:
+            jumped.page(3)
+        self.assertIn('OFFSET', queries[1]['sql'])
+
+    def test_paginator_does_not_seek_ambiguous_ordering(self) -> None:
+        """Test ordering without primary key is not sought."""
+        paginator = LargeTablePaginator(Post.objects.all(), 2)
+        self.assertIsNone(paginator.seek_fields)
+        self.assertEqual(
+            LargeTablePaginator(
+                Post.objects.order_by('-pub_date', '-pk'), 2
+            ).seek_fields,
+            [('pub_date', True), ('id', True)]
+        )
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, MODERATION_BATCH_SIZE=2)
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', password='password'
+        )
+        cls.spammer = User.objects.create_user(username='Spammer')
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.group = Group.objects.create(title='Title', slug='test-group')
+
+    def setUp(self) -> None:
+        self.posts = [
+            Post.objects.create(text=f'spam {number}', author=self.spammer)
+            for number in range(3)
+        ]
+        self.comment = Comment.objects.create(
+            post=self.posts[0], author=self.spammer, text='spam'
+        )
+
+    def run_action(self, model_name: str, action: str, ids, **data):
+        """Run admin action and its background job."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.post(
+                reverse(f'admin:{model_name}_changelist'),
+                {'action': action, '_selected_action': ids, **data}
+            )
+        self.assertEqual(response.status_code, 302)
+        return response
+
+    def post_ids(self):
+        return [post.pk for post in self.posts]
+
+    def test_delete_posts_action(self) -> None:
+        """Test posts are deleted in background with their comments."""
+        self.run_action('posts_post', 'delete_posts', self.post_ids())
+        self.assertFalse(Post.all_objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_move_posts_action(self) -> None:
+        """Test posts are moved to chosen group."""
+        self.run_action(
+            'posts_post', 'move_posts', self.post_ids(), group=self.group.pk
+        )
+        self.assertEqual(self.group.posts.count(), 3)
+
+    def test_hide_posts_action(self) -> None:
+        """Test hidden posts disappear from site but not from admin."""
+        self.run_action('posts_post', 'hide_posts', self.post_ids())
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertEqual(Post.all_objects.filter(is_hidden=True).count(), 3)
+        self.assertNotContains(self.admin_client.get(reverse('index')), 'spam')
+        self.assertContains(
+            self.admin_client.get(reverse('admin:posts_post_changelist')),
+            'spam 1'
+        )
+
+        self.run_action('posts_post', 'show_posts', self.post_ids())
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 3)
+
+    def test_purge_user_content_action(self) -> None:
+        """Test all content of user is deleted."""
+        Comment.objects.create(
+            post=Post.objects.create(text='ok', author=self.admin),
+            author=self.spammer,
+            text='spam on other post'
+        )
+        self.run_action('auth_user', 'purge_content', [self.spammer.pk])
+        self.assertFalse(Post.all_objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.filter(author=self.spammer).exists())
+        self.assertTrue(Post.objects.filter(author=self.admin).exists())
+
+    def test_job_progress(self) -> None:
+        """Test job reports its progress after every batch."""
+        with self.captureOnCommitCallbacks(execute=True):
+            job_id = enqueue(moderation.delete_posts, self.post_ids())
+        self.assertEqual(
+            get_progress(job_id), {'status': 'done', 'done': 3, 'total': 3}
+        )
+        response = self.admin_client.get(
+            reverse('admin:posts_post_job', kwargs={'job_id': job_id})
+        )
+        self.assertEqual(response.json()['status'], 'done')
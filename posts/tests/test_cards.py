@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Пользователь')
+        cls.another_user = User.objects.create_user(username='AnotherUser')
+        cls.group = Group.objects.create(title='<Title>', slug='test-group')
+        cls.small_gif = small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9'
+            b'\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00'
+            b'\x00\x02\x02\x4c\x01\x00\x3b'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text='first <b>line</b>\nsecond line',
+                author=cls.user,
+                group=cls.group,
+                image=SimpleUploadedFile(
+                    'small.gif', small_gif, content_type='image/gif'
+                )
+            ),
+            Post.objects.create(text='no group', author=cls.another_user),
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='comment'
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def render(self, source: str, **context) -> str:
+        return Template(source).render(Context(context))
+
+    def test_cards_match_post_item(self) -> None:
+        """Test cards renderer output equals per post includes."""
+        posts = Post.objects.select_related('author', 'group')
+        for user in (AnonymousUser(), self.user):
+            for add_comment in (False, True):
+                with self.subTest(user=user, add_comment=add_comment):
+                    expected = self.render(
+                        '{% for post in posts %}'
+                        '{% include "post_item.html" %}'
+                        '{% if separator and not forloop.last %}<hr>'
+                        '{% endif %}'
+                        '{% endfor %}',
+                        posts=posts,
+                        user=user,
+                        add_comment=add_comment,
+                        separator=True
+                    )
+                    actual = self.render(
+                        '{% load post_cards %}'
+                        '{% post_cards posts add_comment=add_comment '
+                        'separator=True %}',
+                        posts=posts,
+                        user=user,
+                        add_comment=add_comment
+                    )
+                    self.assertHTMLEqual(actual, expected)
+
+    def test_cards_queries(self) -> None:
+        """Test cards count comments of whole page with one query."""
+        posts = list(Post.objects.select_related('author', 'group'))
+        self.render(
+            '{% load post_cards %}{% post_cards posts add_comment=True %}',
+            posts=posts,
+            user=self.user
+        )
+        with self.assertNumQueries(1):
+            self.render(
+                '{% load post_cards %}{% post_cards posts add_comment=True %}',
+                posts=posts,
+                user=self.user
+            )
+
+    def test_thumbnails_looked_up_at_once(self) -> None:
+        """Test thumbnails of a page take one cache or database lookup."""
+        # Rows of thumbnails made by other tests are rolled back.
+        cache.clear()
+        for number in range(3):
+            Post.objects.create(
+                text=f'image {number}',
+                author=self.user,
+                image=SimpleUploadedFile(
+                    f'image{number}.gif', self.small_gif,
+                    content_type='image/gif'
+                )
+            )
+        posts = list(Post.objects.select_related('author', 'group'))
+        source = '{% load post_cards %}{% post_cards posts %}'
+        expected = self.render(source, posts=posts, user=self.user)
+        self.assertEqual(expected.count('<img class="card-img"'), 4)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            actual = self.render(source, posts=posts, user=self.user)
+        self.assertEqual(actual, expected)
+        with self.assertNumQueries(0):
+            self.render(source, posts=posts, user=self.user)
+
+    def test_bench_cards(self) -> None:
+        """Test cards benchmark reports speedup."""
+        out = StringIO()
+        call_command('bench_cards', '--iterations=1', stdout=out)
+        self.assertIn('speedup', out.getvalue())
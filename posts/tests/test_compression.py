@@ -0,0 +1,122 @@
+import gzip
+import zlib
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from social_network import compression
+from social_network.compression import CompressionMiddleware
+
+User = get_user_model()
+
+PAGE = ('<div class="card"><p>Текст поста</p></div>\n' * 200).encode()
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip, deflate'):
+        middleware = CompressionMiddleware(lambda request: response)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return middleware(request)
+
+    @override_settings(COMPRESSION_BROTLI=False)
+    def test_html_is_compressed(self):
+        source = HttpResponse(PAGE)
+        source['ETag'] = '"page"'
+        response = self.process(source)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"page"')
+        self.assertEqual(gzip.decompress(response.content), PAGE)
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+
+    def test_not_compressed(self):
+        small = b'<p>ok</p>'
+        cases = {
+            'small': HttpResponse(small),
+            'media': HttpResponse(PAGE, content_type='image/jpeg'),
+            'encoded': HttpResponse(PAGE, headers={
+                'Content-Encoding': 'identity'
+            }),
+            'no-transform': HttpResponse(PAGE, headers={
+                'Cache-Control': 'no-transform'
+            }),
+        }
+        for case, source in cases.items():
+            with self.subTest(case=case):
+                response = self.process(source)
+                self.assertIn(response.content, (PAGE, small))
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_not_accepted(self):
+        response = self.process(HttpResponse(PAGE), 'gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, PAGE)
+
+    @override_settings(COMPRESSION_BROTLI=False)
+    def test_streaming_response_is_flushed_by_chunk(self):
+        chunks = [PAGE[:1000], PAGE[1000:], b'']
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        parts = list(response.streaming_content)
+        # The first chunk is decodable as soon as it arrives.
+        decompressor = zlib.decompressobj(31)
+        self.assertEqual(decompressor.decompress(parts[0]), PAGE[:1000])
+        self.assertEqual(gzip.decompress(b''.join(parts)), PAGE)
+
+    @override_settings(COMPRESSION_BROTLI=False, COMPRESSION_CPU_BUDGET=0)
+    def test_level_drops_over_cpu_budget(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(PAGE))
+        self.assertEqual(middleware.choose_level('gzip', len(PAGE)), 6)
+        middleware.record_cost('gzip', 6, len(PAGE), 0.001)
+        self.assertEqual(middleware.choose_level('gzip', len(PAGE)), 1)
+        self.assertEqual(middleware.choose_level('gzip', 2 * 1024 * 1024), 1)
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        response = self.process(HttpResponse(PAGE), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), PAGE)
+
+
+class CompressionViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(
+            text='Текст поста ' * 50, author=cls.user
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text='Комментарий')
+            for _ in range(20)
+        )
+
+    @override_settings(COMPRESSION_BROTLI=False)
+    def test_post_page_is_compressed(self):
+        url = reverse('post', kwargs={
+            'username': self.user.username, 'post_id': self.post.pk
+        })
+        plain = b''.join(Client().get(url).streaming_content)
+        response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), plain
+        )
+
+    def test_bench_compression(self):
+        out = StringIO()
+        call_command('bench_compression', iterations=1, stdout=out)
+        self.assertIn('gzip', out.getvalue())
+        self.assertIn('served: ', out.getvalue())
@@ -0,0 +1,183 @@
+import gc
+import os
+import threading
+import time
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from social_network.db_pool import base
+from social_network.db_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.connected = []
+
+    def connect(self) -> FakeConnection:
+        connection = FakeConnection()
+        self.connected.append(connection)
+        return connection
+
+    def test_connections_are_reused(self) -> None:
+        """Test released connection is taken again, not a new one."""
+        pool = ConnectionPool(self.connect, size=2)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['open'], 1)
+
+    def test_timeout(self) -> None:
+        """Test acquire waits for a connection up to timeout."""
+        pool = ConnectionPool(self.connect, size=1, timeout=0.05)
+        first = pool.acquire()
+        with self.assertLogs('social_network.db_pool.pool', 'WARNING'):
+            with self.assertRaises(PoolTimeout):
+                pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        threading.Timer(0.01, pool.release, [first]).start()
+        pool.timeout = 5
+        self.assertIs(pool.acquire(), first)
+        self.assertGreater(pool.stats()['max_wait_seconds'], 0)
+
+    def test_idle_connections_are_evicted(self) -> None:
+        """Test connections idle for longer than max_idle are closed."""
+        pool = ConnectionPool(self.connect, size=2, max_idle=0.01)
+        first = pool.acquire()
+        pool.release(first)
+        time.sleep(0.02)
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        stats = pool.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['open'], 1)
+
+    def test_broken_connections_are_replaced(self) -> None:
+        """Test connections failing health check are not handed out."""
+        pool = ConnectionPool(
+            self.connect, size=1, check=lambda connection: connection.usable
+        )
+        first = pool.acquire()
+        first.usable = False
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+
+        pool.discard(second)
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertEqual(len(self.connected), 2)
+
+    def test_failed_connect_frees_slot(self) -> None:
+        """Test failure to connect does not use up the pool."""
+        def connect():
+            raise OSError
+
+        pool = ConnectionPool(connect, size=1, timeout=0.01)
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                pool.acquire()
+        self.assertEqual(pool.stats()['open'], 0)
+
+    def test_close_all(self) -> None:
+        """Test idle connections are closed, busy ones are kept."""
+        pool = ConnectionPool(self.connect, size=2)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.close_all()
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_detach(self) -> None:
+        """Test detached connections are forgotten, not closed."""
+        pool = ConnectionPool(self.connect, size=2)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        self.assertEqual(pool.detach(), [first, second])
+        self.assertFalse(first.closed or second.closed)
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertIsNot(pool.acquire(), first)
+
+    def test_foreign_connections_are_not_pooled(self) -> None:
+        """Test connections of another pool are closed, not taken."""
+        pool = ConnectionPool(self.connect, size=1, timeout=0.01)
+        other = ConnectionPool(self.connect, size=1)
+        foreign = other.acquire()
+        with self.assertLogs('social_network.db_pool.pool', 'WARNING'):
+            pool.release(foreign)
+            pool.discard(foreign)
+        self.assertTrue(foreign.closed)
+        stats = pool.stats()
+        self.assertEqual(stats['foreign'], 2)
+        self.assertEqual(stats['open'], 0)
+        self.assertEqual(stats['idle'], 0)
+
+        # A connection released twice stays pooled once.
+        first = pool.acquire()
+        pool.release(first)
+        pool.release(first)
+        self.assertFalse(first.closed)
+        self.assertEqual(pool.stats()['idle'], 1)
+        self.assertIs(pool.acquire(), first)
+
+    def test_stats_are_logged(self) -> None:
+        """Test metrics are logged at most once in log_interval."""
+        pool = ConnectionPool(
+            self.connect, size=1, name='default/social', log_interval=0.01
+        )
+        time.sleep(0.02)
+        with self.assertLogs('social_network.db_pool.pool', 'INFO') as logs:
+            pool.release(pool.acquire())
+            pool.release(pool.acquire())
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('default/social', logs.output[0])
+
+
+class PooledBackendTests(TestCase):
+    def setUp(self) -> None:
+        if connection.settings_dict['ENGINE'] != base.__package__:
+            self.skipTest('Database is not pooled.')
+
+    def test_forked_process_keeps_parent_connections(self) -> None:
+        """Test a child taking its own pool leaves parent sessions open."""
+        args = ('forked', connection.settings_dict,
+                connection.get_connection_params())
+        pool = base.get_pool(*args)
+        idle = pool.acquire()
+        pool.release(idle)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # Only the pools of the module are left to refer to it.
+                del pool, idle
+                base.get_pool(*args)
+                base.close_pools()
+                gc.collect()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertIs(base.get_pool(*args), pool)
+        self.assertIs(pool.acquire(), idle)
+        try:
+            with idle.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchone(), (1,))
+        finally:
+            pool.release(idle)
+            pool.close_all()
@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http.response import HttpResponse
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.groups import all_groups, get_group_by_id, get_group_by_slug
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupRegistryTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Title', slug='test-group')
+        cls.client = Client()
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_lookups_are_cached(self) -> None:
+        """Test repeated group lookups don't touch database."""
+        get_group_by_slug(self.group.slug)
+        all_groups()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_by_slug(self.group.slug), self.group)
+            self.assertEqual(get_group_by_id(self.group.pk), self.group)
+            self.assertEqual(all_groups(), [self.group])
+
+    def test_group_save_invalidates_cache(self) -> None:
+        """Test renamed group is not available by its old slug."""
+        group: Group = Group.objects.create(title='Old', slug='old-slug')
+        get_group_by_slug('old-slug')
+        all_groups()
+
+        group.slug = 'new-slug'
+        group.save()
+
+        self.assertIsNone(get_group_by_slug('old-slug'))
+        self.assertEqual(get_group_by_slug('new-slug'), group)
+        self.assertIn(group, all_groups())
+
+    def test_group_delete_invalidates_cache(self) -> None:
+        """Test deleted group disappears from registry."""
+        group: Group = Group.objects.create(title='Gone', slug='gone')
+        get_group_by_id(group.pk)
+        all_groups()
+
+        group_id = group.pk
+        group.delete()
+
+        self.assertIsNone(get_group_by_id(group_id))
+        self.assertNotIn(group_id, [item.pk for item in all_groups()])
+
+    def test_post_form_choices(self) -> None:
+        """Test post form renders and validates groups from registry."""
+        all_groups()
+        with self.assertNumQueries(0):
+            choices = list(PostForm().fields['group'].choices)
+        self.assertIn(self.group.title, [label for _, label in choices])
+
+        form: PostForm = PostForm(
+            data={'text': 'text', 'group': self.group.pk}
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.group)
+
+        form = PostForm(data={'text': 'text', 'group': 0})
+        self.assertFalse(form.is_valid())
+        self.assertIn('group', form.errors)
+
+    def test_group_index(self) -> None:
+        """Test groups directory lists groups with amount of posts."""
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        response: HttpResponse = self.client.get(reverse('group_index'))
+        self.assertContains(response, self.group.title)
+        self.assertContains(response, 'Записей: 1')
+
+        Post.objects.create(text='text', author=self.user, group=self.group)
+        response = self.client.get(reverse('group_index'))
+        self.assertContains(response, 'Записей: 2')
+
+
+class GroupAutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(title='Python', slug='python')
+        cls.other_group = Group.objects.create(title='Django', slug='web')
+        cls.client = Client()
+
+    def test_autocomplete_prefix(self) -> None:
+        """Test autocomplete finds groups by title and slug prefix."""
+        url = reverse('group_autocomplete')
+        self.assertEqual(
+            self.client.get(url, {'q': 'py'}).json()['results'],
+            [{'id': self.group.pk, 'title': 'Python', 'slug': 'python'}]
+        )
+        self.assertEqual(
+            [item['id'] for item in
+             self.client.get(url, {'q': 'WE'}).json()['results']],
+            [self.other_group.pk]
+        )
+        self.assertEqual(self.client.get(url).json()['results'], [])
+
+    def test_autocomplete_limit(self) -> None:
+        """Test autocomplete returns no more than limit groups."""
+        for number in range(3):
+            Group.objects.create(title=f'Pyramid {number}', slug=f'p-{number}')
+        response = self.client.get(
+            reverse('group_autocomplete'), {'q': 'py', 'limit': 2}
+        )
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_widget_renders_selected_group_only(self) -> None:
+        """Test group widget doesn't render the whole list of groups."""
+        form: PostForm = PostForm(initial={'group': self.group.pk})
+        rendered = str(form['group'])
+        self.assertIn('value="Python"', rendered)
+        self.assertIn(f'value="{self.group.pk}"', rendered)
+        self.assertNotIn(self.other_group.title, rendered)
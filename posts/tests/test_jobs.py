@@ -0,0 +1,153 @@
+import datetime
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import jobs
+from posts.models import Job
+from posts.tasks import enqueue, get_progress
+
+User = get_user_model()
+
+ran = []
+
+
+def record_job(job_id: str, value: int) -> None:
+    ran.append(value)
+
+
+def failing_job(job_id: str) -> None:
+    raise ValueError('broken')
+
+
+@override_settings(BACKGROUND_TASKS_BACKEND='database')
+class JobQueueTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        ran.clear()
+
+    def test_enqueue_saves_job(self) -> None:
+        """Test jobs are saved in the transaction and run by workers."""
+        job_id = enqueue(record_job, 1)
+        job = Job.objects.get()
+        self.assertEqual(job.id, job_id)
+        self.assertEqual(job.func, 'posts.tests.test_jobs.record_job')
+        self.assertEqual(job.args, [1])
+
+        self.assertEqual(jobs.claim(), [job])
+        # Leased jobs are not claimed twice.
+        self.assertEqual(jobs.claim(), [])
+        self.assertTrue(jobs.run_job(Job.objects.get()))
+        self.assertEqual(ran, [1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_scheduled_jobs(self) -> None:
+        """Test jobs are not run before run_at."""
+        run_at = timezone.now() + datetime.timedelta(hours=1)
+        enqueue(record_job, 1, run_at=run_at)
+        self.assertEqual(jobs.claim(), [])
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(len(jobs.claim()), 1)
+
+        with override_settings(BACKGROUND_TASKS_BACKEND='threads'):
+            with self.assertRaises(ValueError):
+                enqueue(record_job, 1, run_at=run_at)
+
+    def test_failed_jobs_are_retried(self) -> None:
+        """Test failed jobs run again later until attempts run out."""
+        job_id = enqueue(failing_job, max_attempts=2)
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertFalse(jobs.run_job(jobs.claim()[0]))
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(job.last_error, "ValueError('broken')")
+        self.assertEqual(get_progress(job_id)['status'], 'queued')
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            jobs.run_job(jobs.claim()[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(get_progress(job_id)['status'], 'failed')
+
+    def test_admin_reads_status_of_saved_job(self) -> None:
+        """Test job status comes from the row, not the cache."""
+        job_id = enqueue(failing_job, max_attempts=1)
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            jobs.run_job(jobs.claim()[0])
+        # Progress reported by a worker with a cache of its own.
+        cache.clear()
+        admin = User.objects.create_superuser(username='Admin')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_job', kwargs={'job_id': job_id})
+        )
+        self.assertEqual(response.json(), {
+            'status': Job.FAILED,
+            'attempts': 1,
+            'max_attempts': 1,
+            'last_error': "ValueError('broken')",
+            'done': 0,
+            'total': None,
+        })
+        response = self.client.get(
+            reverse('admin:posts_post_job', kwargs={'job_id': 'unknown'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_jobs_of_dead_workers_are_taken_back(self) -> None:
+        """Test jobs with expired lease are claimed again."""
+        enqueue(record_job, 1, max_attempts=2)
+        jobs.claim()
+        expired = timezone.now() - datetime.timedelta(seconds=1)
+        Job.objects.update(locked_until=expired)
+        job = jobs.claim()[0]
+        self.assertEqual(job.attempts, 2)
+
+        Job.objects.update(locked_until=expired)
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertEqual(jobs.claim(), [])
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_stats(self) -> None:
+        """Test queue metrics count jobs by status and latency."""
+        enqueue(record_job, 1)
+        enqueue(record_job, 2)
+        jobs.run_job(jobs.claim()[0])
+        stats = jobs.queue_stats()
+        self.assertEqual(stats['queued'], 1)
+        self.assertEqual(stats['done'], 1)
+        self.assertEqual(stats['due'], 1)
+        self.assertEqual(stats['done_last_hour'], 1)
+        self.assertGreaterEqual(stats['average_run_seconds'], 0)
+
+
+@override_settings(BACKGROUND_TASKS_BACKEND='database')
+class RunWorkerTests(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        ran.clear()
+
+    def test_runworker_burst(self) -> None:
+        """Test runworker runs due jobs in threads and reports metrics."""
+        for value in range(3):
+            enqueue(record_job, value)
+        stdout = StringIO()
+        call_command('runworker', '--burst', '--concurrency=1', stdout=stdout)
+        self.assertEqual(sorted(ran), [0, 1, 2])
+        self.assertEqual(json.loads(stdout.getvalue())['done'], 3)
+
+        stdout = StringIO()
+        call_command('runworker', '--stats', stdout=stdout)
+        self.assertEqual(json.loads(stdout.getvalue())['done'], 3)
+        call_command('runworker', '--purge-days=0', stdout=StringIO())
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,130 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import outbox
+from posts.models import Follow, OutboxEvent, Post
+
+User = get_user_model()
+
+TOPIC = 'test.event'
+
+
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='User')
+        cls.author = User.objects.create_user(username='Author')
+
+    def setUp(self) -> None:
+        cache.clear()
+        OutboxEvent.objects.all().delete()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.received = []
+        outbox.register(TOPIC, self.received.append)
+        self.addCleanup(outbox._handlers.pop, TOPIC)
+
+    def test_changes_emit_events(self) -> None:
+        """Test views save events of their changes."""
+        self.authorized_client.post(reverse('new_post'), {'text': 'text'})
+        post = Post.objects.get()
+        post_url_kwargs = {'username': self.user.username, 'post_id': post.pk}
+        self.authorized_client.post(
+            reverse('add_comment', kwargs=post_url_kwargs), {'text': 'c'}
+        )
+        self.authorized_client.post(
+            reverse('post_edit', kwargs=post_url_kwargs), {'text': 'edited'}
+        )
+        follow_url_kwargs = {'username': self.author.username}
+        self.authorized_client.get(
+            reverse('profile_follow', kwargs=follow_url_kwargs)
+        )
+        self.authorized_client.get(
+            reverse('profile_unfollow', kwargs=follow_url_kwargs)
+        )
+        self.authorized_client.get(
+            reverse('post_delete', kwargs=post_url_kwargs)
+        )
+
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('topic', flat=True)),
+            [
+                outbox.POST_CREATED,
+                outbox.COMMENT_CREATED,
+                outbox.POST_UPDATED,
+                outbox.FOLLOW_CREATED,
+                outbox.FOLLOW_DELETED,
+                outbox.POSTS_DELETED,
+            ]
+        )
+        self.assertEqual(
+            OutboxEvent.objects.last().payload, {'ids': [post.pk]}
+        )
+
+    def test_drain_delivers_and_deletes(self) -> None:
+        """Test events are delivered in order in batches."""
+        for number in range(3):
+            outbox.emit(TOPIC, number=number)
+        self.assertEqual(outbox.drain(batch_size=2), 2)
+        self.assertEqual(outbox.drain(batch_size=2), 1)
+        self.assertEqual(outbox.drain(batch_size=2), 0)
+        self.assertEqual(
+            self.received, [{'number': 0}, {'number': 1}, {'number': 2}]
+        )
+        self.assertFalse(OutboxEvent.objects.filter(topic=TOPIC).exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_events_are_retried(self) -> None:
+        """Test failed handlers roll back and get the event again later."""
+        def fail(payload) -> None:
+            Follow.objects.create(user=self.user, author=self.author)
+            raise ValueError(payload['number'])
+
+        outbox.register(TOPIC, fail)
+        event = outbox.emit(TOPIC, number=1)
+        with self.assertLogs('posts.outbox', 'WARNING'):
+            self.assertEqual(outbox.drain(), 0)
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'ValueError(1)')
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertFalse(Follow.objects.exists())
+        # Not due yet.
+        self.assertEqual(outbox.drain(), 0)
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        with self.assertLogs('posts.outbox', 'ERROR'):
+            outbox.drain()
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(len(self.received), 2)
+
+    def test_failed_before_commit_keeps_batch(self) -> None:
+        """Test events stay queued if buffered results are not saved."""
+        def flush() -> None:
+            raise ValueError
+
+        outbox.emit(TOPIC, number=1)
+        with mock.patch.object(outbox, '_before_commit', []):
+            outbox.before_commit(flush)
+            with self.assertRaises(ValueError):
+                outbox.drain()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertEqual(outbox.drain(), 1)
+        self.assertEqual(self.received, [{'number': 1}] * 2)
+
+    def test_drain_outbox_command(self) -> None:
+        """Test command delivers due events and exits with --once."""
+        outbox.emit(TOPIC, number=1)
+        stdout = StringIO()
+        call_command('drain_outbox', '--once', stdout=stdout)
+        self.assertEqual(self.received, [{'number': 1}])
+        self.assertIn('Delivered 1 events.', stdout.getvalue())
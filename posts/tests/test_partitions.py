@@ -0,0 +1,130 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from posts import partitions
+from posts.models import Comment, Post
+from posts.paginators import estimate_count
+
+User = get_user_model()
+
+
+class PartitionHelpersTests(SimpleTestCase):
+    def test_add_months(self) -> None:
+        """Test months are added across years."""
+        self.assertEqual(
+            partitions.add_months(datetime.date(2024, 11, 1), 3),
+            datetime.date(2025, 2, 1)
+        )
+        self.assertEqual(
+            partitions.add_months(datetime.date(2024, 1, 1), -1),
+            datetime.date(2023, 12, 1)
+        )
+
+    def test_months_between(self) -> None:
+        """Test months between dates include both ends."""
+        self.assertEqual(
+            list(partitions.months_between(
+                datetime.date(2024, 11, 15), datetime.date(2025, 1, 1)
+            )),
+            [
+                datetime.date(2024, 11, 1),
+                datetime.date(2024, 12, 1),
+                datetime.date(2025, 1, 1),
+            ]
+        )
+
+    def test_partition_names(self) -> None:
+        """Test month is read back from partition name."""
+        name = partitions.partition_name(
+            'posts_post', datetime.date(2024, 3, 1)
+        )
+        self.assertEqual(name, 'posts_post_p2024_03')
+        self.assertEqual(
+            partitions.partition_month('posts_post', name),
+            datetime.date(2024, 3, 1)
+        )
+        self.assertIsNone(
+            partitions.partition_month('posts_post', 'posts_post_old')
+        )
+
+
+class PartitionCommandTests(TestCase):
+    def test_other_databases_are_refused(self) -> None:
+        """Test command fails without PostgreSQL."""
+        if connection.vendor == 'postgresql':
+            self.skipTest('Database is PostgreSQL.')
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            call_command('partition_tables')
+
+    def test_convert(self) -> None:
+        """Test tables are partitioned with their rows and ids going on."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('Partitioning needs PostgreSQL.')
+        user = User.objects.create_user(username='User')
+        old = Post.objects.create(text='old', author=user)
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=400)
+        )
+        post = Post.objects.create(text='new', author=user)
+        Comment.objects.create(post=post, author=user, text='comment')
+
+        out = StringIO()
+        call_command(
+            'partition_tables', '--convert', '--months-ahead=1', stdout=out
+        )
+        self.assertIn('posts_post: partitioned', out.getvalue())
+        with connection.cursor() as cursor:
+            for table in partitions.TABLES:
+                self.assertTrue(partitions.is_partitioned(cursor, table))
+                self.assertIn(
+                    partitions.default_partition_name(table),
+                    partitions.partitions(cursor, table)
+                )
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['new', 'old']
+        )
+        self.assertEqual(post.comments.count(), 1)
+
+        later = Post.objects.create(text='later', author=user)
+        self.assertGreater(later.pk, post.pk)
+        # Months without a partition go to the default one.
+        Post.objects.filter(pk=later.pk).update(pub_date=datetime.datetime(
+            2000, 1, 1, tzinfo=datetime.timezone.utc
+        ))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT text FROM posts_post_default')
+            self.assertEqual(cursor.fetchall(), [('later',)])
+            cursor.execute('ANALYZE posts_post')
+        self.assertEqual(estimate_count(Post.all_objects.all()), 3)
+
+        # A new partition takes its month's rows over from the default one.
+        month = partitions.add_months(
+            partitions.month_start(datetime.date.today()), 3
+        )
+        Post.objects.filter(pk=later.pk).update(pub_date=datetime.datetime(
+            month.year, month.month, 2, tzinfo=datetime.timezone.utc
+        ))
+        with self.assertLogs('posts.partitions', 'WARNING') as logs:
+            created = partitions.create_future_partitions(3)
+        self.assertEqual(created, {'posts_post': 2, 'posts_comment': 2})
+        self.assertIn('Moved 1 rows', logs.output[0])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT text FROM posts_post_default')
+            self.assertEqual(cursor.fetchall(), [])
+            cursor.execute(
+                'SELECT text FROM '
+                + partitions.partition_name('posts_post', month)
+            )
+            self.assertEqual(cursor.fetchall(), [('later',)])
+            self.assertIn(
+                'posts_post_default',
+                partitions.partitions(cursor, 'posts_post')
+            )
+        self.assertEqual(Post.objects.get(pk=later.pk).text, 'later')
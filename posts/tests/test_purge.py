@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Comment, Post
+from posts.moderation import purge_posts
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    BACKGROUND_TASKS_EAGER=True,
+    MODERATION_BATCH_SIZE=2,
+    IMAGE_REUSE_GRACE=0
+)
+class PurgeTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9'
+            b'\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00'
+            b'\x00\x02\x02\x4c\x01\x00\x3b'
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_post(self) -> Post:
+        post: Post = Post.objects.create(
+            text='post with image',
+            author=self.user,
+            image=SimpleUploadedFile(
+                'small.gif', self.small_gif, content_type='image/gif'
+            )
+        )
+        for number in range(3):
+            Comment.objects.create(
+                post=post, author=self.user, text=f'comment {number}'
+            )
+        return post
+
+    def test_post_delete_purges_post(self) -> None:
+        """Test deleted post is hidden and purged with its media."""
+        post = self.create_post()
+        thumbnail = get_thumbnail(post.image, '960x339', crop='center')
+        image_path = post.image.path
+        thumbnail_path = default_storage.path(thumbnail.name)
+        self.assertTrue(os.path.exists(thumbnail_path))
+
+        url = reverse(
+            'post_delete',
+            kwargs={'username': self.user.username, 'post_id': post.pk}
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.authorized_client.get(url)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=post.pk).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(Post.all_objects.filter(pk=post.pk).exists())
+        self.assertFalse(Comment.objects.filter(post_id=post.pk).exists())
+        self.assertFalse(os.path.exists(image_path))
+        self.assertFalse(os.path.exists(thumbnail_path))
+
+    def test_identical_images_are_stored_once(self) -> None:
+        """Test shared image is deleted with the last post using it."""
+        first, second = self.create_post(), self.create_post()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w\w/\w\w/\w{64}\.gif$')
+        first_thumbnail = get_thumbnail(first.image, '960x339', crop='center')
+        second_thumbnail = get_thumbnail(
+            second.image, '960x339', crop='center'
+        )
+        self.assertEqual(first_thumbnail.name, second_thumbnail.name)
+
+        for post in (first, second):
+            Post.objects.filter(pk=post.pk).update(
+                deleted_at=timezone.now() - timedelta(days=1)
+            )
+            call_command('purge_deleted_posts', stdout=StringIO())
+            self.assertEqual(
+                os.path.exists(first.image.path), post is first
+            )
+
+    def test_purge_invalidates_caches_once_per_batch(self) -> None:
+        """Test deleted rows do not drop caches one by one."""
+        ids = [
+            Post.objects.create(text=f'post {number}', author=self.user).pk
+            for number in range(2)
+        ]
+        Post.objects.filter(pk__in=ids).update(deleted_at=timezone.now())
+        with mock.patch(
+            'posts.signals.invalidate_group_post_counts'
+        ) as per_row, mock.patch(
+            'posts.moderation.invalidate_group_post_counts'
+        ) as per_batch:
+            purge_posts('job', ids)
+        self.assertFalse(Post.all_objects.filter(pk__in=ids).exists())
+        per_row.assert_not_called()
+        self.assertEqual(per_batch.call_count, 1)
+
+    def test_purge_deleted_posts_command(self) -> None:
+        """Test command purges posts soft deleted long ago."""
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(
+            deleted_at=timezone.now() - timedelta(days=1)
+        )
+        call_command('purge_deleted_posts', stdout=StringIO())
+        self.assertFalse(Post.all_objects.filter(pk=post.pk).exists())
+
+    def test_sweep_orphaned_media(self) -> None:
+        """Test sweep deletes only files no post refers to."""
+        post = self.create_post()
+        orphan = default_storage.save('posts/orphan.gif', ContentFile(b'gif'))
+
+        call_command(
+            'sweep_orphaned_media', '--min-age=0', '--dry-run',
+            stdout=StringIO()
+        )
+        self.assertTrue(default_storage.exists(orphan))
+
+        call_command('sweep_orphaned_media', '--min-age=0', stdout=StringIO())
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(post.image.name))
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts import realtime, views
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class RecordingBroker(realtime.LocalBroker):
+    events = []
+
+    def publish(self, event) -> None:
+        self.events.append(event)
+
+
+class BrokerTests(SimpleTestCase):
+    def tearDown(self) -> None:
+        realtime.get_broker.cache_clear()
+
+    async def test_publish_from_thread(self) -> None:
+        """Test events published in other threads reach subscribers."""
+        broker = realtime.LocalBroker()
+        subscription = broker.subscribe()
+        event = {'type': realtime.POST, 'id': 1}
+        thread = threading.Thread(target=broker.publish, args=[event])
+        thread.start()
+        thread.join()
+        self.assertEqual(await subscription.get(1), event)
+
+        subscription.close()
+        broker.publish(event)
+        with self.assertRaises(asyncio.TimeoutError):
+            await subscription.get(0.01)
+
+    @override_settings(REALTIME_HEARTBEAT=0.01)
+    async def test_event_stream(self) -> None:
+        """Test events are streamed until client disconnects."""
+        broker = realtime.get_broker()
+        sent = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message.get('body') == b': ping\n\n':
+                broker.publish({'type': realtime.POST, 'id': 7})
+            elif b'event: post' in message.get('body', b''):
+                disconnected.set()
+
+        await realtime.events_application(
+            {'type': 'http', 'method': 'GET'}, receive, send
+        )
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            sent[0]['headers']
+        )
+        self.assertEqual(
+            sent[-1]['body'], b'event: post\ndata: {"type":"post","id":7}\n\n'
+        )
+        self.assertFalse(broker.subscriptions)
+
+
+@override_settings(REALTIME_BROKER='posts.tests.test_realtime.RecordingBroker')
+class RealtimeTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='description'
+        )
+        cls.old_post = Post.objects.create(text='old', author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        realtime.get_broker.cache_clear()
+        RecordingBroker.events = []
+        self.addCleanup(realtime.get_broker.cache_clear)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_published_after_commit(self) -> None:
+        """Test new posts and comments are published after commit."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = Post.objects.create(
+                text='new', author=self.author, group=self.group
+            )
+            comment = Comment.objects.create(
+                post=post, author=self.user, text='comment'
+            )
+            Post.objects.create(
+                text='hidden', author=self.user, is_hidden=True
+            )
+        self.assertEqual(RecordingBroker.events, [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(RecordingBroker.events, [
+            {
+                'type': realtime.POST,
+                'id': post.pk,
+                'author_id': self.author.pk,
+                'group_id': self.group.pk,
+            },
+            {'type': realtime.COMMENT, 'id': comment.pk, 'post_id': post.pk},
+        ])
+
+    def test_feed_updates(self) -> None:
+        """Test only cards of feed posts newer than given are returned."""
+        other = User.objects.create_user(username='Other')
+        new = Post.objects.create(text='new post', author=self.author)
+        unfollowed = Post.objects.create(text='unfollowed', author=other)
+        url = reverse('feed_updates')
+
+        response = self.client.get(
+            url, {'feed': 'index', 'after': self.old_post.pk}
+        )
+        self.assertContains(response, 'new post')
+        self.assertContains(response, 'unfollowed')
+        self.assertNotContains(response, 'old')
+        self.assertEqual(response['X-Latest-Post'], str(unfollowed.pk))
+
+        response = self.authorized_client.get(
+            url, {'feed': 'follow', 'after': self.old_post.pk}
+        )
+        self.assertContains(response, 'new post')
+        self.assertNotContains(response, 'unfollowed')
+        self.assertEqual(response['X-Latest-Post'], str(new.pk))
+
+        response = self.client.get(
+            url, {'feed': 'group', 'slug': 'group', 'after': 0}
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Latest-Post'], '0')
+
+        response = self.client.get(url, {'feed': 'follow', 'after': 0})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(url, {'feed': 'index'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_updates_over_limit(self) -> None:
+        """Test posts over the limit are returned by the next request."""
+        Post.objects.bulk_create(
+            Post(text=f'post {number}.', author=self.author)
+            for number in range(views.UPDATES_LIMIT + 1)
+        )
+        posts = list(
+            Post.objects.filter(pk__gt=self.old_post.pk).order_by('pk')
+        )
+        url = reverse('feed_updates')
+
+        response = self.client.get(
+            url, {'feed': 'index', 'after': self.old_post.pk}
+        )
+        latest = posts[views.UPDATES_LIMIT - 1]
+        self.assertEqual(response['X-Latest-Post'], str(latest.pk))
+        self.assertContains(response, latest.text)
+        self.assertNotContains(response, posts[-1].text)
+
+        response = self.client.get(url, {'feed': 'index', 'after': latest.pk})
+        self.assertEqual(response['X-Latest-Post'], str(posts[-1].pk))
+        self.assertContains(response, posts[-1].text)
+        self.assertNotContains(response, latest.text)
+
+    @override_settings(REALTIME_EVENTS_URL='/events/')
+    def test_feed_page_listens(self) -> None:
+        """Test first page of feed subscribes to events, others do not."""
+        Post.objects.bulk_create(
+            Post(text='post', author=self.author) for _ in range(10)
+        )
+        latest = Post.objects.latest('pk').pk
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'data-events-url="/events/"')
+        self.assertContains(response, f'data-latest="{latest}"')
+        response = self.client.get(reverse('index'), {'page': 2})
+        self.assertNotContains(response, 'live-feed')
+
+        with override_settings(REALTIME_EVENTS_URL=None):
+            response = self.authorized_client.get(reverse('follow_index'))
+        self.assertNotContains(response, 'live-feed')
@@ -0,0 +1,93 @@
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.usernames import local_usernames
+from social_network.replicas import ReplicaRouter, RoutingState, _state
+
+User = get_user_model()
+
+REPLICA = 'replica'
+
+
+@override_settings(
+    DATABASE_ROUTERS=[ReplicaRouter()],
+    DATABASE_REPLICAS=[REPLICA],
+    REPLICA_VIEW_MODULES=['posts.views'],
+)
+class ReplicaRoutingTests(TestCase):
+    """Replica is a second, empty SQLite database lagging behind.
+
+    It is added after TestCase set up databases, so TestCase neither
+    wraps it in transactions nor forbids queries to it.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        connections.settings[REPLICA] = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA: {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            }
+        })[REPLICA]
+        with connections[REPLICA].schema_editor() as editor:
+            for model in apps.get_models():
+                editor.create_model(model)
+        cls.user = User.objects.create_user(username='Writer')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        cache.clear()
+        local_usernames.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.profile_url = reverse(
+            'profile', kwargs={'username': self.user.username}
+        )
+
+    def test_reads_go_to_replica(self) -> None:
+        """Test feed views read from replica, other code from primary."""
+        Post.objects.create(text='text', author=self.user)
+        self.assertEqual(Post.objects.count(), 1)
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_writer_reads_own_writes(self) -> None:
+        """Test user reads from primary for a while after writing."""
+        response = self.authorized_client.post(
+            reverse('new_post'), {'text': 'fresh post'}
+        )
+        self.assertEqual(response.status_code, 302)
+
+        response = self.authorized_client.get(self.profile_url)
+        self.assertContains(response, 'fresh post')
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, 404)
+
+        cache.clear()
+        local_usernames.clear()
+        response = self.authorized_client.get(self.profile_url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_request_reads_own_writes(self) -> None:
+        """Test reads after a write of the request go to primary."""
+        router = ReplicaRouter()
+        state = RoutingState()
+        state.replica = REPLICA
+        token = _state.set(state)
+        self.addCleanup(_state.reset, token)
+        self.assertEqual(router.db_for_read(Post), REPLICA)
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
@@ -0,0 +1,96 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponseNotFound
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from social_network.staticfiles import StaticFilesMiddleware, find_static_file
+
+STATIC_ROOT = tempfile.mkdtemp()
+STATIC_SOURCE = tempfile.mkdtemp()
+STYLE = ('.card { margin: 0 auto; padding: 1rem; }\n' * 100).encode()
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATIC_URL='/static/',
+    STATICFILES_DIRS=[STATIC_SOURCE],
+    STATICFILES_STORAGE=(
+        'social_network.staticfiles.CompressedManifestStaticFilesStorage'
+    ),
+    STATIC_MAX_AGE=60
+)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_SOURCE, 'css'), exist_ok=True)
+        with open(os.path.join(STATIC_SOURCE, 'css', 'site.css'), 'wb') as f:
+            f.write(STYLE)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_name = staticfiles_storage.stored_name('css/site.css')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        shutil.rmtree(STATIC_SOURCE, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        find_static_file.cache_clear()
+        self.client = Client()
+
+    def test_collectstatic_writes_compressed_variants(self):
+        self.assertNotEqual(self.hashed_name, 'css/site.css')
+        path = os.path.join(STATIC_ROOT, self.hashed_name)
+        with open(path + '.gz', 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), STYLE)
+        self.assertTrue(os.path.exists(
+            os.path.join(STATIC_ROOT, 'css', 'site.css.gz')
+        ))
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        response = self.client.get(
+            f'/static/{self.hashed_name}', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertTrue(response['Content-Type'].startswith('text/css'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), STYLE)
+        self.assertEqual(int(response['Content-Length']), len(body))
+
+    def test_plain_file_without_accepted_encoding(self):
+        response = self.client.get(
+            '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(b''.join(response.streaming_content), STYLE)
+
+    def test_not_modified(self):
+        url = f'/static/{self.hashed_name}'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_head_has_no_body(self):
+        response = self.client.head(f'/static/{self.hashed_name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(int(response['Content-Length']), len(STYLE))
+
+    def test_missing_and_outside_files_are_not_served(self):
+        middleware = StaticFilesMiddleware(
+            lambda request: HttpResponseNotFound()
+        )
+        for path in ('/static/css/missing.css', '/static/../settings.py'):
+            with self.subTest(path=path):
+                response = middleware(RequestFactory().get(path))
+                self.assertEqual(response.status_code, 404)
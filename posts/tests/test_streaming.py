@@ -0,0 +1,110 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.streaming import chunked
+
+User = get_user_model()
+
+# Masked CSRF tokens differ from response to response.
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]*"')
+SPACES = re.compile(rb'\s+')
+
+
+def normalize(content: bytes) -> bytes:
+    """Return page without CSRF tokens and differences in whitespace."""
+    return SPACES.sub(b' ', CSRF_TOKEN.sub(b'', content))
+
+
+@override_settings(STREAM_PAGES=True, STREAM_CHUNK_SIZE=10)
+class StreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.author, group=cls.group
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(5)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Ответ {number}')
+            for number in range(25)
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post_url = reverse('post', kwargs={
+            'username': self.author.username, 'post_id': self.post.pk
+        })
+
+    def test_head_is_sent_before_comments_are_read(self):
+        response = self.client.get(self.post_url)
+        self.assertTrue(response.streaming)
+        parts = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            head = next(parts)
+        self.assertIn(b'<nav', head)
+        self.assertNotIn('Ответ'.encode(), head)
+        rest = list(parts)
+        # Three chunks of comments and the end of the page.
+        self.assertEqual(len(rest), 4)
+        self.assertIn(b'</html>', rest[-1])
+
+    def test_streamed_page_matches_rendered_one(self):
+        streamed = self.authorized_client.get(self.post_url)
+        self.assertTrue(streamed.streaming)
+        content = b''.join(streamed.streaming_content)
+        cache.clear()
+        with self.settings(STREAM_PAGES=False):
+            rendered = self.authorized_client.get(self.post_url)
+        self.assertFalse(rendered.streaming)
+        self.assertEqual(normalize(content), normalize(rendered.content))
+
+    def test_feeds_are_not_streamed(self):
+        # A page of a feed is short, it is rendered at once.
+        urls = [
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.author.username}),
+            reverse('follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertFalse(response.streaming)
+                self.assertContains(response, 'Пост 1')
+
+    async def test_asgi_requests_are_not_streamed(self):
+        # The ASGI handler reads streams in the event loop, where the
+        # comments could not be queried.
+        response = await AsyncClient().get(self.post_url)
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'Ответ 24')
+
+    def test_comment_form_is_rendered_before_stream(self):
+        response = self.authorized_client.get(self.post_url)
+        head = next(iter(response.streaming_content))
+        self.assertIn(b'csrfmiddlewaretoken', head)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_chunked(self):
+        posts = Post.objects.order_by('pk')
+        chunks = list(chunked(posts, 4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+        self.assertEqual(
+            [post.pk for chunk in chunks for post in chunk],
+            list(posts.values_list('pk', flat=True))
+        )
+        self.assertEqual(list(chunked(range(3), 2)), [[0, 1], [2]])
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, ProfileSummary
+from posts.moderation import hide_posts
+
+User = get_user_model()
+
+
+class ProfileSummaryTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.user = User.objects.create_user(username='User')
+
+    def get_summary(self, user) -> ProfileSummary:
+        return ProfileSummary.objects.get(user=user)
+
+    def test_summary_follows_posts(self) -> None:
+        """Test posts are counted on create, hide and delete."""
+        post = Post.objects.create(text='text', author=self.author)
+        summary = self.get_summary(self.author)
+        self.assertEqual(summary.posts_count, 1)
+        self.assertEqual(summary.last_post_at, post.pub_date)
+
+        post.is_hidden = True
+        post.save()
+        summary = self.get_summary(self.author)
+        self.assertEqual(summary.posts_count, 0)
+        self.assertIsNone(summary.last_post_at)
+
+        post.is_hidden = False
+        post.save()
+        post.delete()
+        self.assertEqual(self.get_summary(self.author).posts_count, 0)
+
+    def test_summary_is_recounted_only_on_counted_changes(self) -> None:
+        """Test edits of text keep summary, change of author moves post."""
+        post = Post.objects.create(text='text', author=self.author)
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'edited'
+        # Update of the post and the outbox event, no recount.
+        with self.assertNumQueries(2):
+            post.save()
+        with self.assertNumQueries(2):
+            post.save(update_fields=['text'])
+
+        post.author = self.user
+        post.save()
+        self.assertEqual(self.get_summary(self.author).posts_count, 0)
+        self.assertEqual(self.get_summary(self.user).posts_count, 1)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_bulk_moderation_recounts_summary(self) -> None:
+        """Test posts hidden in bulk are not counted."""
+        post = Post.objects.create(text='text', author=self.author)
+        hide_posts('job', [post.pk])
+        self.assertEqual(self.get_summary(self.author).posts_count, 0)
+
+    def test_summary_follows_follows(self) -> None:
+        """Test follows are counted on both sides."""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.get_summary(self.author).followers_count, 1)
+        self.assertEqual(self.get_summary(self.user).follows_count, 1)
+        follow.delete()
+        self.assertEqual(self.get_summary(self.author).followers_count, 0)
+        self.assertEqual(self.get_summary(self.user).follows_count, 0)
+
+    def test_summary_follows_names(self) -> None:
+        """Test summary gets new username and display name."""
+        self.assertEqual(
+            self.get_summary(self.author).display_name, 'Имя Фамилия'
+        )
+        self.user.username = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.get_summary(self.user).username, 'Renamed')
+
+    def test_missing_summary_is_created(self) -> None:
+        """Test profile of user without summary is still shown."""
+        Post.objects.create(text='text', author=self.user)
+        ProfileSummary.objects.filter(user=self.user).delete()
+        response = self.client.get(
+            reverse('profile', kwargs={'username': self.user.username})
+        )
+        self.assertContains(response, 'Записей: 1')
+        self.assertEqual(self.get_summary(self.user).posts_count, 1)
@@ -0,0 +1,33 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase
+
+from posts.models import Group, Post
+from social_network.preload import preload_templates
+
+User = get_user_model()
+
+
+class PreloadTemplatesTests(TestCase):
+    def test_preload_templates(self) -> None:
+        """Test preloaded templates are not read from disk again."""
+        self.assertGreater(preload_templates(), 0)
+        engine = engines['django'].engine
+        with mock.patch('builtins.open') as open_mock:
+            for name in ('index.html', 'post_item.html', 'nav.html'):
+                engine.get_template(name)
+        open_mock.assert_not_called()
+
+    def test_bench_templates(self) -> None:
+        """Test templates benchmark reports every page."""
+        user = User.objects.create_user(username='TestUser')
+        group = Group.objects.create(title='Title', slug='test-group')
+        Post.objects.create(text='text', author=user, group=group)
+        out = StringIO()
+        call_command('bench_templates', '--iterations=1', stdout=out)
+        for name in ('index.html', 'group.html', 'profile.html', 'post.html'):
+            self.assertIn(name, out.getvalue())
@@ -0,0 +1,111 @@
+import math
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts import outbox, trending
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ScoreTests(SimpleTestCase):
+    def test_log_add(self) -> None:
+        """Test logarithms are added without overflow."""
+        self.assertAlmostEqual(
+            trending.log_add(math.log(2), math.log(3)), math.log(5)
+        )
+        self.assertAlmostEqual(trending.log_add(10000, 0), 10000)
+
+    def test_weight_doubles_every_half_life(self) -> None:
+        """Test later events weigh more by decay rate."""
+        half_life = trending.DEFAULT_HALF_LIFE
+        now = trending.LANDMARK + 1000
+        self.assertAlmostEqual(
+            trending.decayed(1, now + half_life) - trending.decayed(1, now),
+            math.log(2)
+        )
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='User')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='description'
+        )
+        cls.quiet_group = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='description'
+        )
+
+    def setUp(self) -> None:
+        trending.buffer.take()
+        trending.clear(trending.POSTS)
+        trending.clear(trending.GROUPS)
+        self.addCleanup(cache.clear)
+
+    def test_commented_post_trends(self) -> None:
+        """Test posts and groups are ranked by comments and age."""
+        quiet = Post.objects.create(
+            text='quiet', author=self.user, group=self.quiet_group
+        )
+        popular = Post.objects.create(
+            text='popular', author=self.user, group=self.group
+        )
+        for _ in range(3):
+            Comment.objects.create(post=popular, author=self.user, text='c')
+        self.assertEqual(trending.trending_ids(trending.POSTS, 10), [])
+        # Scores are merged before drained events are deleted.
+        outbox.drain()
+
+        self.assertEqual(
+            trending.trending_ids(trending.POSTS, 10), [popular.pk, quiet.pk]
+        )
+        self.assertEqual(
+            trending.trending_ids(trending.GROUPS, 10),
+            [self.group.pk, self.quiet_group.pk]
+        )
+
+        response = self.client.get(reverse('trending'))
+        self.assertContains(response, 'popular')
+        self.assertContains(response, 'Комментариев: 3')
+        response = self.client.get(reverse('trending_groups'))
+        self.assertContains(response, 'Тихая группа')
+
+    def test_flushes_merge(self) -> None:
+        """Test scores of several flushes are summed."""
+        old = Post.objects.create(text='old', author=self.user)
+        new = Post.objects.create(text='new', author=self.user)
+        trending.buffer.take()
+        trending.record(old.pk, 1, trending.LANDMARK)
+        trending.flush()
+        trending.record(old.pk, 1, trending.LANDMARK)
+        trending.record(new.pk, 1.5, trending.LANDMARK)
+        trending.flush()
+        self.assertEqual(
+            trending.trending_ids(trending.POSTS, 10), [old.pk, new.pk]
+        )
+
+    @override_settings(TRENDING_FLUSH_INTERVAL=0.01)
+    def test_scores_are_flushed_after_interval(self) -> None:
+        """Test recorded scores are flushed without further events."""
+        flushed = threading.Event()
+        trending.buffer.take()
+        with mock.patch.object(trending, 'flush', side_effect=flushed.set):
+            trending.record(1, 1)
+            trending.record(2, 1)
+            self.assertTrue(flushed.wait(5))
+        self.assertEqual(set(trending.buffer.take()), {1, 2})
+
+    def test_hidden_posts_are_not_shown(self) -> None:
+        """Test trending page skips posts hidden after scoring."""
+        post = Post.objects.create(text='hidden post', author=self.user)
+        outbox.drain()
+        Post.objects.filter(pk=post.pk).update(is_hidden=True)
+        response = self.client.get(reverse('trending'))
+        self.assertNotContains(response, 'hidden post')
@@ -58,6 +58,13 @@ class StaticURLTests(TestCase):
         )
         self.assertEqual(get_response.status_code, 200)
 
+    def test_group_index_page(self) -> None:
+        """Test groups directory page GET response."""
+        get_response: HttpResponse = self.unauthorized_client.get(
+            reverse('group_index')
+        )
+        self.assertEqual(get_response.status_code, 200)
+
     def tets_new_post_get(self) -> None:
         """Test new post GET response."""
         get_response: HttpResponse = self.authorized_client.get(
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.usernames import LocalCache, local_usernames, resolve_username
+
+User = get_user_model()
+
+
+class ResolveUsernameTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='User')
+
+    def setUp(self) -> None:
+        cache.clear()
+        local_usernames.clear()
+
+    def test_username_is_resolved_once(self) -> None:
+        """Test id of username is queried once."""
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_username('User'), self.user.pk)
+            self.assertEqual(resolve_username('User'), self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertIsNone(resolve_username('Nobody'))
+            self.assertIsNone(resolve_username('Nobody'))
+
+    def test_rename_drops_old_username(self) -> None:
+        """Test renamed user is resolved by new username only."""
+        resolve_username('User')
+        self.user.username = 'Renamed'
+        self.user.save()
+        self.assertIsNone(resolve_username('User'))
+        self.assertEqual(resolve_username('Renamed'), self.user.pk)
+
+    def test_new_user_takes_cached_username(self) -> None:
+        """Test missing username is resolved after signup."""
+        self.assertIsNone(resolve_username('Newcomer'))
+        user = User.objects.create_user(username='Newcomer')
+        self.assertEqual(resolve_username('Newcomer'), user.pk)
+
+    def test_post_page_does_not_join_users(self) -> None:
+        """Test post is filtered by author id."""
+        post = Post.objects.create(text='text', author=self.user)
+        response = self.client.get(reverse(
+            'post', kwargs={'username': 'User', 'post_id': post.pk}
+        ))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse(
+            'post', kwargs={'username': 'Nobody', 'post_id': post.pk}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+
+class LocalCacheTests(SimpleTestCase):
+    def test_least_recently_used_is_evicted(self) -> None:
+        """Test cache keeps at most size entries."""
+        local = LocalCache(size=2, ttl=60)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertEqual(local.get('a'), 1)
+        self.assertIsNone(local.get('b'))
+        self.assertEqual(local.get('c'), 3)
+
+    def test_entries_expire(self) -> None:
+        """Test entries are dropped after ttl."""
+        local = LocalCache(size=2, ttl=10)
+        with mock.patch('posts.usernames.time.monotonic', return_value=0):
+            local.set('a', 1)
+        with mock.patch('posts.usernames.time.monotonic', return_value=11):
+            self.assertIsNone(local.get('a'))
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, ProfileSummary
+from posts.viewer import get_viewer
+
+User = get_user_model()
+
+
+class ViewerTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Viewer')
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='text', author=cls.author)
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_viewer_is_memoized_per_request(self) -> None:
+        """Test viewer is made once and checks every author once."""
+        request = RequestFactory().get('/')
+        request.user = self.user
+        viewer = get_viewer(request)
+        self.assertIs(get_viewer(request), viewer)
+        with self.assertNumQueries(2):
+            for _ in range(2):
+                self.assertTrue(viewer.is_following(self.author))
+                self.assertFalse(viewer.is_following(self.user))
+
+    def test_sidebar_is_cached_and_invalidated(self) -> None:
+        """Test sidebar is cached until author's posts or follows change."""
+        url = reverse('profile', kwargs={'username': self.author.username})
+        self.authorized_client.get(url)
+        # Bulk updates send no signals, the cached fragment stays.
+        ProfileSummary.objects.filter(user=self.author).update(
+            display_name='Новое имя'
+        )
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, 'Новое имя')
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Записей: 1')
+
+        Follow.objects.filter(user=self.user).delete()
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Подписчиков: 0')
+        self.assertContains(response, 'Подписаться')
+
+        Post.objects.create(text='another', author=self.author)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Записей: 2')
+
+    def test_nav_is_cached_per_user(self) -> None:
+        """Test nav fragment differs between users."""
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, self.user.username)
+        response = Client().get(reverse('index'))
+        self.assertNotContains(response, self.user.username)
+        self.assertContains(response, 'Регистрация')
@@ -4,6 +4,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from django.http.response import HttpResponse
 from django.test import TestCase, Client
 
@@ -116,12 +117,22 @@ class StaticURLTests(TestCase):
                 context
             )
 
+    def read(self, response) -> HttpResponse:
+        """Return response with content, streamed ones are read once."""
+        if not response.streaming:
+            return response
+        return HttpResponse(
+            b''.join(response.streaming_content),
+            status=response.status_code
+        )
+
     def do_get_requests(
         self, clients, url, url_kwargs=None
     ) -> List[HttpResponse]:
         """Return list of GET responses."""
         return [
-            client.get(reverse(url, kwargs=url_kwargs)) for client in clients
+            self.read(client.get(reverse(url, kwargs=url_kwargs)))
+            for client in clients
         ]
 
     def test_profile_follow_view_yourself(self) -> None:
@@ -565,6 +576,26 @@ class StaticURLTests(TestCase):
             comment_text
         )
 
+    def test_add_comment_to_invisible_post(self) -> None:
+        """Test comments to missing and deleted posts are not added."""
+        deleted_post: Post = Post.objects.create(
+            text='deleted post',
+            author=self.user,
+            deleted_at=timezone.now()
+        )
+        for post_id in [deleted_post.id, deleted_post.id + 1]:
+            response = self.authorized_client.post(
+                reverse(
+                    self.add_comment_url,
+                    kwargs={'username': self.user, 'post_id': post_id}
+                ),
+                {'text': 'lost comment'}
+            )
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(
+            Comment.objects.filter(text='lost comment').exists()
+        )
+
     def test_unauthorized_user_post_delete_view(self) -> None:
         """Test unauthorized user is not able to delete posts."""
         new_post: Post = Post.objects.create(
@@ -0,0 +1,101 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from posts import warmup
+from posts.models import Follow, Group, Post
+from posts.usernames import local_usernames
+from social_network import preload
+
+User = get_user_model()
+
+
+class ThrottleTests(SimpleTestCase):
+    def test_calls_are_spaced(self) -> None:
+        """Test waits are spaced by the rate."""
+        throttle = warmup.Throttle(50)
+        started = time.monotonic()
+        for _ in range(3):
+            throttle.wait()
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.popular = User.objects.create_user(username='Popular')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.popular)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='description'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'post {number}', author=cls.popular, group=cls.group)
+            for number in range(15)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        local_usernames.clear()
+        self.addCleanup(cache.clear)
+
+    def test_hot_feeds(self) -> None:
+        """Test groups with posts and followed users come first."""
+        Group.objects.create(title='Пустая', slug='empty', description='d')
+        self.assertEqual(warmup.hot_group_slugs(1), ['group'])
+        self.assertEqual(warmup.hot_usernames(1), ['Popular'])
+        self.assertEqual(
+            list(warmup.hot_paths(pages=2, groups=1, profiles=0)),
+            ['/', '/?page=2', '/group/group/', '/group/group/?page=2']
+        )
+
+    def test_warm_renders_pages(self) -> None:
+        """Test warmed pages need fewer queries."""
+        result = warmup.warm(pages=2, groups=1, profiles=1, rate=0)
+        self.assertEqual(result['rendered'], 6)
+        self.assertEqual(result['failed'], 0)
+
+        # Only paginator counts posts.
+        with self.assertNumQueries(1):
+            self.client.get('/')
+
+    def test_command(self) -> None:
+        """Test warm_cache command reports rendered pages."""
+        stdout = StringIO()
+        call_command(
+            'warm_cache', '--pages=1', '--profiles=1', '--rate=0',
+            stdout=stdout
+        )
+        self.assertIn('Rendered 3 pages', stdout.getvalue())
+
+
+class WarmOnStartTests(TestCase):
+    def test_connections_are_closed(self) -> None:
+        """Test warming leaves no connections to forked workers."""
+        cache.clear()
+        with mock.patch.object(preload.connections, 'close_all') as close:
+            preload.warm_caches_on_start()
+        close.assert_called_once_with()
+
+
+class WarmOnStartPoolTests(TransactionTestCase):
+    def test_pooled_connections_are_closed(self) -> None:
+        """Test warming leaves no idle connections in pools."""
+        if connection.settings_dict['ENGINE'] != 'social_network.db_pool':
+            self.skipTest('Database is not pooled.')
+        from social_network.db_pool.base import pool_stats
+
+        cache.clear()
+        preload.warm_caches_on_start()
+        stats = pool_stats()
+        self.assertTrue(stats)
+        for pool in stats.values():
+            self.assertGreater(pool['checkouts'], 0)
+            self.assertEqual(pool['idle'], 0)
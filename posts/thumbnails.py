@@ -0,0 +1,91 @@
+"""
+Thumbnails of many images resolved at once.
+
+Cards of a page resolve their thumbnails with one multi-get from the
+cache, falling back to one query of the key-value table, instead of a
+lookup per image. Thumbnails, which do not exist yet, are made one by
+one as usual.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings, settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Cached database store, which can look up many images at once."""
+
+    def get_many(
+        self, image_files: Iterable[ImageFile]
+    ) -> Dict[str, ImageFile]:
+        """Return stored image files by keys of found ones."""
+        keys = {
+            add_prefix(image_file.key): image_file.key
+            for image_file in image_files
+        }
+        if not keys:
+            return {}
+        values = self.cache.get_many(list(keys))
+        missing = [key for key in keys if key not in values]
+        if missing:
+            stored = dict(
+                KVStoreModel.objects.filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            # Misses are cached too, as single lookups do.
+            fetched = {
+                key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in missing
+            }
+            self.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(fetched)
+        return {
+            keys[key]: deserialize_image_file(value)
+            for key, value in values.items()
+            if value != cached_db_kvstore.EMPTY_VALUE
+        }
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    """Backend making thumbnails of many images in one call."""
+
+    def thumbnail_file(self, file_, geometry_string: str,
+                       **options) -> ImageFile:
+        """Return not yet resolved thumbnail, named as get_thumbnail does."""
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_thumbnails(
+        self, files: List, geometry_string: str, **options
+    ) -> List[Optional[ImageFile]]:
+        """Return thumbnails of files, None for empty ones."""
+        thumbnails = [
+            self.thumbnail_file(file_, geometry_string, **options)
+            if file_ else None
+            for file_ in files
+        ]
+        found = {}
+        if hasattr(default.kvstore, 'get_many'):
+            found = default.kvstore.get_many(
+                [thumbnail for thumbnail in thumbnails if thumbnail]
+            )
+        return [
+            None if thumbnail is None
+            else found.get(thumbnail.key)
+            or self.get_thumbnail(file_, geometry_string, **options)
+            for file_, thumbnail in zip(files, thumbnails)
+        ]
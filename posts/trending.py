@@ -0,0 +1,183 @@
+"""
+Trending posts and groups.
+
+New posts and comments add exponentially decaying weights to scores of
+posts and their groups. Decay is forward: a weight is scaled up by the
+time passed since a fixed landmark instead of scaling all scores down
+as time goes, so scores never need updating between events. They are
+kept as logarithms to stay finite.
+
+New posts and comments come from the outbox. They are summed in memory
+of the process draining it and merged into the shared cache before the
+drained batch is committed, so events are not deleted uncounted. Scores
+recorded otherwise are merged TRENDING_FLUSH_INTERVAL seconds after the
+first of them, and when the process exits. The cache keeps
+TRENDING_SIZE best scores and a ranked list of their ids, which pages
+slice. Processes merging at the same moment may lose some of each
+other's events.
+"""
+import atexit
+import heapq
+import logging
+import math
+import threading
+import time
+from operator import itemgetter
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from . import outbox
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# 2020-01-01 UTC.
+LANDMARK = 1577836800.0
+DEFAULT_HALF_LIFE = 60 * 60 * 6
+DEFAULT_FLUSH_INTERVAL = 30
+DEFAULT_SIZE = 1000
+TRENDING_TIMEOUT = 60 * 60 * 24 * 7
+
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+
+POSTS = 'posts'
+GROUPS = 'groups'
+
+
+def log_add(a: float, b: float) -> float:
+    """Return log(exp(a) + exp(b)) without overflow."""
+    high, low = (a, b) if a > b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+def decayed(weight: float, timestamp: float) -> float:
+    """Return logarithm of weight of event at timestamp."""
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE', DEFAULT_HALF_LIFE)
+    return math.log(weight) + (timestamp - LANDMARK) * math.log(2) / half_life
+
+
+def add_score(scores: Dict[int, float], key: int, score: float) -> None:
+    """Add logarithmic score to scores[key]."""
+    current = scores.get(key)
+    scores[key] = score if current is None else log_add(current, score)
+
+
+class TrendingBuffer:
+    """Scores of posts gained since the last flush."""
+
+    def __init__(self):
+        self.scores: Dict[int, float] = {}
+        self.lock = threading.Lock()
+
+    def add(self, post_id: int, weight: float,
+            timestamp: Optional[float] = None) -> bool:
+        """Add event to scores.
+
+        Return True if it is the first one since the buffer was taken.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        score = decayed(weight, timestamp)
+        with self.lock:
+            first = not self.scores
+            add_score(self.scores, post_id, score)
+            return first
+
+    def take(self) -> Dict[int, float]:
+        """Return collected scores and start collecting again."""
+        with self.lock:
+            scores, self.scores = self.scores, {}
+        return scores
+
+
+buffer = TrendingBuffer()
+
+
+def _scores_key(kind: str) -> str:
+    return f'trending:{kind}:scores'
+
+
+def _ranking_key(kind: str) -> str:
+    return f'trending:{kind}:ranking'
+
+
+def merge(kind: str, gained: Dict[int, float]) -> None:
+    """Add gained scores to shared scores of posts or groups."""
+    scores = cache.get(_scores_key(kind)) or {}
+    for key, score in gained.items():
+        add_score(scores, key, score)
+    best = heapq.nlargest(
+        getattr(settings, 'TRENDING_SIZE', DEFAULT_SIZE),
+        scores.items(),
+        key=itemgetter(1)
+    )
+    cache.set_many({
+        _scores_key(kind): dict(best),
+        _ranking_key(kind): [key for key, _ in best],
+    }, TRENDING_TIMEOUT)
+
+
+@outbox.before_commit
+def flush() -> None:
+    """Merge scores of the process into shared ones."""
+    gained = buffer.take()
+    if not gained:
+        return
+    groups: Dict[int, float] = {}
+    for post_id, group_id in Post.all_objects.filter(
+        pk__in=list(gained), group__isnull=False
+    ).values_list('pk', 'group_id'):
+        add_score(groups, group_id, gained[post_id])
+    merge(POSTS, gained)
+    merge(GROUPS, groups)
+
+
+def _flush_safely() -> None:
+    close_old_connections()
+    try:
+        flush()
+    except Exception:
+        logger.exception('Flush of trending scores failed')
+    finally:
+        close_old_connections()
+
+
+atexit.register(_flush_safely)
+
+
+def record(post_id: int, weight: float,
+           timestamp: Optional[float] = None) -> None:
+    """Add weight to post score, it is flushed within an interval."""
+    if buffer.add(post_id, weight, timestamp):
+        timer = threading.Timer(
+            getattr(
+                settings, 'TRENDING_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL
+            ),
+            _flush_safely
+        )
+        timer.daemon = True
+        timer.start()
+
+
+@outbox.handler(outbox.POST_CREATED)
+def record_post(payload: dict) -> None:
+    record(payload['id'], POST_WEIGHT, payload['timestamp'])
+
+
+@outbox.handler(outbox.COMMENT_CREATED)
+def record_comment(payload: dict) -> None:
+    record(payload['post_id'], COMMENT_WEIGHT, payload['timestamp'])
+
+
+def clear(kind: str) -> None:
+    """Drop shared scores of posts or groups."""
+    cache.delete_many([_scores_key(kind), _ranking_key(kind)])
+
+
+def trending_ids(kind: str, limit: int) -> List[int]:
+    """Return ids of best scored posts or groups, best first."""
+    return (cache.get(_ranking_key(kind)) or [])[:limit]
@@ -4,7 +4,20 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
+    path(
+        'groups/autocomplete/',
+        views.group_autocomplete,
+        name='group_autocomplete'
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path('trending/', views.trending_posts, name='trending'),
+    path(
+        'trending/groups/',
+        views.trending_groups,
+        name='trending_groups'
+    ),
+    path('updates/', views.feed_updates, name='feed_updates'),
     path('new/', views.new_post, name='new_post'),
     path('new_group/', views.new_group, name='new_group'),
     path(
@@ -0,0 +1,120 @@
+"""
+Resolution of usernames from URLs to user ids.
+
+Ids are kept in a small LRU of the process and in the shared cache.
+Saving a user drops the shared entries of their old and new username,
+other processes may resolve an old username for LOCAL_TTL seconds more.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+
+User = get_user_model()
+
+USERNAMES_CACHE_TIMEOUT = 60 * 60
+LOCAL_TTL = 30
+LOCAL_SIZE = 10000
+
+# Cached for usernames of no user.
+MISSING = 0
+
+
+class LocalCache:
+    """Thread safe LRU mapping with expiring entries."""
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._data: 'OrderedDict[str, Tuple[float, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_value(self, value: int) -> None:
+        with self._lock:
+            for key in [
+                key for key, (_, item) in self._data.items() if item == value
+            ]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+local_usernames = LocalCache(LOCAL_SIZE, LOCAL_TTL)
+
+
+def _id_key(username: str) -> str:
+    return f'usernames:name:{username}'
+
+
+def _username_key(user_id: int) -> str:
+    return f'usernames:id:{user_id}'
+
+
+def resolve_username(username: str) -> Optional[int]:
+    """Return id of user with username or None."""
+    user_id = local_usernames.get(username)
+    if user_id is None:
+        user_id = cache.get(_id_key(username))
+        if user_id is None:
+            user_id = User.objects.filter(username=username).values_list(
+                'pk', flat=True
+            ).first() or MISSING
+            cache.set(_id_key(username), user_id, USERNAMES_CACHE_TIMEOUT)
+            if user_id != MISSING:
+                cache.set(
+                    _username_key(user_id), username, USERNAMES_CACHE_TIMEOUT
+                )
+        local_usernames.set(username, user_id)
+    return user_id or None
+
+
+def get_user_id_or_404(username: str) -> int:
+    """Return id of user with username or raise Http404."""
+    user_id = resolve_username(username)
+    if user_id is None:
+        raise Http404('No user matches the given query.')
+    return user_id
+
+
+def invalidate_username(user) -> None:
+    """Drop cached ids of the current and previous username of user."""
+    usernames = {user.username}
+    previous = cache.get(_username_key(user.pk))
+    if previous is not None:
+        usernames.add(previous)
+    for username in usernames:
+        local_usernames.delete(username)
+    local_usernames.delete_value(user.pk)
+    cache.delete_many(
+        [_id_key(username) for username in usernames]
+        + [_username_key(user.pk)]
+    )
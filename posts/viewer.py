@@ -0,0 +1,85 @@
+"""
+What page chrome needs to know about the current user and shown author.
+
+Viewer is created once per request and loads its data on first use. Nav
+and profile sidebar fragments are cached per user: the nav varies on the
+username, the sidebar on a version of the author's profile, which is
+changed whenever posts, follows or the author change.
+"""
+import time
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.http.request import HttpRequest
+from django.utils.functional import cached_property
+
+from .models import Follow, ProfileSummary
+
+PROFILE_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+class Viewer:
+    """User of request and data about them, memoized for the request."""
+
+    def __init__(self, request: HttpRequest):
+        self.request = request
+        # Whether user follows an author by author id.
+        self._following: Dict[int, bool] = {}
+
+    @cached_property
+    def user(self):
+        return self.request.user
+
+    @cached_property
+    def user_id(self) -> Optional[int]:
+        return self.user.pk if self.user.is_authenticated else None
+
+    @cached_property
+    def year(self) -> int:
+        return date.today().year
+
+    def is_following(self, author) -> bool:
+        """Return True if user follows author, checked once per author."""
+        if self.user_id is None:
+            return False
+        following = self._following.get(author.pk)
+        if following is None:
+            following = self._following[author.pk] = Follow.objects.filter(
+                user_id=self.user_id, author_id=author.pk
+            ).exists()
+        return following
+
+
+def get_viewer(request: HttpRequest) -> Viewer:
+    """Return viewer of request, created once per request."""
+    viewer: Optional[Viewer] = getattr(request, '_viewer', None)
+    if viewer is None:
+        viewer = request._viewer = Viewer(request)
+    return viewer
+
+
+def _version_key(user_id: int) -> str:
+    return f'profile_version:{user_id}'
+
+
+def profile_version(author) -> int:
+    """Return version of author's cached profile fragments."""
+    return cache.get_or_set(
+        _version_key(author.pk), time.time_ns, PROFILE_VERSION_TIMEOUT
+    )
+
+
+def invalidate_profiles(user_ids: Iterable[int]) -> None:
+    """Drop cached profile fragments of users."""
+    cache.delete_many([_version_key(user_id) for user_id in set(user_ids)])
+
+
+def profile_context(request: HttpRequest, summary: ProfileSummary) -> Dict:
+    """Return context of profile sidebar."""
+    return {
+        'author': summary.user,
+        'summary': summary,
+        'following': get_viewer(request).is_following(summary.user),
+        'profile_version': profile_version(summary.user),
+    }
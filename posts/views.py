@@ -2,28 +2,33 @@ from typing import Tuple
 
 from django.core.paginator import Page, Paginator
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 
 from django.forms.fields import SlugField
+from django.template.context import Context
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.http.request import HttpRequest
 from django.http.response import HttpResponse
 
-from .models import Post, Group, Follow
+from .cards import SEPARATOR, render_post_cards
+from .models import Post, Follow
 from .forms import PostForm, GroupForm, CommentForm
-
-User = get_user_model()
-
-
-def is_following(request, author) -> bool:
-    """Return True if request.user is following author."""
-    if not request.user.is_anonymous:
-        return(
-            Follow.objects.filter(
-                user=request.user, author=author
-            ).exists()
-        )
-    return False
+from .moderation import purge_posts, soft_delete_posts
+from .summaries import get_profile_summary, get_summary_by_username
+from .streaming import stream_template, template_parts
+from .tasks import enqueue
+from .trending import GROUPS, POSTS, trending_ids
+from .usernames import get_user_id_or_404
+from .viewer import profile_context
+from .groups import (
+    all_groups, get_group_by_id, get_group_by_slug, group_post_counts,
+    search_groups
+)
+
+AUTOCOMPLETE_LIMIT = 10
+TRENDING_LIMIT = 20
+UPDATES_LIMIT = 20
 
 
 def get_paginator(
@@ -60,11 +65,11 @@ def server_error(request: HttpRequest) -> HttpResponse:
 @login_required
 def profile_follow(request: HttpRequest, username: str) -> HttpResponse:
     """Follow author."""
-    author = User.objects.get(username=username)
-    if request.user != author:
+    author_id = get_user_id_or_404(username)
+    if request.user.pk != author_id:
         Follow.objects.get_or_create(
             user=request.user,
-            author=author
+            author_id=author_id
         )
 
     return redirect('profile', username=username)
@@ -73,9 +78,8 @@ def profile_follow(request: HttpRequest, username: str) -> HttpResponse:
 @login_required
 def profile_unfollow(request: HttpRequest, username: str) -> HttpResponse:
     """Unfollow author."""
-    author = User.objects.get(username=username)
     Follow.objects.filter(
-        user=request.user, author=author
+        user=request.user, author_id=get_user_id_or_404(username)
     ).delete()
 
     return redirect('profile', username=username)
@@ -110,8 +114,12 @@ def index(request: HttpRequest) -> HttpResponse:
 
 def group_posts(request: HttpRequest, slug: SlugField) -> HttpResponse:
     """Return group page."""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+    group = get_group_by_slug(slug)
+    if group is None:
+        raise Http404('No group matches the given query.')
+    posts = Post.objects.filter(group=group).select_related(
+        'author', 'group'
+    )
     paginator, page = get_paginator(posts, request.GET.get('page'))
 
     return render(
@@ -121,6 +129,99 @@ def group_posts(request: HttpRequest, slug: SlugField) -> HttpResponse:
     )
 
 
+def group_index(request: HttpRequest) -> HttpResponse:
+    """Return groups directory."""
+    paginator, page = get_paginator(all_groups(), request.GET.get('page'))
+    counts = group_post_counts()
+    for group in page:
+        group.posts_count = counts.get(group.pk, 0)
+
+    return render(
+        request,
+        'groups.html',
+        {'page': page, 'paginator': paginator}
+    )
+
+
+def group_autocomplete(request: HttpRequest) -> JsonResponse:
+    """Return groups matching query prefix as JSON."""
+    try:
+        limit = int(request.GET.get('limit', AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    limit = max(1, min(limit, AUTOCOMPLETE_LIMIT))
+    groups = search_groups(request.GET.get('q', ''), limit)
+
+    return JsonResponse({
+        'results': [
+            {'id': group.pk, 'title': group.title, 'slug': group.slug}
+            for group in groups
+        ]
+    })
+
+
+def trending_posts(request: HttpRequest) -> HttpResponse:
+    """Return trending posts."""
+    ids = trending_ids(POSTS, TRENDING_LIMIT)
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+
+    return render(
+        request,
+        'trending.html',
+        {'posts': [posts[pk] for pk in ids if pk in posts]}
+    )
+
+
+def trending_groups(request: HttpRequest) -> HttpResponse:
+    """Return trending groups."""
+    groups = [
+        get_group_by_id(pk) for pk in trending_ids(GROUPS, TRENDING_LIMIT)
+    ]
+    groups = [group for group in groups if group is not None]
+    counts = group_post_counts()
+    for group in groups:
+        group.posts_count = counts.get(group.pk, 0)
+
+    return render(request, 'trending_groups.html', {'groups': groups})
+
+
+def feed_updates(request: HttpRequest) -> HttpResponse:
+    """Return cards of feed posts newer than the given one."""
+    try:
+        after = int(request.GET.get('after', ''))
+    except ValueError:
+        raise Http404('Latest post is not given.')
+    feed = request.GET.get('feed')
+    posts = Post.objects.filter(pk__gt=after)
+    if feed == 'follow':
+        if not request.user.is_authenticated:
+            return HttpResponseForbidden()
+        posts = posts.filter(author__following__user=request.user)
+    elif feed == 'group':
+        group = get_group_by_slug(request.GET.get('slug', ''))
+        if group is None:
+            raise Http404('No group matches the given query.')
+        posts = posts.filter(group=group)
+    elif feed != 'index':
+        raise Http404('No feed matches the given query.')
+    # The oldest new posts go first, the rest come with the next request.
+    posts = list(
+        posts.select_related('author', 'group').order_by('pk')[:UPDATES_LIMIT]
+    )
+    posts.reverse()
+
+    # Cards of group page go without comment links and separators.
+    full = feed != 'group'
+    cards = render_post_cards(
+        posts, Context({'user': request.user}), full, full
+    )
+    response = HttpResponse(cards + SEPARATOR if posts and full else cards)
+    response['X-Latest-Post'] = max(
+        [after] + [post.pk for post in posts]
+    )
+    return response
+
+
 @login_required
 def new_post(request: HttpRequest) -> HttpResponse:
     """Add new post."""
@@ -129,7 +230,9 @@ def new_post(request: HttpRequest) -> HttpResponse:
         if form.is_valid():
             post: Post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            # Outbox events are saved in the same transaction.
+            with transaction.atomic():
+                post.save()
             return redirect('index')
 
     return render(request, 'post_new.html', {'form': form})
@@ -145,12 +248,18 @@ def add_comment(
         if form.is_valid():
             comment = form.save(commit=False)
             comment.author = request.user
-            comment.post_id = post_id
-            comment.save()
+            # Comments have no foreign key constraint in database.
+            comment.post = get_object_or_404(Post.objects, pk=post_id)
+            with transaction.atomic():
+                comment.save()
             return redirect('post', username=username, post_id=post_id)
 
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    author = post.author
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile_summary'),
+        id=post_id,
+        author_id=get_user_id_or_404(username)
+    )
+    summary = get_profile_summary(post.author)
     comments = post.comments.select_related('author')
 
     return render(
@@ -159,10 +268,8 @@ def add_comment(
         {
             'form': form,
             'post': post,
-            'author': author,
             'comments': comments,
-            'posts_count': author.posts.count(),
-            'following': is_following(request, author)
+            **profile_context(request, summary)
         }
     )
 
@@ -181,19 +288,19 @@ def new_group(request: HttpRequest) -> HttpResponse:
 
 def profile(request: HttpRequest, username: str) -> HttpResponse:
     """Return user profile page."""
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('author', 'group')
+    summary = get_summary_by_username(username)
+    if summary is None:
+        raise Http404('No user matches the given query.')
+    posts = summary.user.posts.select_related('author', 'group')
     paginator, page = get_paginator(posts, request.GET.get('page'))
 
     return render(
         request,
         'profile.html',
         {
-            'author': author,
             'paginator': paginator,
             'page': page,
-            'posts_count': posts.count(),
-            'following': is_following(request, author)
+            **profile_context(request, summary)
         }
     )
 
@@ -202,21 +309,24 @@ def post_view(
     request: HttpRequest, username: str, post_id: int
 ) -> HttpResponse:
     """Return post page."""
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    author = post.author
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile_summary'),
+        id=post_id,
+        author_id=get_user_id_or_404(username)
+    )
+    summary = get_profile_summary(post.author)
     comments = post.comments.select_related('author')
 
-    return render(
+    return stream_template(
         request,
         'post.html',
         {
             'post': post,
-            'author': author,
             'comments': comments,
             'form': CommentForm(request.POST or None),
-            'posts_count': author.posts.count(),
-            'following': is_following(request, author)
-        }
+            **profile_context(request, summary)
+        },
+        template_parts('comment_list.html', 'comments', comments)
     )
 
 
@@ -225,8 +335,10 @@ def post_edit(
     request: HttpRequest, username: str, post_id: int
 ) -> HttpResponse:
     """Return post edit page."""
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    if post.author != request.user:
+    post = get_object_or_404(
+        Post, id=post_id, author_id=get_user_id_or_404(username)
+    )
+    if post.author_id != request.user.pk:
         return redirect('post', username, post_id)
 
     form = PostForm(
@@ -236,7 +348,8 @@ def post_edit(
     )
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
             return redirect('post', username, post_id)
 
     return render(
@@ -267,9 +380,12 @@ def post_delete(
     request: HttpRequest, username: str, post_id: int
 ) -> HttpResponse:
     """Delete post."""
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    if post.author != request.user:
+    post = get_object_or_404(
+        Post, id=post_id, author_id=get_user_id_or_404(username)
+    )
+    if post.author_id != request.user.pk:
         return redirect('post', username, post_id)
-    post.delete()
+    soft_delete_posts([post.pk])
+    enqueue(purge_posts, [post.pk])
 
     return render(request, 'post_delete_success.html')
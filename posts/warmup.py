@@ -0,0 +1,139 @@
+"""
+Warming of caches after a deploy or a cache flush.
+
+Pages of the hottest feeds are rendered as for an anonymous user, which
+fills cached groups, usernames, profile summaries, template fragments
+and thumbnails of their posts. Renders are spaced to at most rate per
+second, so warming does not swamp the database.
+"""
+import logging
+import time
+from typing import Dict, Iterator, List
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .groups import all_groups, group_post_counts
+from .models import ProfileSummary
+from .trending import GROUPS, trending_ids
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES = 3
+DEFAULT_GROUPS = 10
+DEFAULT_PROFILES = 10
+DEFAULT_RATE = 10
+
+
+class Throttle:
+    """Spaces calls of wait() to at most rate per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_at = time.monotonic()
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def render_path(path: str) -> int:
+    """Render page at path for an anonymous user, return status code."""
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return 404
+    if hasattr(response, 'render'):
+        response.render()
+    if response.streaming:
+        # Streamed parts of the page fill caches too.
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def hot_group_slugs(limit: int) -> List[str]:
+    """Return slugs of trending groups, then of groups with most posts."""
+    groups = {group.pk: group for group in all_groups()}
+    counts = group_post_counts()
+    ids = trending_ids(GROUPS, limit) + sorted(
+        counts, key=counts.get, reverse=True
+    )
+    slugs = []
+    for group_id in dict.fromkeys(ids):
+        if group_id in groups:
+            slugs.append(groups[group_id].slug)
+        if len(slugs) == limit:
+            break
+    return slugs
+
+
+def hot_usernames(limit: int) -> List[str]:
+    """Return usernames of the most followed users."""
+    return list(
+        ProfileSummary.objects.order_by('-followers_count', 'pk')
+        .values_list('username', flat=True)[:limit]
+    )
+
+
+def hot_paths(pages: int, groups: int, profiles: int) -> Iterator[str]:
+    feeds = [reverse('index')]
+    feeds += [
+        reverse('group', kwargs={'slug': slug})
+        for slug in hot_group_slugs(groups)
+    ]
+    feeds += [
+        reverse('profile', kwargs={'username': username})
+        for username in hot_usernames(profiles)
+    ]
+    for feed in feeds:
+        yield feed
+        for page in range(2, pages + 1):
+            yield f'{feed}?page={page}'
+
+
+def warm(
+    pages: int = DEFAULT_PAGES,
+    groups: int = DEFAULT_GROUPS,
+    profiles: int = DEFAULT_PROFILES,
+    rate: float = DEFAULT_RATE
+) -> Dict[str, float]:
+    """Render first pages of hottest feeds, return amounts and time."""
+    started = time.monotonic()
+    throttle = Throttle(rate)
+    rendered = failed = 0
+    for path in hot_paths(pages, groups, profiles):
+        throttle.wait()
+        try:
+            status = render_path(path)
+        except Exception:
+            logger.exception('Warming of %s failed', path)
+            failed += 1
+            continue
+        if status == 200:
+            rendered += 1
+        else:
+            failed += 1
+    return {
+        'rendered': rendered,
+        'failed': failed,
+        'seconds': time.monotonic() - started,
+    }
+
+
+def warm_from_settings() -> Dict[str, float]:
+    return warm(
+        getattr(settings, 'WARM_CACHE_PAGES', DEFAULT_PAGES),
+        getattr(settings, 'WARM_CACHE_GROUPS', DEFAULT_GROUPS),
+        getattr(settings, 'WARM_CACHE_PROFILES', DEFAULT_PROFILES),
+        getattr(settings, 'WARM_CACHE_RATE', DEFAULT_RATE),
+    )
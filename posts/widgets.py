@@ -0,0 +1,33 @@
+from django import forms
+from django.urls import reverse_lazy
+
+from .groups import get_group_by_id
+
+
+class GroupAutocompleteWidget(forms.TextInput):
+    """Text input searching groups by prefix instead of a full select."""
+    template_name = 'widgets/group_autocomplete.html'
+    url = reverse_lazy('group_autocomplete')
+
+    def get_context(self, name, value, attrs):
+        group = get_group_by_id(value) if value not in ('', None) else None
+        attrs = dict(attrs or {})
+        input_id = attrs.get('id') or f'id_{name}'
+        attrs.update({
+            'id': self.id_for_label(input_id),
+            'list': f'{input_id}_choices',
+            'autocomplete': 'off',
+            'data-autocomplete-url': str(self.url),
+        })
+        context = super().get_context(
+            f'{name}_search', str(group) if group else None, attrs
+        )
+        context['widget'].update({
+            'group_name': name,
+            'group_id': group.pk if group else '',
+            'group_input_id': input_id,
+        })
+        return context
+
+    def id_for_label(self, id_):
+        return f'{id_}_search' if id_ else id_
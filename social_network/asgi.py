@@ -9,8 +9,34 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_network.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+if getattr(settings, 'PRELOAD_TEMPLATES', False):
+    from social_network.preload import preload_templates
+
+    preload_templates()
+
+if getattr(settings, 'WARM_CACHE_ON_START', False):
+    from social_network.preload import warm_caches_on_start
+
+    warm_caches_on_start()
+
+# Imported after setup of Django, since it imports models.
+from posts.realtime import events_application  # noqa: E402
+
+
+async def application(scope, receive, send) -> None:
+    """Serve event stream of new posts, pass other requests to Django."""
+    events_url = getattr(settings, 'REALTIME_EVENTS_URL', None)
+    if (
+        scope['type'] == 'http' and events_url
+        and scope['path'] == events_url
+    ):
+        await events_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
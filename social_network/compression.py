@@ -0,0 +1,224 @@
+"""
+Compression of responses with gzip or, when installed, brotli.
+
+Text responses of at least COMPRESSION_MIN_SIZE bytes are compressed by
+the best encoding the client accepts. Larger bodies get cheaper levels,
+and a level whose measured cost would exceed COMPRESSION_CPU_BUDGET
+seconds for the body is replaced by the fastest one. Streaming responses
+are compressed chunk by chunk and flushed after every chunk, so the
+client gets each part as soon as it is rendered. Media and responses,
+which are already encoded, are passed through.
+"""
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.http.request import HttpRequest
+from django.http.response import HttpResponseBase
+from django.utils.cache import patch_vary_headers
+
+from .staticfiles import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/xhtml+xml',
+    'application/rss+xml',
+    'application/atom+xml',
+    'image/svg+xml',
+)
+DEFAULT_MIN_SIZE = 512
+DEFAULT_CPU_BUDGET = 0.005
+
+# Levels by the largest body size they are used for.
+LEVELS = {
+    'br': ((64 * 1024, 5), (1024 * 1024, 4), (None, 1)),
+    'gzip': ((64 * 1024, 6), (1024 * 1024, 4), (None, 1)),
+}
+# Size of streaming bodies is not known in advance.
+STREAMING_LEVELS = {'br': 4, 'gzip': 5}
+FASTEST_LEVELS = {'br': 0, 'gzip': 1}
+# Weight of the latest measurement in the average cost of a level.
+COST_WEIGHT = 0.2
+
+_stats = {
+    'responses': 0,
+    'bytes_in': 0,
+    'bytes_out': 0,
+    'cpu_seconds': 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def _record(bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+    with _stats_lock:
+        _stats['responses'] += 1
+        _stats['bytes_in'] += bytes_in
+        _stats['bytes_out'] += bytes_out
+        _stats['cpu_seconds'] += cpu_seconds
+
+
+def compression_stats() -> Dict[str, float]:
+    """Return totals of responses compressed by this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def encodings() -> Tuple[str, ...]:
+    """Return supported encodings in order of preference."""
+    if brotli is not None and getattr(settings, 'COMPRESSION_BROTLI', True):
+        return ('br', 'gzip')
+    return ('gzip',)
+
+
+class Compressor:
+    """Incremental compressor of one body."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            # wbits of 31 writes a gzip header and trailer.
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Return all data given so far, the body may go on."""
+        if self.encoding == 'br':
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def is_compressible(response: HttpResponseBase) -> bool:
+    if response.has_header('Content-Encoding'):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Compress responses, goes before middleware changing bodies."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(
+            settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE
+        )
+        self.cpu_budget = getattr(
+            settings, 'COMPRESSION_CPU_BUDGET', DEFAULT_CPU_BUDGET
+        )
+        # Average CPU seconds per byte by encoding and level.
+        self.costs: Dict[Tuple[str, int], float] = {}
+
+    def choose_encoding(self, request: HttpRequest) -> Optional[str]:
+        accepted = accepted_encodings(
+            request.headers.get('Accept-Encoding', '')
+        )
+        for encoding in encodings():
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def choose_level(self, encoding: str, size: int) -> int:
+        level = next(
+            level for limit, level in LEVELS[encoding]
+            if limit is None or size <= limit
+        )
+        cost = self.costs.get((encoding, level))
+        if cost is not None and cost * size > self.cpu_budget:
+            return FASTEST_LEVELS[encoding]
+        return level
+
+    def record_cost(self, encoding: str, level: int, size: int,
+                    cpu_seconds: float) -> None:
+        if not size:
+            return
+        key = (encoding, level)
+        cost = cpu_seconds / size
+        if key in self.costs:
+            cost = self.costs[key] + COST_WEIGHT * (cost - self.costs[key])
+        self.costs[key] = cost
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        response = self.get_response(request)
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            level = STREAMING_LEVELS[encoding]
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, encoding, level
+            )
+            del response['Content-Length']
+        else:
+            content = response.content
+            level = self.choose_level(encoding, len(content))
+            started = time.thread_time()
+            compressed = compress(content, encoding, level)
+            cpu_seconds = time.thread_time() - started
+            self.record_cost(encoding, level, len(content), cpu_seconds)
+            if len(compressed) >= len(content):
+                return response
+            _record(len(content), len(compressed), cpu_seconds)
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Compressed bodies differ byte by byte from the original.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress_stream(self, chunks: Iterable[bytes], encoding: str,
+                        level: int) -> Iterator[bytes]:
+        compressor = Compressor(encoding, level)
+        bytes_in = bytes_out = 0
+        cpu_seconds = 0.0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            started = time.thread_time()
+            data = compressor.compress(chunk) + compressor.flush()
+            cpu_seconds += time.thread_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            yield data
+        started = time.thread_time()
+        data = compressor.finish()
+        cpu_seconds += time.thread_time() - started
+        self.record_cost(encoding, level, bytes_in, cpu_seconds)
+        _record(bytes_in, bytes_out + len(data), cpu_seconds)
+        yield data
@@ -0,0 +1,6 @@
+"""
+PostgreSQL backend keeping connections in a pool of the process.
+
+Use it as ENGINE with pool options in POOL of the database settings,
+see settings.example.py.
+"""
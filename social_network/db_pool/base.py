@@ -0,0 +1,154 @@
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+from django.db.backends.postgresql import base, creation
+from psycopg2 import extensions, extras
+
+from .pool import (
+    DEFAULT_LOG_INTERVAL, DEFAULT_MAX_IDLE, DEFAULT_SIZE, DEFAULT_TIMEOUT,
+    ConnectionPool
+)
+
+Database = base.Database
+
+# Pools of the process by alias and connection parameters, a forked
+# process makes its own.
+_pools: Dict[Tuple[str, str], ConnectionPool] = {}
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+# Connections inherited from the parent process. Closing them would end
+# sessions of the parent, so they are only kept from being collected.
+_inherited: List[Any] = []
+
+
+def _connect(conn_params: Dict[str, Any]):
+    connection = Database.connect(**conn_params)
+    # The same as django.db.backends.postgresql does.
+    extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+    return connection
+
+
+def _is_usable(connection) -> bool:
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+    return True
+
+
+def get_pool(alias: str, settings_dict: dict, conn_params: dict):
+    """Return pool of connections to database alias."""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Sockets of the parent process must not be used, nor closed
+            # when their pools are collected.
+            for old in _pools.values():
+                _inherited.extend(old.detach())
+            _pools.clear()
+            _pools_pid = os.getpid()
+        # Test databases are reached with the same alias.
+        key = (alias, repr(sorted(conn_params.items())))
+        pool = _pools.get(key)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = _pools[key] = ConnectionPool(
+                lambda: _connect(conn_params),
+                size=options.get('SIZE', DEFAULT_SIZE),
+                timeout=options.get('TIMEOUT', DEFAULT_TIMEOUT),
+                max_idle=options.get('MAX_IDLE', DEFAULT_MAX_IDLE),
+                check=_is_usable if options.get('HEALTH_CHECKS', True)
+                else None,
+                check_after=options.get('CHECK_AFTER', 0),
+                name=f"{alias}/{conn_params.get('database', '')}",
+                log_interval=options.get(
+                    'LOG_INTERVAL', DEFAULT_LOG_INTERVAL
+                ),
+            )
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Return metrics of pools of the process by alias and database."""
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            return {}
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_pools() -> None:
+    """Close idle connections of all pools."""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    for pool in pools:
+        pool.close_all()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the database in use.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend taking connections from a pool.
+
+    Closing a connection returns it to the pool, so with CONN_MAX_AGE = 0
+    a request holds a connection only while it is served.
+    """
+    creation_class = DatabaseCreation
+    # Pool and process, which the connection was taken in.
+    _owner: Tuple[Any, int] = (None, 0)
+
+    def _pool(self) -> ConnectionPool:
+        return get_pool(
+            self.alias, self.settings_dict, self.get_connection_params()
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self._pool()
+        connection = pool.acquire()
+        self._owner = (pool, os.getpid())
+        options = self.settings_dict['OPTIONS']
+        if connection.autocommit:
+            # Reported isolation level of autocommitting connections is
+            # useless, autocommit is set again by connect() anyway.
+            connection.autocommit = False
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        connection = self.connection
+        if connection is None:
+            return
+        pool, pid = self._owner
+        if pid != os.getpid():
+            _inherited.append(connection)
+            return
+        if self.in_atomic_block or connection.closed:
+            # close() keeps the wrapper attached to connections closed
+            # inside atomic blocks, they are never shared.
+            pool.discard(connection)
+            return
+        try:
+            if (
+                connection.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+        except Database.Error:
+            pool.discard(connection)
+        else:
+            pool.release(connection)
@@ -0,0 +1,213 @@
+"""
+Pool of database connections shared by threads of a process.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 10
+DEFAULT_TIMEOUT = 5
+DEFAULT_MAX_IDLE = 300
+DEFAULT_LOG_INTERVAL = 300
+
+
+class PoolTimeout(Exception):
+    """No connection got free in time."""
+
+
+class ConnectionPool:
+    """Thread safe pool of DB-API connections.
+
+    At most size connections are open. Idle connections are reused last
+    in first out, those idle for more than max_idle seconds are closed.
+    check(connection) returns False for connections, which must not be
+    reused, it runs on checkout of connections idle for check_after
+    seconds or more. Only connections checked out of the pool are taken
+    back, others are closed. Metrics are logged at most once in
+    log_interval seconds, 0 turns it off.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = DEFAULT_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_idle: float = DEFAULT_MAX_IDLE,
+        check: Optional[Callable[[Any], bool]] = None,
+        check_after: float = 0,
+        name: str = 'default',
+        log_interval: float = DEFAULT_LOG_INTERVAL,
+    ):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check = check
+        self.check_after = check_after
+        self.name = name
+        self.log_interval = log_interval
+        self._logged_at = time.monotonic()
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        # Checked out connections by id.
+        self._busy: Dict[int, Any] = {}
+        self._open = 0
+        self._condition = threading.Condition()
+        self.metrics = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'connects': 0,
+            'evictions': 0,
+            'failed_checks': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'foreign': 0,
+        }
+
+    def _close(self, connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            logger.debug('Closing pooled connection failed', exc_info=True)
+
+    def _evict_idle(self, now: float) -> list:
+        """Take connections idle for too long, with the lock held."""
+        evicted = []
+        # The oldest idle connections are at the left.
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            evicted.append(self._idle.popleft()[0])
+        self._open -= len(evicted)
+        self.metrics['evictions'] += len(evicted)
+        return evicted
+
+    def acquire(self):
+        """Return a connection, waiting for a free one up to timeout."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                evicted = self._evict_idle(now)
+                connection = idle_since = None
+                while connection is None:
+                    if self._idle:
+                        connection, idle_since = self._idle.pop()
+                    elif self._open < self.size:
+                        self._open += 1
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.metrics['timeouts'] += 1
+                            logger.warning(
+                                'No pooled connection got free in %s s',
+                                self.timeout
+                            )
+                            raise PoolTimeout
+                        self._condition.wait(remaining)
+            for stale in evicted:
+                self._close(stale)
+
+            if connection is None:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    with self._condition:
+                        self._open -= 1
+                        self._condition.notify()
+                    raise
+                self.metrics['connects'] += 1
+            elif (
+                self.check is not None
+                and time.monotonic() - idle_since >= self.check_after
+                and not self.check(connection)
+            ):
+                self.metrics['failed_checks'] += 1
+                self._close(connection)
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                continue
+
+            waited = time.monotonic() - started
+            with self._condition:
+                self._busy[id(connection)] = connection
+                self.metrics['checkouts'] += 1
+                self.metrics['wait_seconds'] += waited
+                self.metrics['max_wait_seconds'] = max(
+                    self.metrics['max_wait_seconds'], waited
+                )
+            return connection
+
+    def _take_back(self, connection) -> bool:
+        """Take back connection of the pool, with the lock held."""
+        if self._busy.pop(id(connection), None) is connection:
+            return True
+        for index, (idle, _) in enumerate(self._idle):
+            if idle is connection:
+                # Released twice.
+                del self._idle[index]
+                return True
+        self.metrics['foreign'] += 1
+        logger.warning('Connection not taken from pool %s', self.name)
+        return False
+
+    def release(self, connection) -> None:
+        """Return connection to the pool."""
+        with self._condition:
+            taken = self._take_back(connection)
+            if taken:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+        if not taken:
+            self._close(connection)
+        self._log_stats()
+
+    def discard(self, connection) -> None:
+        """Close broken connection instead of returning it."""
+        self._close(connection)
+        with self._condition:
+            if self._take_back(connection):
+                self._open -= 1
+                self._condition.notify()
+
+    def close_all(self) -> None:
+        """Close idle connections."""
+        with self._condition:
+            idle, self._idle = self._idle, deque()
+            self._open -= len(idle)
+        for connection, _ in idle:
+            self._close(connection)
+
+    def detach(self) -> list:
+        """Forget idle and checked out connections without closing them."""
+        with self._condition:
+            detached = [connection for connection, _ in self._idle]
+            detached.extend(self._busy.values())
+            self._idle.clear()
+            self._busy.clear()
+            self._open = 0
+        return detached
+
+    def stats(self) -> Dict[str, Any]:
+        """Return metrics with amounts of open and idle connections."""
+        with self._condition:
+            return {
+                **self.metrics,
+                'open': self._open,
+                'idle': len(self._idle),
+                'busy': len(self._busy),
+            }
+
+    def _log_stats(self) -> None:
+        if not self.log_interval:
+            return
+        now = time.monotonic()
+        with self._condition:
+            if now - self._logged_at < self.log_interval:
+                return
+            self._logged_at = now
+        logger.info('Pool %s: %s', self.name, self.stats())
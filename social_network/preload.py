@@ -0,0 +1,94 @@
+"""
+Warm up a process before it starts serving requests.
+
+Called from wsgi.py and asgi.py. Servers loading the application before
+forking workers (gunicorn --preload, uwsgi without lazy-apps) share the
+result between all workers.
+"""
+import logging
+import os
+import sys
+from typing import Iterator
+
+from django.db import connections
+from django.forms.renderers import get_default_renderer
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def _template_names(directory: str) -> Iterator[str]:
+    """Yield names of templates in directory, relative to it."""
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def _preload_engine(engine) -> int:
+    directories = {
+        str(directory)
+        for loader in engine.template_loaders
+        if hasattr(loader, 'get_dirs')
+        for directory in loader.get_dirs()
+    }
+    loaded = 0
+    for directory in sorted(directories):
+        for name in _template_names(str(directory)):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                # Some contrib templates need libraries of apps, which
+                # are not installed; they are never rendered anyway.
+                logger.debug('Template %s is not preloaded', name)
+                continue
+            loaded += 1
+    return loaded
+
+
+def preload_templates() -> int:
+    """Compile every template into cached loaders of all engines.
+
+    Return amount of compiled templates.
+    """
+    backends = [
+        backend for backend in engines.all()
+        if isinstance(backend, DjangoTemplates)
+    ]
+    renderer_engine = getattr(get_default_renderer(), 'engine', None)
+    if isinstance(renderer_engine, DjangoTemplates):
+        backends.append(renderer_engine)
+    return sum(_preload_engine(backend.engine) for backend in backends)
+
+
+def warm_caches() -> None:
+    """Fill caches of the process with the hottest pages."""
+    from posts.warmup import warm_from_settings
+
+    try:
+        result = warm_from_settings()
+    except Exception:
+        logger.exception('Cache warming failed')
+        return
+    finally:
+        # Workers forked later must not share sockets of the parent.
+        connections.close_all()
+        # Pooled connections are only returned to their pools by that.
+        pooled = sys.modules.get('social_network.db_pool.base')
+        if pooled is not None:
+            pooled.close_pools()
+    logger.info('Caches warmed: %s', result)
+
+
+def warm_caches_on_start() -> None:
+    """Warm caches before serving.
+
+    Workers forked right after loading get warm copies of caches of the
+    parent. Workers forked later, e.g. to replace dead ones, get copies
+    as they are then, and fill the rest on demand.
+    """
+    warm_caches()
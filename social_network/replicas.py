@@ -0,0 +1,120 @@
+"""
+Routing of reads to database replicas.
+
+Reads go to one of DATABASE_REPLICAS only while a safe request is
+served by a view of REPLICA_VIEW_MODULES, everything else, including
+background jobs and commands, uses the primary. A user, who has written
+something, reads from the primary for READ_YOUR_WRITES_SECONDS, so they
+see their changes despite replication lag.
+"""
+import random
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse
+
+DEFAULT_READ_YOUR_WRITES_SECONDS = 10
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Database routing of one request."""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.replica: Optional[str] = None
+        self.wrote = False
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar(
+    'routing_state', default=None
+)
+
+
+def _pin_key(user_id: int) -> str:
+    return f'replicas:pinned:{user_id}'
+
+
+def pin_to_primary(user_id: int) -> None:
+    """Send reads of user to the primary for a while."""
+    cache.set(
+        _pin_key(user_id),
+        True,
+        getattr(
+            settings,
+            'READ_YOUR_WRITES_SECONDS',
+            DEFAULT_READ_YOUR_WRITES_SECONDS
+        )
+    )
+
+
+def is_pinned(user_id: int) -> bool:
+    return bool(cache.get(_pin_key(user_id)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints) -> str:
+        state = _state.get()
+        # Rows written by the request are not on replicas yet.
+        if (
+            state is not None and state.replica is not None
+            and not state.wrote
+        ):
+            return state.replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReadYourWritesMiddleware:
+    """Choose database of request reads, must follow authentication."""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        user = getattr(request, 'user', None)
+        authenticated = user is not None and user.is_authenticated
+        state = RoutingState(
+            pinned=(
+                request.method not in SAFE_METHODS
+                or authenticated and is_pinned(user.pk)
+            )
+        )
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
+
+    def process_view(self, request: HttpRequest, view_func, view_args,
+                     view_kwargs) -> None:
+        state = _state.get()
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if (
+            state is not None and not state.pinned and replicas
+            and view_func.__module__ in getattr(
+                settings, 'REPLICA_VIEW_MODULES', []
+            )
+        ):
+            state.replica = random.choice(replicas)
@@ -38,10 +38,14 @@ INTERNAL_IPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'social_network.staticfiles.StaticFilesMiddleware',
+    'social_network.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CookieAwareAuthenticationMiddleware',
+    'users.middleware.PasswordHashingBusyMiddleware',
+    'social_network.replicas.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -56,10 +60,18 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR, ADDITIONAL_TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory of the process,
+            # see PRELOAD_TEMPLATES.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'posts.context_processors.year',
+                'posts.context_processors.viewer',
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -71,18 +83,68 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'social_network.wsgi.application'
 
+# Compile all templates when wsgi.py or asgi.py is imported, before
+# workers fork if the server preloads the application.
+PRELOAD_TEMPLATES = not DEBUG
+
+# Render WARM_CACHE_PAGES first pages of the index, of WARM_CACHE_GROUPS
+# hottest groups and of WARM_CACHE_PROFILES most followed profiles on
+# start, at most WARM_CACHE_RATE pages per second. warm_cache command
+# does the same for shared caches.
+WARM_CACHE_ON_START = not DEBUG
+
+WARM_CACHE_PAGES = 3
+
+WARM_CACHE_GROUPS = 10
+
+WARM_CACHE_PROFILES = 10
+
+WARM_CACHE_RATE = 10
+
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'social_network.db_pool',
         'NAME': '{NAME}',
         'USER': '{USER}',
         'PASSWORD': '{PASSWORD}',
         'HOST': '127.0.0.1',
         'PORT': '5432',
-    }
+        # Connections go back to the pool of the process after every
+        # request. Keep SIZE times processes below max_connections.
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'SIZE': 10,
+            # Seconds to wait for a free connection.
+            'TIMEOUT': 5,
+            # Seconds after which idle connections are closed.
+            'MAX_IDLE': 300,
+            # Run SELECT 1 on connections idle for CHECK_AFTER seconds.
+            'HEALTH_CHECKS': True,
+            'CHECK_AFTER': 30,
+            # Seconds between pool metrics logged at INFO level by
+            # social_network.db_pool.pool, 0 turns it off.
+            'LOG_INTERVAL': 300,
+        },
+    },
+    # Replicas are listed in DATABASE_REPLICAS, e.g.:
+    # 'replica': {
+    #     'ENGINE': 'django.db.backends.postgresql',
+    #     ...
+    # },
 }
 
+DATABASE_ROUTERS = ['social_network.replicas.ReplicaRouter']
+
+# Aliases of DATABASES, which safe requests to REPLICA_VIEW_MODULES read
+# from. Users read from the primary for READ_YOUR_WRITES_SECONDS after
+# they wrote something.
+DATABASE_REPLICAS = []
+
+REPLICA_VIEW_MODULES = ['posts.views']
+
+READ_YOUR_WRITES_SECONDS = 10
+
 
 CACHES = {
     'default': {
@@ -90,6 +152,85 @@ CACHES = {
     }
 }
 
+# Admin changelists of bigger tables show pg_class estimate instead of
+# exact COUNT(*).
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 10000
+
+# Background jobs run in a thread pool of each process after commit,
+# eager mode runs them right away (handy in tests).
+BACKGROUND_TASK_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# 'threads' runs jobs in the pool above, 'database' saves them for
+# runworker, which retries failed jobs up to JOB_MAX_ATTEMPTS times and
+# takes jobs of dead workers back after JOB_LEASE seconds.
+#
+# Progress of jobs is kept in the default cache. With LocMemCache admin
+# sees progress only of jobs run by the process serving it, and jobs of
+# the 'threads' backend are lost on restart, so deployments with several
+# processes need a shared cache and the 'database' backend.
+BACKGROUND_TASKS_BACKEND = 'threads'
+
+JOB_MAX_ATTEMPTS = 3
+
+JOB_LEASE = 60 * 60
+
+MODERATION_BATCH_SIZE = 500
+
+# Posts and comments lose half of their weight in trending scores in
+# TRENDING_HALF_LIFE seconds. Scores are merged into cache with every
+# batch of drained outbox events, others TRENDING_FLUSH_INTERVAL seconds
+# after the first unmerged one and on exit. TRENDING_SIZE best are kept.
+TRENDING_HALF_LIFE = 60 * 60 * 6
+
+TRENDING_FLUSH_INTERVAL = 30
+
+TRENDING_SIZE = 1000
+
+# Outbox events of changes are delivered to handlers by drain_outbox in
+# batches of OUTBOX_BATCH_SIZE. Failed events are retried with growing
+# delays, OUTBOX_MAX_ATTEMPTS times at most.
+OUTBOX_BATCH_SIZE = 100
+
+OUTBOX_MAX_ATTEMPTS = 10
+
+# New posts and comments are pushed to browsers over server-sent events
+# at REALTIME_EVENTS_URL, which only the ASGI application serves, so it
+# is off by default; set it to e.g. '/events/' when serving with ASGI.
+# LocalBroker reaches clients of its own process, several processes need
+# a broker passing events between them.
+REALTIME_EVENTS_URL = None
+
+REALTIME_BROKER = 'posts.realtime.LocalBroker'
+
+# Seconds between keep-alive comments of idle event streams.
+REALTIME_HEARTBEAT = 15
+
+# Sessions and users of sessions are read from cache. With several server
+# processes the cache must be shared by them (Memcached, Redis), changes
+# of sessions reach the database in background.
+SESSION_ENGINE = 'users.sessions'
+
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
+# Passwords are hashed by a pool of processes. Put
+# PooledScryptPasswordHasher first to move users to memory-hard scrypt,
+# hashes are upgraded on login.
+PASSWORD_HASHERS = [
+    'users.hashers.PooledPBKDF2PasswordHasher',
+    'users.hashers.PooledScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# 0 hashes passwords in request workers.
+PASSWORD_HASHING_WORKERS = 2
+
+# Hashes in flight per server process, others wait for
+# PASSWORD_HASHING_TIMEOUT seconds and get 503.
+PASSWORD_HASHING_QUEUE = 8
+
+PASSWORD_HASHING_TIMEOUT = 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -124,10 +265,47 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic stores hashed names with a manifest and their .gz and,
+# with the brotli package installed, .br variants. Hashed names are served
+# as immutable, other static files are cached for STATIC_MAX_AGE seconds.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'social_network.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+
+STATIC_MAX_AGE = 60
+
+# Post pages served over WSGI send everything before their comments at
+# once and render the comments by chunks of STREAM_CHUNK_SIZE.
+STREAM_PAGES = True
+
+STREAM_CHUNK_SIZE = 10
+
+# Text responses of at least COMPRESSION_MIN_SIZE bytes are compressed with
+# brotli, if the package is installed, or gzip. A level expected to take
+# more than COMPRESSION_CPU_BUDGET seconds is replaced by the fastest one.
+COMPRESSION_MIN_SIZE = 512
+
+COMPRESSION_CPU_BUDGET = 0.005
+
+COMPRESSION_BROTLI = True
+
 MEDIA_URL = 'media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Post images are stored once per content. Purges keep a file reused by
+# an upload during the last IMAGE_REUSE_GRACE seconds.
+IMAGE_REUSE_GRACE = 60
+
+# Thumbnails of a page of cards are looked up in cache at once, with one
+# query of the key-value table for misses.
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+
+THUMBNAIL_KVSTORE = 'posts.thumbnails.KVStore'
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,215 @@
+"""
+Static files compressed by collectstatic and served with far-future caching.
+
+CompressedManifestStaticFilesStorage stores hashed copies of files with a
+manifest, as ManifestStaticFilesStorage does, and writes .gz and, if the
+brotli package is installed, .br variants next to compressible ones.
+
+StaticFilesMiddleware serves STATIC_ROOT before the rest of the stack,
+choosing a variant by Accept-Encoding. Hashed names never change their
+content, so they are cached for a year as immutable, other names for
+STATIC_MAX_AGE seconds. Files go out through FileResponse, which servers
+with wsgi.file_wrapper (gunicorn, uwsgi) send with sendfile().
+"""
+import gzip
+import mimetypes
+import os
+import stat
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage
+)
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html',
+    '.xml', '.ico', '.ttf', '.otf', '.eot',
+)
+# Smaller files do not get much smaller.
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+DEFAULT_MAX_AGE = 60
+
+# Content-Encoding by suffix of variant, in order of preference.
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+
+def compress_file(path: str) -> List[str]:
+    """Write compressed variants of file, return their paths.
+
+    Variants, which do not save at least 5%, are not written.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) > len(data) * 0.95:
+            continue
+        temp_path = f'{path}{suffix}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(compressed)
+        os.replace(temp_path, path + suffix)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def compress(self, names: Iterable[str]) -> None:
+        for name in names:
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                compress_file(self.path(name))
+
+    def post_process(self, paths, dry_run=False, **options):
+        names: Set[str] = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            yield name, hashed_name, processed
+            if hashed_name and not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+        if not dry_run:
+            self.compress(sorted(names))
+
+
+class StaticFile(NamedTuple):
+    path: str
+    content_type: str
+    size: int
+    modified: float
+    # Paths and sizes of compressed variants by encoding.
+    variants: Dict[str, tuple]
+
+
+@lru_cache(maxsize=4096)
+def find_static_file(root: str, name: str) -> Optional[StaticFile]:
+    """Return collected file with name or None, cached until restart."""
+    try:
+        path = safe_join(root, name)
+        stats = os.stat(path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        return None
+    if not stat.S_ISREG(stats.st_mode):
+        return None
+    content_type, _ = mimetypes.guess_type(path)
+    if content_type and content_type.startswith('text/'):
+        content_type += '; charset=utf-8'
+    variants = {}
+    for encoding, suffix in ENCODINGS.items():
+        try:
+            size = os.stat(path + suffix).st_size
+        except OSError:
+            continue
+        variants[encoding] = (path + suffix, size)
+    return StaticFile(
+        path,
+        content_type or 'application/octet-stream',
+        stats.st_size,
+        stats.st_mtime,
+        variants
+    )
+
+
+def accepted_encodings(header: str) -> Set[str]:
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_ROOT, must go right after SecurityMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not settings.STATIC_ROOT or not settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.root = str(settings.STATIC_ROOT)
+        self.prefix = urlsplit(settings.STATIC_URL).path
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self._immutable: Optional[Set[str]] = None
+
+    @property
+    def immutable(self) -> Set[str]:
+        """Return hashed names of the manifest."""
+        if self._immutable is None:
+            self._immutable = set(
+                getattr(staticfiles_storage, 'hashed_files', {}).values()
+            )
+        return self._immutable
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            name = request.path_info[len(self.prefix):]
+            static_file = find_static_file(self.root, name)
+            if static_file is not None:
+                return self.serve(request, name, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, name: str, static_file: StaticFile):
+        path, size = static_file.path, static_file.size
+        headers = {}
+        if static_file.variants:
+            headers['Vary'] = 'Accept-Encoding'
+            accepted = accepted_encodings(
+                request.headers.get('Accept-Encoding', '')
+            )
+            for encoding in ENCODINGS:
+                if encoding in accepted and encoding in static_file.variants:
+                    path, size = static_file.variants[encoding]
+                    headers['Content-Encoding'] = encoding
+                    break
+        if name in self.immutable:
+            cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            max_age = getattr(settings, 'STATIC_MAX_AGE', DEFAULT_MAX_AGE)
+            cache_control = f'public, max-age={max_age}'
+        # Each variant has its own tag, sizes differ.
+        etag = f'"{size:x}-{int(static_file.modified):x}"'
+        headers.update({
+            'Cache-Control': cache_control,
+            'ETag': etag,
+            'Last-Modified': http_date(static_file.modified),
+        })
+        if request.headers.get('If-None-Match') == etag:
+            return self.with_headers(HttpResponseNotModified(), headers)
+
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=static_file.content_type)
+        else:
+            response = FileResponse(
+                open(path, 'rb'), content_type=static_file.content_type
+            )
+            # Files are shown, not downloaded.
+            del response['Content-Disposition']
+        response['Content-Length'] = size
+        return self.with_headers(response, headers)
+
+    @staticmethod
+    def with_headers(response, headers: Dict[str, str]):
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_network.settings')
 
 application = get_wsgi_application()
+
+if getattr(settings, 'PRELOAD_TEMPLATES', False):
+    from social_network.preload import preload_templates
+
+    preload_templates()
+
+if getattr(settings, 'WARM_CACHE_ON_START', False):
+    from social_network.preload import warm_caches_on_start
+
+    warm_caches_on_start()
@@ -1,3 +1,24 @@
 from django.contrib import admin
+from django.contrib.auth import admin as auth_admin, get_user_model
 
-# Register your models here.
+from posts import moderation
+from posts.admin import BackgroundActionsAdmin
+
+User = get_user_model()
+
+
+@admin.action(description='Удалить все записи и комментарии пользователей')
+def purge_content(modeladmin, request, queryset) -> None:
+    modeladmin.enqueue_action(
+        request,
+        moderation.purge_user_content,
+        list(queryset.values_list('pk', flat=True))
+    )
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(BackgroundActionsAdmin, auth_admin.UserAdmin):
+    actions = (purge_content, )
@@ -0,0 +1,30 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+def _user_key(user_id) -> str:
+    return f'auth_user:{user_id}'
+
+
+def invalidate_user(user_id) -> None:
+    """Drop cached user.
+
+    Called on save and delete of users, bulk updates of users must call
+    it themselves.
+    """
+    cache.delete(_user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend loading users of sessions from cache."""
+
+    def get_user(self, user_id):
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
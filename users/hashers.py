@@ -0,0 +1,97 @@
+"""
+Password hashers computing hashes in a pool of processes.
+
+Request workers wait for the result instead of burning CPU themselves,
+at most PASSWORD_HASHING_QUEUE hashes of a process are in flight, others
+get PasswordHashingBusy after PASSWORD_HASHING_TIMEOUT seconds. With
+PASSWORD_HASHING_WORKERS = 0 hashes are computed in place.
+
+Algorithms keep Django names, so existing hashes stay valid and are
+upgraded on login when the first of PASSWORD_HASHERS changes.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Type
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULT_TIMEOUT = 5
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_pid: Optional[int] = None
+
+
+class PasswordHashingBusy(Exception):
+    """Too many passwords are being hashed, try again later."""
+
+
+def _encode(hasher_class: Type[hashers.BasePasswordHasher], args) -> str:
+    return hasher_class().encode(*args)
+
+
+def _get_pool(workers: int):
+    global _pool, _slots, _pid
+    with _lock:
+        # Pools are not inherited by forked server workers.
+        if _pool is None or _pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _slots = threading.BoundedSemaphore(
+                getattr(settings, 'PASSWORD_HASHING_QUEUE', workers * 4)
+            )
+            _pid = os.getpid()
+        return _pool, _slots
+
+
+def shutdown_pool() -> None:
+    """Stop pool processes, next hash starts a new pool."""
+    global _pool
+    with _lock:
+        if _pool is not None and _pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+def encode_in_pool(hasher_class: Type[hashers.BasePasswordHasher], *args):
+    """Return hasher_class().encode(*args) computed in pool."""
+    workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+    if not workers:
+        return _encode(hasher_class, args)
+
+    pool, slots = _get_pool(workers)
+    timeout = getattr(settings, 'PASSWORD_HASHING_TIMEOUT', DEFAULT_TIMEOUT)
+    if not slots.acquire(timeout=timeout):
+        raise PasswordHashingBusy
+    try:
+        return pool.submit(_encode, hasher_class, args).result()
+    finally:
+        slots.release()
+
+
+class PooledPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        return encode_in_pool(
+            hashers.PBKDF2PasswordHasher,
+            password,
+            salt,
+            iterations or self.iterations
+        )
+
+
+class PooledScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """Memory-hard scrypt hasher."""
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        self._check_encode_args(password, salt)
+        return encode_in_pool(
+            hashers.ScryptPasswordHasher,
+            password,
+            salt,
+            n or self.work_factor,
+            r or self.block_size,
+            p or self.parallelism
+        )
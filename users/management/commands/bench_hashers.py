@@ -0,0 +1,61 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput with in place and pooled hashing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Request threads checking passwords at once.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes of hashing pool.'
+        )
+
+    def measure(self, encoded: str, logins: int, concurrency: int) -> float:
+        """Return logins per second."""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda _: check_password(PASSWORD, encoded), range(logins)
+            ))
+        assert all(results)
+        return logins / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        concurrency = options['concurrency']
+        workers = options['workers']
+        cores = os.cpu_count() or 1
+
+        with override_settings(PASSWORD_HASHING_WORKERS=0):
+            encoded = make_password(PASSWORD)
+            before = self.measure(encoded, logins, concurrency)
+        with override_settings(
+            PASSWORD_HASHING_WORKERS=workers,
+            PASSWORD_HASHING_QUEUE=concurrency,
+            PASSWORD_HASHING_TIMEOUT=None,
+        ):
+            # Start pool processes before measuring.
+            check_password(PASSWORD, encoded)
+            after = self.measure(encoded, logins, concurrency)
+
+        self.stdout.write(f'{encoded.split("$", 1)[0]}, {cores} cores')
+        self.stdout.write(
+            f'in place: {before:.1f} logins/s, {before / cores:.1f} per core'
+        )
+        self.stdout.write(
+            f'pool of {workers}: {after:.1f} logins/s, '
+            f'{after / cores:.1f} per core'
+        )
@@ -0,0 +1,47 @@
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse
+
+from .hashers import PasswordHashingBusy
+
+
+class CookieAwareAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, which does not touch session of
+    requests without session cookie.
+
+    Such requests are anonymous anyway, so they get AnonymousUser right
+    away and never load session or user.
+    """
+
+    def process_request(self, request: HttpRequest) -> None:
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            request.user = AnonymousUser()
+            return
+        super().process_request(request)
+
+
+class PasswordHashingBusyMiddleware:
+    """Answer 503 when password hashing pool is overloaded."""
+
+    retry_after = 5
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        return self.get_response(request)
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> Optional[HttpResponse]:
+        if not isinstance(exception, PasswordHashingBusy):
+            return None
+        response = HttpResponse(
+            'Сервис перегружен, попробуйте позже.', status=503
+        )
+        response['Retry-After'] = str(self.retry_after)
+        return response
@@ -0,0 +1,80 @@
+"""
+Session engine reading sessions from cache and writing them behind.
+
+Sessions are created, filled on login and deleted in the database right
+away, so keys stay unique and login and logout take effect at once.
+Later changes go to cache first and reach the database in background.
+Lookups of unknown keys are cached too, so stale cookies do not query
+the database on every request.
+"""
+from datetime import datetime
+
+from django.contrib.sessions.backends import cached_db
+
+from posts.tasks import defer
+
+# Cached in place of session data for keys, which are not in database.
+MISSING = '__missing__'
+MISSING_TIMEOUT = 60
+
+
+def write_session(
+    session_key: str, session_data: str, expire_date: datetime
+) -> None:
+    """Save changed session to database.
+
+    Only existing rows are updated: a write, which comes after logout,
+    must not bring the session back.
+    """
+    SessionStore.get_model_class().objects.filter(
+        session_key=session_key
+    ).update(session_data=session_data, expire_date=expire_date)
+
+
+class SessionStore(cached_db.SessionStore):
+    created = False
+
+    def load(self):
+        cache_key = self.cache_key
+        try:
+            data = self._cache.get(cache_key)
+        except Exception:
+            # Some backends (e.g. memcache) raise an exception on invalid
+            # cache keys, like cached_db does, treat it as a miss.
+            data = None
+
+        if data == MISSING:
+            self._session_key = None
+            return {}
+        if data is None:
+            session = self._get_session_from_db()
+            if session:
+                data = self.decode(session.session_data)
+                self._cache.set(
+                    cache_key,
+                    data,
+                    self.get_expiry_age(expiry=session.expire_date)
+                )
+            else:
+                self._cache.set(cache_key, MISSING, MISSING_TIMEOUT)
+                data = {}
+        return data
+
+    def create(self):
+        super().create()
+        self.created = True
+
+    def save(self, must_create=False):
+        # New sessions, e.g. ones cycled on login, are saved right away
+        # for the whole request they are created in.
+        if must_create or self.session_key is None or self.created:
+            return super().save(must_create=must_create)
+
+        data = self._get_session()
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        defer(
+            write_session,
+            self.session_key,
+            self.encode(data),
+            self.get_expiry_date()
+        )
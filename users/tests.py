@@ -1,3 +1,149 @@
-from django.test import TestCase
+from django.contrib.auth import SESSION_KEY, get_user_model, hashers
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from users.backends import CachedModelBackend
+from users.hashers import (
+    PasswordHashingBusy, PooledPBKDF2PasswordHasher, shutdown_pool
+)
+from users.sessions import SessionStore
+
+User = get_user_model()
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class SessionStoreTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_changes_are_written_behind(self) -> None:
+        """Test changed session goes to cache now and to DB on commit."""
+        session = SessionStore()
+        session['value'] = 1
+        session.save()
+        key = session.session_key
+
+        session = SessionStore(key)
+        session['value'] = 2
+        with self.captureOnCommitCallbacks() as callbacks:
+            session.save()
+        self.assertEqual(SessionStore(key)['value'], 2)
+        stored = Session.objects.get(session_key=key).get_decoded()
+        self.assertEqual(stored['value'], 1)
+
+        for callback in callbacks:
+            callback()
+        stored = Session.objects.get(session_key=key).get_decoded()
+        self.assertEqual(stored['value'], 2)
+
+    def test_write_after_delete_does_not_restore_session(self) -> None:
+        """Test pending write of deleted session is dropped."""
+        session = SessionStore()
+        session['value'] = 1
+        session.save()
+        session = SessionStore(session.session_key)
+        session['value'] = 2
+        with self.captureOnCommitCallbacks() as callbacks:
+            session.save()
+        session.delete()
+        for callback in callbacks:
+            callback()
+        self.assertFalse(Session.objects.exists())
+
+    def test_unknown_key_is_cached(self) -> None:
+        """Test unknown session key queries DB once."""
+        with self.assertNumQueries(1):
+            self.assertEqual(SessionStore('a' * 32).load(), {})
+        session = SessionStore('a' * 32)
+        with self.assertNumQueries(0):
+            self.assertEqual(session.load(), {})
+        self.assertIsNone(session.session_key)
+
+
+class AuthenticationCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='User', password='password'
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_user_is_cached_until_saved(self) -> None:
+        """Test user is loaded once and reloaded after save."""
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+        self.user.set_password('new password')
+        self.user.save()
+        with self.assertNumQueries(1):
+            user = self.backend.get_user(self.user.pk)
+        self.assertTrue(user.check_password('new password'))
+
+    def test_logout_drops_cached_user(self) -> None:
+        """Test logout removes user from cache."""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        authorized_client.get(reverse('index'))
+        authorized_client.get(reverse('logout'))
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+    def test_anonymous_request_skips_session(self) -> None:
+        """Test request without session cookie does not query DB."""
+        response = Client().get(reverse('login'))
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = Client().get(reverse('login'))
+
+    def test_logged_in_user_is_loaded_from_cache(self) -> None:
+        """Test authenticated request loads session and user from cache."""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        authorized_client.get(reverse('login'))
+        with self.assertNumQueries(0):
+            response = authorized_client.get(reverse('login'))
+        self.assertEqual(
+            int(authorized_client.session[SESSION_KEY]), self.user.pk
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(PASSWORD_HASHING_WORKERS=1)
+class PooledHasherTests(TestCase):
+    def setUp(self) -> None:
+        # Pool is started again with settings of the test.
+        shutdown_pool()
+        self.addCleanup(shutdown_pool)
+
+    def test_hash_is_compatible(self) -> None:
+        """Test pooled hasher gives the same hash as Django's one."""
+        self.assertEqual(
+            PooledPBKDF2PasswordHasher().encode('password', 'salt'),
+            hashers.PBKDF2PasswordHasher().encode('password', 'salt')
+        )
+
+    def test_password_is_rehashed_on_login(self) -> None:
+        """Test hash of an older hasher is upgraded on login."""
+        user = User.objects.create_user(username='User')
+        user.password = hashers.make_password('password', hasher='pbkdf2_sha1')
+        user.save()
+        self.assertTrue(Client().login(username='User', password='password'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+    @override_settings(PASSWORD_HASHING_QUEUE=0, PASSWORD_HASHING_TIMEOUT=0)
+    def test_busy_pool_answers_503(self) -> None:
+        """Test hashing over the queue limit is rejected."""
+        with self.assertRaises(PasswordHashingBusy):
+            hashers.make_password('password')
+        response = Client().post(
+            reverse('login'), {'username': 'User', 'password': 'password'}
+        )
+        self.assertEqual(response.status_code, 503)